@@ -1,99 +1,157 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-from io import BytesIO
-
-# Load the data
-@st.cache_data
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from data_cache import get_frame, load_shared, shared_cache
+from correlation_engine import CORRELATION_COLUMNS, file_correlations
+from binning import wind_rose_bins
+from downsampling import downsample_frame
+from visualization import new_figure, draw_wind_rose
+from export import EXPORT_FORMATS, available_formats, export_data, export_file_name
+from instrumentation import instrumented, records_frame, recent_records, clear_records
+
+# Figures are built on standalone Agg canvases (no pyplot state shared
+# between sessions); seaborn is imported only when a heatmap is drawn.
+
+def data_path(country):
+    return f'outputs/{country}/{country}_cleaned_data.csv'
+
+# Load the data (shared process-wide cache, no per-hit copies)
 def load_data(country):
-    return pd.read_csv(f'outputs/{country}/{country}_cleaned_data.csv', parse_dates=['Timestamp'])
+    return get_frame(data_path(country), load_shared)
 
 # Create time series plot
+@instrumented()
 def plot_time_series(df, column):
-    fig, ax = plt.subplots(figsize=(12, 6))
+    df = downsample_frame(df, 'Timestamp', [column])
+    fig, ax = new_figure((12, 6))
     ax.plot(df['Timestamp'], df[column])
     ax.set_title(f'{column} Over Time')
     ax.set_xlabel('Timestamp')
     ax.set_ylabel(column)
-    plt.xticks(rotation=45)
+    ax.tick_params(axis='x', labelrotation=45)
     return fig
 
-# Create correlation heatmap
-def plot_correlation(df, columns):
-    correlation_matrix = df[columns].corr()
-    fig, ax = plt.subplots(figsize=(10, 8))
+# Create correlation heatmap (subset of the cached per-file correlation sums)
+@instrumented()
+def plot_correlation(correlations, columns):
+    import seaborn as sns
+    correlation_matrix = correlations.correlation(columns)
+    fig, ax = new_figure((10, 8))
     sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', ax=ax)
     ax.set_title('Correlation Matrix')
     return fig
 
 # Create wind rose
+@instrumented()
 def plot_wind_rose(df):
-    fig, ax = plt.subplots(figsize=(10, 10), subplot_kw=dict(projection='polar'))
-    ax.bar(df['WD'] * np.pi / 180, df['WS'], bins=16)
+    fig, ax = new_figure((10, 10), projection='polar')
+    draw_wind_rose(ax, wind_rose_bins(df['WD'], df['WS']))
     ax.set_title('Wind Rose - Speed and Direction')
     return fig
 
 # Create bubble chart
+@instrumented()
 def plot_bubble_chart(df):
-    fig, ax = plt.subplots(figsize=(12, 8))
+    fig, ax = new_figure((12, 8))
     scatter = ax.scatter(df['Tamb'], df['GHI'], s=df['RH'], c=df['WS'], cmap='viridis', alpha=0.6)
-    plt.colorbar(scatter, label='Wind Speed (m/s)')
+    fig.colorbar(scatter, ax=ax, label='Wind Speed (m/s)')
     ax.set_title('GHI vs Temperature vs Humidity vs Wind Speed')
     ax.set_xlabel('Ambient Temperature (°C)')
     ax.set_ylabel('Global Horizontal Irradiance (W/m²)')
     return fig
 
-# Streamlit app
-st.title('Solar Radiation Analysis Dashboard')
-
-# Sidebar for country selection
-country = st.sidebar.selectbox('Select Country', ['Benin', 'Sierra Leone', 'Togo'])
-
-# Load data for selected country
-df = load_data(country)
-
-st.header(f'Solar Radiation Analysis for {country}')
-
-# Display summary statistics
-st.subheader('Summary Statistics')
-st.write(df.describe())
-
-# Time series analysis
-st.subheader('Time Series Analysis')
-column = st.selectbox('Select variable for time series', ['GHI', 'DNI', 'DHI', 'Tamb'])
-st.pyplot(plot_time_series(df, column))
-
-# Correlation analysis
-st.subheader('Correlation Analysis')
-correlation_columns = st.multiselect('Select variables for correlation analysis', 
-                                     ['GHI', 'DNI', 'DHI', 'TModA', 'TModB', 'WS', 'WSgust', 'WD'],
-                                     default=['GHI', 'DNI', 'DHI', 'TModA', 'TModB'])
-if correlation_columns:
-    st.pyplot(plot_correlation(df, correlation_columns))
-
-# Wind analysis
-st.subheader('Wind Analysis')
-st.pyplot(plot_wind_rose(df))
-
-# Temperature, Humidity, and Solar Radiation Analysis
-st.subheader('Temperature, Humidity, and Solar Radiation Analysis')
-st.pyplot(plot_bubble_chart(df))
-
-# Data quality information
-st.subheader('Data Quality Information')
-missing_values = df.isnull().sum()
-st.write('Missing Values:')
-st.write(missing_values[missing_values > 0])
-
-# Download cleaned data
-st.subheader('Download Cleaned Data')
-csv = df.to_csv(index=False)
-st.download_button(
-    label="Download CSV",
-    data=csv,
-    file_name=f'{country}_cleaned_data.csv',
-    mime='text/csv',
-)
+# The export is built (or reused from the shared export cache) only after
+# "Prepare export" is clicked, never on a plain rerun; the prepared file is
+# remembered per selection for the reruns that follow
+def prepared_export(country, export_format, start_date=None, end_date=None):
+    key = f'export:{country}:{export_format}:{start_date}:{end_date}'
+    if st.button('Prepare export'):
+        st.session_state[key] = export_data(data_path(country), export_format,
+                                            start_date, end_date)
+    path = st.session_state.get(key)
+    return path if path is not None and os.path.exists(path) else None
+
+# Stage timings recorded by this server process, plus data cache counters
+def render_debug_panel():
+    st.subheader('Debug: Stage Timings')
+    records = records_frame(recent_records())
+    st.dataframe(records.iloc[::-1])
+    if not records.empty:
+        st.write(records.groupby('stage')[['wall_s', 'cpu_s']].agg(['count', 'sum', 'max']))
+    st.write('Data cache:', shared_cache.stats())
+    if st.button('Clear timings'):
+        clear_records()
 
+# Streamlit app
+def main():
+    st.title('Solar Radiation Analysis Dashboard')
+
+    # Sidebar for country selection
+    country = st.sidebar.selectbox('Select Country', ['Benin', 'Sierra Leone', 'Togo'])
+    show_debug = st.sidebar.checkbox('Show stage timings')
+
+    # Load data for selected country
+    df = load_data(country)
+
+    st.header(f'Solar Radiation Analysis for {country}')
+
+    # Display summary statistics
+    st.subheader('Summary Statistics')
+    st.write(df.describe())
+
+    # Time series analysis
+    st.subheader('Time Series Analysis')
+    column = st.selectbox('Select variable for time series', ['GHI', 'DNI', 'DHI', 'Tamb'])
+    st.pyplot(plot_time_series(df, column))
+
+    # Correlation analysis
+    st.subheader('Correlation Analysis')
+    correlation_columns = st.multiselect('Select variables for correlation analysis', 
+                                         CORRELATION_COLUMNS,
+                                         default=['GHI', 'DNI', 'DHI', 'TModA', 'TModB'])
+    if correlation_columns:
+        st.pyplot(plot_correlation(file_correlations(data_path(country)), correlation_columns))
+
+    # Wind analysis
+    st.subheader('Wind Analysis')
+    st.pyplot(plot_wind_rose(df))
+
+    # Temperature, Humidity, and Solar Radiation Analysis
+    st.subheader('Temperature, Humidity, and Solar Radiation Analysis')
+    st.pyplot(plot_bubble_chart(df))
+
+    # Data quality information
+    st.subheader('Data Quality Information')
+    missing_values = df.isnull().sum()
+    st.write('Missing Values:')
+    st.write(missing_values[missing_values > 0])
+
+    # Download cleaned data
+    st.subheader('Download Cleaned Data')
+    export_format = st.selectbox('File format', available_formats())
+    start_date = end_date = None
+    if st.checkbox('Limit to a date range'):
+        first, last = df['Timestamp'].min().date(), df['Timestamp'].max().date()
+        date_range = st.date_input('Export date range', value=(first, last),
+                                   min_value=first, max_value=last)
+        if len(date_range) == 2:
+            start_date, end_date = date_range
+    export_path = prepared_export(country, export_format, start_date, end_date)
+    if export_path is not None:
+        # The open file is passed as is; Streamlit still reads it into its
+        # in-memory media store when the button is rendered
+        with open(export_path, 'rb') as f:
+            st.download_button(
+                label=f"Download {export_format.upper()}",
+                data=f,
+                file_name=export_file_name(country, export_format, start_date, end_date),
+                mime=EXPORT_FORMATS[export_format][1],
+            )
+
+    if show_debug:
+        render_debug_panel()
+
+if __name__ == '__main__':
+    main()
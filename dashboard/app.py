@@ -2,9 +2,12 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 from utils import (
-    load_data, create_solar_radiation_plot, create_temp_humidity_plot,
-    create_wind_rose, create_daily_pattern_plot, calculate_metrics
+    load_data, filter_date_range, create_solar_radiation_plot, create_temp_humidity_plot,
+    create_wind_rose, create_daily_pattern_plot, calculate_metrics,
+    load_rollups, select_rollup_range
 )
+from data_cache import shared_cache
+from instrumentation import station_context, records_frame, recent_records, clear_records
 
 st.set_page_config(
     page_title="Solar Data Analysis Dashboard",
@@ -24,6 +27,17 @@ def render_metrics(metrics):
     with col4:
         st.metric("Avg Humidity (%)", metrics["avg_humidity"])
 
+def render_debug_panel(country):
+    """Render stage timings recorded for the selected country, plus data cache counters."""
+    with st.expander("Debug: stage timings", expanded=True):
+        records = records_frame(recent_records(country))
+        st.dataframe(records.iloc[::-1], use_container_width=True)
+        if not records.empty:
+            st.dataframe(records.groupby('stage')[['wall_s', 'cpu_s']].agg(['count', 'sum', 'max']))
+        st.write("Data cache:", shared_cache.stats())
+        if st.button("Clear timings"):
+            clear_records()
+
 def main():
     st.title("☀️ Solar Data Analysis Dashboard")
     
@@ -33,13 +47,22 @@ def main():
         "Select Country",
         ["Benin", "Sierra Leone", "Togo"]
     )
+    show_debug = st.sidebar.checkbox("Show stage timings")
     
+    with station_context(country):
+        render_dashboard(country)
+    if show_debug:
+        render_debug_panel(country)
+
+def render_dashboard(country):
+    """Render the dashboard body for one country."""
     try:
         df = load_data(country)
+        rollups = load_rollups(country, df)
         
-        # Date range filter
-        min_date = df['Timestamp'].min()
-        max_date = df['Timestamp'].max()
+        # Date range filter (data is sorted by Timestamp)
+        min_date = df['Timestamp'].iloc[0]
+        max_date = df['Timestamp'].iloc[-1]
         date_range = st.sidebar.date_input(
             "Select Date Range",
             value=(min_date, min_date + timedelta(days=7)),
@@ -49,11 +72,11 @@ def main():
         
         if len(date_range) == 2:
             start_date, end_date = date_range
-            mask = (df['Timestamp'].dt.date >= start_date) & (df['Timestamp'].dt.date <= end_date)
-            df_filtered = df[mask]
+            df_filtered = filter_date_range(df, start_date, end_date)
             
-            # Display metrics
-            metrics = calculate_metrics(df_filtered)
+            # Display metrics (combined from daily rollups)
+            daily = select_rollup_range(rollups['daily'], start_date, end_date)
+            metrics = calculate_metrics(df_filtered, daily_rollup=daily)
             render_metrics(metrics)
             
             # Time Series Plot
@@ -75,7 +98,8 @@ def main():
             
             # Daily Patterns
             st.subheader("Daily Patterns")
-            fig_daily = create_daily_pattern_plot(df_filtered)
+            hourly = select_rollup_range(rollups['hourly'], start_date, end_date)
+            fig_daily = create_daily_pattern_plot(df_filtered, hourly_rollup=hourly)
             st.plotly_chart(fig_daily, use_container_width=True)
             
             # Data Table
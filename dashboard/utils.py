@@ -1,46 +1,127 @@
+import numpy as np
 import pandas as pd
 import plotly.express as px
 from datetime import timedelta
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from data_loader import load_data as load_station_data
+from downsampling import downsample_frame
+import rollups as rollup_store
+from data_cache import get_frame
+from instrumentation import instrumented
+
+def cleaned_data_path(country):
+    """Path of the cleaned CSV for a country."""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_dir, f'../outputs/{country}/{country}_cleaned_data.csv')
+
+def load_sorted_data(file_path):
+    """Load a cleaned CSV with rows in time order."""
+    df = load_station_data(file_path, shared=True)
+    # Keep rows in time order so date ranges resolve by binary search
+    if not df['Timestamp'].is_monotonic_increasing:
+        df = df.sort_values('Timestamp', kind='stable').reset_index(drop=True)
+    return df
 
 def load_data(country):
-    """Load cleaned data for a specific country."""
+    """Load cleaned data for a specific country (cached across reruns)."""
     try:
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(base_dir, f'../outputs/{country}/{country}_cleaned_data.csv')
-        df = pd.read_csv(file_path, parse_dates=['Timestamp'])
-        return df
+        return get_frame(cleaned_data_path(country), load_sorted_data)
     except Exception as e:
         raise Exception(f"Error loading data for {country}: {str(e)}")
 
+def _to_index_time(value, dtype):
+    """Convert a date/datetime to a scalar matching the timestamp array dtype."""
+    return np.datetime64(pd.Timestamp(value)).astype(dtype)
+
+@instrumented()
+def filter_date_range(df, start_date, end_date):
+    """Return the rows from start_date through end_date (inclusive days).
+
+    ``df`` must be sorted by Timestamp (as returned by load_data); the
+    bounds are found with searchsorted in O(log n) and the result is a
+    positional slice rather than a per-row boolean scan.
+    """
+    timestamps = df['Timestamp'].to_numpy()
+    start = _to_index_time(start_date, timestamps.dtype)
+    end = _to_index_time(pd.Timestamp(end_date) + timedelta(days=1), timestamps.dtype)
+    lo = timestamps.searchsorted(start, side='left')
+    hi = timestamps.searchsorted(end, side='left')
+    return df.iloc[lo:hi]
+
+@instrumented()
 def create_solar_radiation_plot(df):
     """Create solar radiation components plot."""
+    # Send at most a pixel budget of points to the browser, keeping peaks
+    df = downsample_frame(df, 'Timestamp', ['GHI', 'DNI', 'DHI'], method='minmax')
     return px.line(df, x='Timestamp', 
                   y=['GHI', 'DNI', 'DHI'],
                   title="Solar Radiation Components")
 
+@instrumented()
 def create_temp_humidity_plot(df):
     """Create temperature vs humidity scatter plot."""
     return px.scatter(df, x='Tamb', y='RH',
                      color='GHI',
                      title="Temperature vs Humidity (colored by GHI)")
 
+@instrumented()
 def create_wind_rose(df):
     """Create wind rose plot."""
     return px.scatter_polar(df, r='WS', theta='WD',
                           color='WS',
                           title="Wind Speed and Direction")
 
-def create_daily_pattern_plot(df):
-    """Create daily pattern analysis plot."""
-    df = df.copy()
-    df['Hour'] = df['Timestamp'].dt.hour
-    hourly_avg = df.groupby('Hour')['GHI'].mean().reset_index()
+def load_rollups(country, df):
+    """Load the hourly/daily rollups for a country, building them if needed.
+
+    Rollups written by the pipeline are reused while they match the
+    cleaned CSV; otherwise they are rebuilt from ``df`` and stored for
+    the next session.
+    """
+    file_path = cleaned_data_path(country)
+    rollups = rollup_store.load_rollups(file_path)
+    if rollups is None:
+        rollups = rollup_store.save_rollups(df, file_path)
+    return rollups
+
+def select_rollup_range(rollup, start_date, end_date):
+    """Rollup periods covering start_date through end_date (inclusive days)."""
+    return rollup_store.select_range(rollup, start_date, pd.Timestamp(end_date) + timedelta(days=1))
+
+@instrumented()
+def create_daily_pattern_plot(df, hourly_rollup=None):
+    """Create daily pattern analysis plot.
+
+    With ``hourly_rollup`` (already restricted to the selected range) the
+    curve is combined from per-hour sums instead of grouping raw rows.
+    """
+    if hourly_rollup is not None:
+        hourly_avg = rollup_store.hourly_profile(hourly_rollup, 'GHI').reset_index()
+    else:
+        df = df.copy()
+        df['Hour'] = df['Timestamp'].dt.hour
+        hourly_avg = df.groupby('Hour')['GHI'].mean().reset_index()
     return px.line(hourly_avg, x='Hour', y='GHI',
                   title="Average Daily Solar Radiation Pattern")
 
-def calculate_metrics(df):
-    """Calculate key metrics from the data."""
+@instrumented()
+def calculate_metrics(df, daily_rollup=None):
+    """Calculate key metrics from the data.
+
+    With ``daily_rollup`` (already restricted to the selected range) the
+    metrics are combined from per-day aggregates instead of raw rows.
+    """
+    if daily_rollup is not None:
+        stats = rollup_store.combine(daily_rollup, ['GHI', 'Tamb', 'WS', 'RH'])
+        return {
+            "avg_ghi": f"{stats['GHI']['mean']:.2f}",
+            "max_temp": f"{stats['Tamb']['max']:.2f}",
+            "avg_wind": f"{stats['WS']['mean']:.2f}",
+            "avg_humidity": f"{stats['RH']['mean']:.2f}"
+        }
     return {
         "avg_ghi": f"{df['GHI'].mean():.2f}",
         "max_temp": f"{df['Tamb'].max():.2f}",
@@ -0,0 +1,78 @@
+"""Compare cold CSV parsing against cached columnar loads per country.
+
+Usage: python scripts/benchmark_columnar_cache.py [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+import columnar_cache
+from data_loader import load_data, read_csv_typed
+
+COUNTRIES = ['Benin', 'Sierra Leone', 'Togo']
+RAW_FILES = {
+    'Benin': 'data/benin-malanville.csv',
+    'Sierra Leone': 'data/sierraleone-bumbuna.csv',
+    'Togo': 'data/togo-dapaong_qc.csv'
+}
+
+
+def country_files():
+    """Yield (country, path) for the raw files if present, else cleaned outputs."""
+    for country in COUNTRIES:
+        raw = os.path.join(ROOT_DIR, RAW_FILES[country])
+        cleaned = os.path.join(ROOT_DIR, 'outputs', country, f'{country}_cleaned_data.csv')
+        for path in (raw, cleaned):
+            if os.path.exists(path):
+                yield country, path
+                break
+
+
+def best_of(func, repeat):
+    """Return the best wall time of ``repeat`` calls to ``func``."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rows = []
+    for country, path in country_files():
+        plain_csv = best_of(lambda: pd.read_csv(path, parse_dates=['Timestamp']), args.repeat)
+        typed_csv = best_of(lambda: read_csv_typed(path), args.repeat)
+        load_data(path)  # make sure the cache exists and is fresh
+        cached = best_of(lambda: load_data(path), args.repeat)
+        projected = best_of(lambda: load_data(path, usecols=['GHI', 'Tamb']), args.repeat)
+        rows.append({
+            'country': country,
+            'rows': len(load_data(path, usecols=['GHI'])),
+            'csv_s': plain_csv,
+            'typed_csv_s': typed_csv,
+            'cached_s': cached,
+            'cached_2col_s': projected,
+            'speedup': plain_csv / cached,
+            'csv_mb': os.path.getsize(path) / 1e6,
+            'cache_mb': os.path.getsize(columnar_cache.cache_path(path)) / 1e6,
+        })
+
+    if not rows:
+        print('No station files found under data/ or outputs/.')
+        return
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4f}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark time-series downsampling on a full year of minute data.
+
+Reports the plotly payload size and figure build/serialize latency for the
+dashboard radiation plot, and the matplotlib render time for the static
+time series, with and without downsampling.
+
+Usage: python scripts/benchmark_downsampling.py [--days 365]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'dashboard'))
+
+import plotly.express as px
+
+import downsampling
+from utils import create_solar_radiation_plot
+from visualization import new_figure, time_series_figure, save_figure
+
+
+def year_of_radiation(days, seed=0):
+    """Minute-resolution GHI/DNI/DHI with a diurnal cycle and cloud noise."""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range('2022-01-01', periods=days * 24 * 60, freq='min')
+    hour = timestamps.hour.to_numpy() + timestamps.minute.to_numpy() / 60
+    sun = np.clip(np.sin((hour - 6) / 12 * np.pi), 0, None)
+    clouds = np.clip(1 - rng.gamma(0.3, 0.5, len(timestamps)), 0.1, 1)
+    return pd.DataFrame({
+        'Timestamp': timestamps,
+        'GHI': 950 * sun * clouds,
+        'DNI': 700 * sun * clouds ** 2,
+        'DHI': 250 * sun * (1.2 - clouds),
+        'Tamb': 26 + 7 * sun + rng.normal(0, 0.5, len(timestamps)),
+    })
+
+
+def raw_time_series(df, column):
+    """The static time series as drawn before downsampling (every point)."""
+    fig, ax = new_figure((15, 5))
+    ax.plot(df['Timestamp'], df[column])
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+    return fig
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=365)
+    args = parser.parse_args()
+
+    df = year_of_radiation(args.days)
+    rows = []
+
+    raw_fig, raw_build = timed(lambda: px.line(df, x='Timestamp', y=['GHI', 'DNI', 'DHI']))
+    raw_json, raw_serialize = timed(raw_fig.to_json)
+    fig, build = timed(lambda: create_solar_radiation_plot(df))
+    payload, serialize = timed(fig.to_json)
+    rows.append({'chart': 'dashboard radiation (plotly)', 'points_raw': len(df) * 3,
+                 'points_down': sum(len(trace.x) for trace in fig.data),
+                 'payload_raw_mb': len(raw_json) / 1e6, 'payload_down_mb': len(payload) / 1e6,
+                 'latency_raw_s': raw_build + raw_serialize, 'latency_down_s': build + serialize})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ts.png')
+        _, raw_render = timed(lambda: save_figure(raw_time_series(df, 'GHI'), path))
+        _, render = timed(lambda: save_figure(time_series_figure(df, 'GHI', 'GHI'), path))
+    rows.append({'chart': 'static GHI time series (matplotlib)', 'points_raw': len(df),
+                 'points_down': downsampling.TARGET_POINTS, 'payload_raw_mb': np.nan,
+                 'payload_down_mb': np.nan, 'latency_raw_s': raw_render, 'latency_down_s': render})
+
+    print(f"{len(df):,} rows ({args.days} days at 1-minute resolution)")
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.3f}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""Benchmark the pipeline stages on synthetic station files of several sizes.
+
+Each stage (load, validate, clean, summarize, render serially, on
+threads or on processes) is timed (best of
+--repeat runs) and then run once more under tracemalloc for its peak
+traced memory (Python and NumPy allocations; Arrow buffers are not
+traced, see max_rss_mb for the process high-water mark). Results are
+appended as JSON lines to --results, tagged with --label, the git
+revision and library versions, so runs can be compared with --baseline.
+
+Usage: python scripts/benchmark_pipeline.py [--rows 10000 100000 1000000] [--label NAME]
+                                            [--baseline NAME] [--stages load clean ...]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+from data_cleaner import clean_data
+from data_loader import load_data
+from data_validator import generate_validation_report
+from instrumentation import max_rss_mb
+from rules import evaluate_rules
+from summary_engine import summarize
+from synthetic_data import write_station_csv
+from visualization import render_figures, station_chart_jobs
+from correlation_engine import CORRELATION_COLUMNS, correlation_matrix
+
+DEFAULT_RESULTS = os.path.join(ROOT_DIR, 'benchmarks', 'results.jsonl')
+STAGES = ['load', 'load_cached', 'validate', 'clean', 'summarize', 'render', 'render_threads',
+          'render_processes']
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def station_file(data_dir, n_rows, seed):
+    """Generate (once) and return the synthetic station file for ``n_rows``."""
+    path = os.path.join(data_dir, f'synthetic_{n_rows}_{seed}.csv')
+    if not os.path.exists(path):
+        write_station_csv(path, n_rows, seed=seed)
+    return path
+
+
+def stage_calls(path, raw, cleaned, chart_dir):
+    """Map stage name -> zero-argument callable over prepared inputs."""
+
+    def render(**options):
+        jobs = station_chart_jobs(cleaned, 'Synthetic',
+                                  correlation_matrix(cleaned, CORRELATION_COLUMNS), chart_dir)
+        return render_figures(jobs, **options)
+
+    # The concurrent variants back render_figures' serial default
+    pool_workers = max(2, os.cpu_count() or 1)
+
+    return {
+        'load': lambda: load_data(path, use_cache=False),
+        'load_cached': lambda: load_data(path),
+        'validate': lambda: generate_validation_report(raw, evaluate_rules(raw)),
+        'clean': lambda: clean_data(raw),
+        'summarize': lambda: summarize(cleaned),
+        'render': render,
+        'render_threads': lambda: render(workers=pool_workers),
+        'render_processes': lambda: render(workers=pool_workers, use_processes=True),
+    }
+
+
+def measure(func, repeat):
+    """Best wall time over ``repeat`` calls, then peak traced memory of one call."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+def run(rows, stages, repeat, seed, data_dir, label):
+    meta = {
+        'label': label,
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'git': git_revision(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+    records = []
+    with tempfile.TemporaryDirectory() as chart_dir:
+        for n_rows in rows:
+            path = station_file(data_dir, n_rows, seed)
+            # Build the columnar cache and stage inputs outside the timings
+            raw = load_data(path)
+            calls = stage_calls(path, raw, clean_data(raw), chart_dir)
+            for stage in stages:
+                seconds, peak = measure(calls[stage], repeat)
+                record = dict(meta, rows=n_rows, stage=stage, seconds=seconds,
+                              peak_mb=peak / 1e6, max_rss_mb=max_rss_mb(),
+                              rows_per_s=n_rows / seconds if seconds else None)
+                records.append(record)
+                print(f'{n_rows:>10,} {stage:<12} {seconds:9.4f}s {peak / 1e6:9.1f} MB')
+    return records
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(records, baseline_records):
+    """Table of current vs baseline time and memory for matching (rows, stage)."""
+    baseline = {(r['rows'], r['stage']): r for r in baseline_records}
+    rows = []
+    for record in records:
+        base = baseline.get((record['rows'], record['stage']))
+        if base is None:
+            continue
+        rows.append({
+            'rows': record['rows'],
+            'stage': record['stage'],
+            'seconds': record['seconds'],
+            'baseline_s': base['seconds'],
+            'speedup': base['seconds'] / record['seconds'] if record['seconds'] else np.nan,
+            'peak_mb': record['peak_mb'],
+            'baseline_mb': base['peak_mb'],
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=os.path.join(ROOT_DIR, 'benchmarks', 'data'),
+                        help='Where generated station files are kept between runs')
+    parser.add_argument('--results', default=DEFAULT_RESULTS)
+    parser.add_argument('--label', default=None, help='Name of this run (default: git revision)')
+    parser.add_argument('--baseline', default=None, help='Label of an earlier run to compare with')
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+    label = args.label or git_revision() or 'unlabelled'
+    records = run(args.rows, args.stages, args.repeat, args.seed, args.data_dir, label)
+    with open(args.results, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+    print(f'\nAppended {len(records)} results to {args.results}')
+
+    if args.baseline:
+        baseline = [r for r in load_results(args.results) if r['label'] == args.baseline]
+        table = compare(records, baseline)
+        if table.empty:
+            print(f'No results labelled {args.baseline!r} to compare with.')
+        else:
+            print(table.to_string(index=False, float_format=lambda v: f'{v:.4f}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Build a memory-mapped station store from the cleaned outputs and time queries on it.
+
+Usage: python scripts/build_station_store.py [--store DIR] [--repeat N]
+
+Point SOLAR_STATION_STORE at the store directory afterwards to make the
+loaders (pipeline, dashboards) read from it.
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+from data_loader import load_data
+from station_store import StationStore
+
+COUNTRIES = ['Benin', 'Sierra Leone', 'Togo']
+
+
+def best_of(func, repeat):
+    """Return the best wall time of ``repeat`` calls to ``func``."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--store', default=os.path.join(ROOT_DIR, 'outputs', 'store'))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    store = StationStore(args.store)
+    rows = []
+    for country in COUNTRIES:
+        path = os.path.join(ROOT_DIR, 'outputs', country, f'{country}_cleaned_data.csv')
+        if not os.path.exists(path):
+            continue
+        store.write_station(country, load_data(path), source=path)
+        start, _ = store.time_range(country)
+        week = start + pd.Timedelta(days=7)
+        rows.append({
+            'country': country,
+            'rows': store.meta(country)['rows'],
+            'columnar_cache_s': best_of(lambda: load_data(path), args.repeat),
+            'store_full_s': best_of(lambda: store.read(country), args.repeat),
+            'store_week_2col_s': best_of(lambda: store.read(country, ['Timestamp', 'GHI', 'Tamb'],
+                                                            start, week), args.repeat),
+            'store_mean_s': best_of(lambda: store.query(['GHI'], [country], agg='mean'),
+                                    args.repeat),
+        })
+
+    if not rows:
+        print('No cleaned station files found under outputs/.')
+        return
+    print(f'Store written to {store.root}')
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4f}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""Write a synthetic station CSV with realistic daily cycles, gaps and faults.
+
+Usage: python scripts/generate_station_data.py OUTPUT --rows N [--seed S] [--chunksize C]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+from synthetic_data import DEFAULT_CHUNKSIZE, write_station_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output')
+    parser.add_argument('--rows', type=int, default=525_600, help='Rows (minutes) to write')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help='Rows generated and written per chunk')
+    parser.add_argument('--start', default='2021-08-09', help='First timestamp')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    write_station_csv(args.output, args.rows, chunksize=args.chunksize, start=args.start,
+                      seed=args.seed)
+    print(f'Wrote {args.rows:,} rows to {args.output} '
+          f'({os.path.getsize(args.output) / 1e6:.1f} MB) in {time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,41 +1,47 @@
-import pandas as pd
-import numpy as np
 import os
+import rollups as rollup_store
+from summary_engine import COUNTRY_METRICS, summarize_file
 
-def analyze_country_data(file_path):
-    # Read the CSV file
-    df = pd.read_csv(file_path)
-    
-    # Calculate key metrics
-    summary = {
-        'avg_ghi': df['GHI'].mean(),
-        'max_ghi': df['GHI'].max(),
-        'avg_temp': df['Tamb'].mean(),
-        'avg_humidity': df['RH'].mean(),
-        'avg_wind_speed': df['WS'].mean(),
-        'data_points': len(df)
+SUMMARY_COLUMNS = ['GHI', 'Tamb', 'RH', 'WS']
+
+def summary_from_rollup(rollup):
+    """Answer the country summary by combining rollup aggregates."""
+    stats = rollup_store.combine(rollup, SUMMARY_COLUMNS + ['GHI>500'])
+    return {
+        'avg_ghi': stats['GHI']['mean'],
+        'max_ghi': stats['GHI']['max'],
+        'avg_temp': stats['Tamb']['mean'],
+        'avg_humidity': stats['RH']['mean'],
+        'avg_wind_speed': stats['WS']['mean'],
+        'data_points': stats['GHI']['count'],
+        'ghi_temp_corr': rollup_store.correlation(rollup, 'GHI', 'Tamb'),
+        'high_ghi_percentage': stats['GHI>500']['mean'] * 100
     }
+
+def analyze_country_data(file_path, chunksize=None):
+    # Use the precomputed daily rollup when it matches the cleaned file
+    rollups = rollup_store.load_rollups(file_path)
+    if rollups is not None:
+        return summary_from_rollup(rollups['daily'])
     
-    # Calculate correlation between GHI and temperature
-    summary['ghi_temp_corr'] = df['GHI'].corr(df['Tamb'])
+    # Otherwise one pass over the needed columns, cached per file
+    return summarize_file(file_path, COUNTRY_METRICS, chunksize=chunksize)
+
+def main():
+    # Analyze data for each country
+    countries = ['Benin', 'Sierra Leone', 'Togo']
+    results = {}
     
-    # Calculate percentage of time with high GHI (above 500 W/m²)
-    summary['high_ghi_percentage'] = (df['GHI'] > 500).mean() * 100
+    for country in countries:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        file_path = os.path.join(base_dir, f'../outputs/{country}/{country}_cleaned_data.csv')
+        results[country] = analyze_country_data(file_path)
     
-    return summary
-
-# Analyze data for each country
-countries = ['Benin', 'Sierra Leone', 'Togo']
-results = {}
-
-for country in countries:
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(base_dir, f'../outputs/{country}/{country}_cleaned_data.csv')
-    results[country] = analyze_country_data(file_path)
-
-# Print results
-for country, data in results.items():
-    print(f"\nSummary for {country}:")
-    for key, value in data.items():
-        print(f"{key}: {value:.2f}")
+    # Print results
+    for country, data in results.items():
+        print(f"\nSummary for {country}:")
+        for key, value in data.items():
+            print(f"{key}: {value:.2f}")
 
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,19 @@
 import pandas as pd
 import numpy as np
+from correlation_engine import correlation_matrix
+from instrumentation import instrumented
 
+@instrumented()
 def summary_statistics(df):
     """Calculate summary statistics for the dataset."""
     return df.describe()
 
+@instrumented()
 def cleaning_impact_analysis(df):
     """Analyze the impact of cleaning on module temperatures."""
     return df.groupby('Cleaning')[['ModA', 'ModB']].mean()
 
+@instrumented()
 def correlation_analysis(df, columns):
     """Calculate correlation matrix for specified columns."""
-    return df[columns].corr()
\ No newline at end of file
+    return correlation_matrix(df, columns)
\ No newline at end of file
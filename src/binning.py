@@ -0,0 +1,66 @@
+import numpy as np
+
+from rules import column_values
+
+# Speed classes (m/s) used for the wind rose; the last class is open-ended.
+WIND_SPEED_BINS = [0, 1, 2, 3, 4, 6, np.inf]
+WIND_SECTORS = 16
+
+def _finite(*arrays):
+    """Drop positions where any of the arrays is NaN."""
+    keep = np.ones(len(arrays[0]), dtype=bool)
+    for array in arrays:
+        keep &= ~np.isnan(array)
+    return [array[keep] for array in arrays]
+
+def binned_mean_2d(x, y, values, bins=80):
+    """Aggregate points onto a 2D grid, returning counts and mean values.
+
+    Returns (counts, means, x_edges, y_edges) where ``means`` is the mean
+    of ``values`` per cell (NaN for empty cells). Cost is one histogram
+    pass over the points, and the drawn grid size does not depend on n.
+    """
+    x, y, values = _finite(np.asarray(x, dtype='float64'), np.asarray(y, dtype='float64'),
+                           np.asarray(values, dtype='float64'))
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    sums, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges], weights=values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, sums / counts, np.nan)
+    return counts, means, x_edges, y_edges
+
+def frame_binned_mean_2d(df, x, y, value, bins=80):
+    """binned_mean_2d over DataFrame columns."""
+    return binned_mean_2d(column_values(df, x), column_values(df, y), column_values(df, value), bins)
+
+def wind_rose_bins(wind_direction, wind_speed, sectors=WIND_SECTORS, speed_bins=WIND_SPEED_BINS):
+    """Count observations per direction sector and speed class.
+
+    Sectors are centred on north (0°), so the first sector covers
+    [-width/2, width/2). Returns a dict with the sector centres in
+    radians, the sector width, the speed bin edges and a
+    (sectors x speed classes) array of counts.
+    """
+    direction, speed = _finite(np.asarray(wind_direction, dtype='float64'),
+                               np.asarray(wind_speed, dtype='float64'))
+    width = 360 / sectors
+    shifted = (direction + width / 2) % 360
+    sector_edges = np.linspace(0, 360, sectors + 1)
+    speed_edges = np.asarray(speed_bins, dtype='float64')
+    # histogram2d needs finite edges; clip the open-ended top class
+    finite_edges = speed_edges.copy()
+    finite_edges[-1] = max(speed.max() if len(speed) else 0, finite_edges[-2]) + 1
+    counts, _, _ = np.histogram2d(shifted, speed, bins=[sector_edges, finite_edges])
+    return {
+        'theta': np.deg2rad(np.arange(sectors) * width),
+        'width': np.deg2rad(width),
+        'speed_bins': speed_edges,
+        'counts': counts,
+        'total': len(direction),
+    }
+
+def speed_class_labels(speed_bins):
+    """Readable labels for wind speed classes."""
+    labels = []
+    for low, high in zip(speed_bins[:-1], speed_bins[1:]):
+        labels.append(f'>{low:g} m/s' if np.isinf(high) else f'{low:g}-{high:g} m/s')
+    return labels
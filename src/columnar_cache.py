@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is listed in requirements.txt
+    pa = None
+    pq = None
+
+CACHE_SUFFIX = '.parquet'
+METADATA_KEY = b'solar_source'
+HASH_BLOCK_SIZE = 1 << 20
+PART_MARKER = '.part-'
+# Appended rows go to part files; past this many the cache is compacted
+MAX_CACHE_PARTS = 16
+
+
+def cache_path(csv_path):
+    """Return the columnar cache path stored next to a CSV file."""
+    return os.path.splitext(csv_path)[0] + CACHE_SUFFIX
+
+def part_paths(csv_path):
+    """Return the part files appended to the cache of ``csv_path``, oldest first."""
+    stem = os.path.splitext(csv_path)[0]
+    directory, prefix = os.path.split(stem + PART_MARKER)
+    try:
+        entries = os.listdir(directory or '.')
+    except OSError:
+        return []
+    return [os.path.join(directory, entry) for entry in sorted(entries)
+            if entry.startswith(prefix) and entry.endswith(CACHE_SUFFIX)]
+
+def cache_files(csv_path):
+    """Return the cache of ``csv_path`` followed by its part files."""
+    return [cache_path(csv_path)] + part_paths(csv_path)
+
+def file_hash(path):
+    """Compute the SHA-256 of a file in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def source_fingerprint(csv_path, with_hash=True):
+    """Describe a source file by size, mtime and (optionally) content hash."""
+    stat = os.stat(csv_path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        fingerprint['sha256'] = file_hash(csv_path)
+    return fingerprint
+
+def read_cache_metadata(path):
+    """Read the source fingerprint recorded in a cache file, if any."""
+    if pq is None or not os.path.exists(path):
+        return None
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    if METADATA_KEY not in metadata:
+        return None
+    return json.loads(metadata[METADATA_KEY])
+
+def current_metadata(csv_path):
+    """Read the fingerprint the cache of ``csv_path`` currently matches.
+
+    The newest part file carries the fingerprint of the CSV after its rows
+    were appended, so it describes the cache as a whole.
+    """
+    return read_cache_metadata(cache_files(csv_path)[-1])
+
+def is_fresh(csv_path, meta=None):
+    """Check whether the cache for ``csv_path`` matches the current source.
+
+    Size and mtime are compared first; when only the mtime differs the
+    content hash decides, so a touched-but-unchanged file stays cached.
+    """
+    if meta is None:
+        meta = current_metadata(csv_path)
+    if not meta:
+        return False
+    current = source_fingerprint(csv_path, with_hash=False)
+    if meta['size'] != current['size']:
+        return False
+    if meta['mtime_ns'] == current['mtime_ns']:
+        return True
+    return meta.get('sha256') == file_hash(csv_path)
+
+def write_derived(df, path, csv_path, fingerprint=None, preserve_index=False):
+    """Write ``df`` to ``path`` as Parquet tagged with the fingerprint of ``csv_path``.
+
+    Used for the cache itself and for other artifacts derived from a CSV,
+    which can then be checked for freshness with is_fresh.
+    """
+    if pq is None:
+        return None
+    if fingerprint is None:
+        fingerprint = source_fingerprint(csv_path)
+    table = pa.Table.from_pandas(df, preserve_index=preserve_index)
+    metadata = dict(table.schema.metadata or {})
+    metadata[METADATA_KEY] = json.dumps(fingerprint).encode()
+    table = table.replace_schema_metadata(metadata)
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    try:
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+    except OSError:
+        # Read-only locations simply go without a cache
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+    return path
+
+def write_cache(df, csv_path, fingerprint=None):
+    """Write ``df`` as the columnar cache of ``csv_path``, replacing any parts."""
+    # Parts go first: a reader in between sees a stale cache, never a mixed one
+    for path in part_paths(csv_path):
+        os.remove(path)
+    return write_derived(df, cache_path(csv_path), csv_path, fingerprint)
+
+def append_cache(df, csv_path, fingerprint=None):
+    """Add rows just appended to ``csv_path`` to its (fresh) cache.
+
+    The rows are written as a new part file tagged with the fingerprint
+    of the grown CSV, so appending costs only the new rows. The cache is
+    compacted into a single file once it has MAX_CACHE_PARTS parts, or
+    when the rows do not fit the cached column types.
+    """
+    if pq is None:
+        return None
+    if fingerprint is None:
+        fingerprint = source_fingerprint(csv_path)
+    parts = part_paths(csv_path)
+    if len(parts) < MAX_CACHE_PARTS:
+        schema = pq.read_schema(cache_path(csv_path))
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False).cast(schema)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, ValueError):
+            table = None
+        if table is not None:
+            metadata = dict(schema.metadata or {})
+            metadata[METADATA_KEY] = json.dumps(fingerprint).encode()
+            index = int(parts[-1][:-len(CACHE_SUFFIX)].rsplit(PART_MARKER, 1)[1]) + 1 if parts else 0
+            path = f'{os.path.splitext(csv_path)[0]}{PART_MARKER}{index:05d}{CACHE_SUFFIX}'
+            tmp_path = f'{path}.tmp-{os.getpid()}'
+            try:
+                pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+                os.replace(tmp_path, path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return None
+            return path
+    cached = read_cache(csv_path)
+    combined = pd.concat([cached, df.astype(cached.dtypes.to_dict(), errors='ignore')],
+                         ignore_index=True)
+    return write_cache(combined, csv_path, fingerprint)
+
+def _read_tables(csv_path, columns=None):
+    tables = [pq.read_table(path, columns=columns) for path in cache_files(csv_path)]
+    # Parts are cast to the cache schema; only their fingerprint differs
+    metadata = tables[0].schema.metadata
+    return pa.concat_tables([table.replace_schema_metadata(metadata) for table in tables])
+
+def read_cache(csv_path, columns=None):
+    """Load the columnar cache of ``csv_path``, projecting ``columns``."""
+    return _read_tables(csv_path, columns).to_pandas()
+
+def iter_cache_batches(csv_path, batch_size, columns=None):
+    """Stream the columnar cache of ``csv_path`` as DataFrame batches."""
+    for path in cache_files(csv_path):
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+
+def read_cached(csv_path, parse_csv, columns=None):
+    """Load a CSV through its columnar cache, re-parsing only when stale.
+
+    ``parse_csv`` is called with the CSV path to produce the typed frame
+    when the cache is missing or out of date; the result is written next
+    to the CSV for later calls.
+    """
+    if pq is None:
+        df = parse_csv(csv_path)
+        return df[columns] if columns is not None else df
+
+    meta = current_metadata(csv_path)
+    if is_fresh(csv_path, meta):
+        current = source_fingerprint(csv_path, with_hash=False)
+        if meta['mtime_ns'] != current['mtime_ns']:
+            # Content unchanged but touched: refresh the recorded mtime
+            df = read_cache(csv_path)
+            write_cache(df, csv_path, dict(meta, mtime_ns=current['mtime_ns']))
+            return df[columns] if columns is not None else df
+        return read_cache(csv_path, columns=columns)
+
+    df = parse_csv(csv_path)
+    write_cache(df, csv_path)
+    return df[columns] if columns is not None else df
@@ -0,0 +1,131 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DEFAULT_CHUNKSIZE, iter_chunks
+
+CORRELATION_COLUMNS = ['GHI', 'DNI', 'DHI', 'TModA', 'TModB', 'WS', 'WSgust', 'WD']
+
+class CorrelationAccumulator:
+    """Pairwise cross-product sums for a set of columns, built over chunks.
+
+    For every column pair (i, j) it keeps, over the rows where both are
+    present, the pair count and the sums of x_i, x_i^2 and x_i * x_j, as
+    float64 matrices from one matrix product per chunk. Any subset of the
+    Pearson correlation matrix follows from these without rescanning and
+    matches pandas' pairwise-complete ``corr``. Values are shifted by the
+    first chunk's column means before summing, which keeps the sums well
+    conditioned for columns with a large offset.
+    """
+
+    def __init__(self, columns=CORRELATION_COLUMNS):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.shift = None
+        self.count = np.zeros((k, k))
+        self.sum = np.zeros((k, k))      # sum of x_i where x_i and x_j are present
+        self.sumsq = np.zeros((k, k))    # sum of x_i^2 over the same rows
+        self.cross = np.zeros((k, k))    # sum of x_i * x_j
+        self._matrix = None
+
+    def update(self, df):
+        """Fold one frame (or chunk) into the sums."""
+        values = df[self.columns].to_numpy(dtype='float64', na_value=np.nan)
+        present = ~np.isnan(values)
+        if self.shift is None:
+            if not present.any():
+                return self
+            counts = present.sum(axis=0)
+            self.shift = np.where(present, values, 0.0).sum(axis=0) / np.maximum(counts, 1)
+        values = np.where(present, values - self.shift, 0.0)
+        weights = present.astype('float64')
+        self.count += weights.T @ weights
+        self.sum += values.T @ weights
+        self.sumsq += (values * values).T @ weights
+        self.cross += values.T @ values
+        self._matrix = None
+        return self
+
+    def _shifted_to(self, shift):
+        """Return (count, sum, sumsq, cross) re-expressed around ``shift``."""
+        d = shift - self.shift
+        count = self.count
+        d_i = d[:, None]
+        d_j = d[None, :]
+        total = self.sum - d_i * count
+        sumsq = self.sumsq - 2 * d_i * self.sum + d_i * d_i * count
+        cross = self.cross - d_i * self.sum.T - d_j * self.sum + d_i * d_j * count
+        return count, total, sumsq, cross
+
+    def merge(self, other):
+        """Merge an accumulator over the same columns built on other rows."""
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge correlation accumulators over different columns")
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self.shift = other.shift.copy()
+        count, total, sumsq, cross = other._shifted_to(self.shift)
+        self.count += count
+        self.sum += total
+        self.sumsq += sumsq
+        self.cross += cross
+        self._matrix = None
+        return self
+
+    def matrix(self):
+        """Full Pearson correlation array, computed once per state."""
+        if self._matrix is None:
+            n, sx = self.count, self.sum
+            cov = n * self.cross - sx * sx.T
+            var = n * self.sumsq - sx * sx
+            with np.errstate(invalid='ignore', divide='ignore'):
+                corr = cov / np.sqrt(var * var.T)
+            corr[(n < 2) | ~np.isfinite(corr)] = np.nan
+            corr = np.clip(corr, -1.0, 1.0)
+            np.fill_diagonal(corr, np.where(np.diag(var) > 0, 1.0, np.nan))
+            self._matrix = corr
+        return self._matrix
+
+    def correlation(self, columns=None):
+        """Pearson correlation matrix for ``columns`` (default: all) as a DataFrame."""
+        columns = self.columns if columns is None else list(columns)
+        idx = [self.columns.index(col) for col in columns]
+        return pd.DataFrame(self.matrix()[np.ix_(idx, idx)], index=columns, columns=columns)
+
+def correlation_matrix(df, columns):
+    """df[columns].corr() computed through a CorrelationAccumulator."""
+    return CorrelationAccumulator(columns).update(df).correlation()
+
+def chunk_correlations(chunks, columns=CORRELATION_COLUMNS):
+    """Accumulate correlations over an iterable of chunks."""
+    acc = CorrelationAccumulator(columns)
+    for chunk in chunks:
+        acc.update(chunk)
+    return acc
+
+_file_accumulators = {}
+_file_accumulators_lock = threading.Lock()
+
+def file_correlations(file_path, columns=CORRELATION_COLUMNS, chunksize=DEFAULT_CHUNKSIZE):
+    """Correlation accumulator for a station CSV, cached per file version.
+
+    The file is streamed once per (path, size, mtime); later subset
+    queries only slice the cached matrices.
+    """
+    columns = tuple(columns)
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns, columns)
+    with _file_accumulators_lock:
+        if key in _file_accumulators:
+            return _file_accumulators[key]
+
+    acc = chunk_correlations(iter_chunks(path, chunksize=chunksize, usecols=list(columns)), columns)
+    with _file_accumulators_lock:
+        for stale in [k for k in _file_accumulators if k[0] == path and k[1:3] != key[1:3]]:
+            del _file_accumulators[stale]
+        _file_accumulators[key] = acc
+    return acc
@@ -0,0 +1,152 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from data_loader import load_data, compact_dtypes
+
+PANDAS_MAJOR = int(pd.__version__.split('.')[0])
+
+# Default budget for cached frames; override with SOLAR_DATA_CACHE_BYTES.
+DEFAULT_BUDGET_BYTES = 1 << 30
+
+def load_shared(file_path):
+    """load_data for read-only callers: store-backed frames stay mapped views."""
+    return load_data(file_path, shared=True)
+
+def compact_by_default():
+    """Whether cached frames use the compact layout (opt out with SOLAR_COMPACT_DTYPES=0)."""
+    return os.environ.get('SOLAR_COMPACT_DTYPES', '1') != '0'
+
+def copy_on_write_active():
+    """Whether pandas copy-on-write is in effect (always from pandas 3)."""
+    if PANDAS_MAJOR >= 3:
+        return True
+    return PANDAS_MAJOR == 2 and pd.get_option('mode.copy_on_write') is True
+
+def read_only_view(df):
+    """A frame over the same data as ``df`` whose numpy columns reject writes.
+
+    Columns with extension dtypes (e.g. categoricals) are copied instead.
+    """
+    columns = {}
+    for name, series in df.items():
+        if isinstance(series.dtype, np.dtype):
+            values = series.to_numpy().view()
+            values.flags.writeable = False
+            columns[name] = values
+        else:
+            columns[name] = series.copy()
+    return pd.DataFrame(columns, index=df.index, columns=df.columns, copy=False)
+
+def share_frame(df):
+    """A caller's handle on a cached frame, without copying its data.
+
+    Under copy-on-write a shallow copy is enough: a caller's modification
+    copies the touched columns. Otherwise the caller gets a read-only
+    view, so in-place writes raise instead of altering the cached frame.
+    """
+    return df.copy(deep=False) if copy_on_write_active() else read_only_view(df)
+
+def frame_nbytes(df):
+    """Memory held by a frame, including object column payloads."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+class DataCache:
+    """Thread-safe, byte-bounded LRU cache of loaded station frames.
+
+    Entries are keyed by file path, loader and layout and remember the file's
+    size and mtime; a changed file is reloaded on the next access. When
+    the total size exceeds ``budget_bytes`` the least recently used
+    entries are evicted. Frames are returned without copying their data
+    (see share_frame); the process-wide pandas options are left alone.
+    """
+
+    def __init__(self, budget_bytes=None):
+        if budget_bytes is None:
+            budget_bytes = int(os.environ.get('SOLAR_DATA_CACHE_BYTES', DEFAULT_BUDGET_BYTES))
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, file_path, loader=load_data, compact=False):
+        """Return the frame for ``file_path``, loading it with ``loader`` on a miss.
+
+        With ``compact=True`` the loaded frame is stored in the compact
+        layout (see data_loader.compact_dtypes).
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        key = (path, loader, compact)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == signature:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return share_frame(entry[1])
+                self._remove(key)
+                self.invalidations += 1
+            self.misses += 1
+
+        # Load outside the lock so other files stay servable meanwhile
+        df = loader(path)
+        if compact:
+            df = compact_dtypes(df)
+        nbytes = frame_nbytes(df)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if nbytes <= self.budget_bytes:
+                self._entries[key] = (signature, df, nbytes)
+                self._bytes += nbytes
+                self._evict()
+        return share_frame(df)
+
+    def _remove(self, key):
+        _, _, nbytes = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def _evict(self):
+        while self._bytes > self.budget_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Snapshot of the cache counters and occupancy."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'budget_bytes': self.budget_bytes,
+            }
+
+# Process-wide cache shared by the Streamlit apps
+shared_cache = DataCache()
+
+def get_frame(file_path, loader=load_data, compact=None):
+    """Load ``file_path`` through the process-wide cache.
+
+    ``compact`` defaults to True unless SOLAR_COMPACT_DTYPES=0.
+    """
+    if compact is None:
+        compact = compact_by_default()
+    return shared_cache.get(file_path, loader, compact)
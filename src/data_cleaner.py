@@ -1,41 +1,39 @@
 import pandas as pd
 import numpy as np
+from rules import applicable_rules, column_values, evaluate_rules
+from streaming_stats import MomentAccumulator
+from quantile_sketch import column_sketches, DEFAULT_ERROR
+from instrumentation import instrumented
+
+# 'sequential' computes each column's mean/std on the rows that survived
+# the previous columns (the original behaviour); 'joint' computes all
+# statistics on the same rows, which needs a single statistics pass.
+OUTLIER_MODES = ('sequential', 'joint')
+
+def _apply_rules(df, columns):
+    """Keep rows passing the range rules for ``columns`` and apply clamps."""
+    rules = [rule for rule in applicable_rules(df.columns) if rule.column in columns]
+    evaluation = evaluate_rules(df, rules=rules, checks={})
+    return _take(df, evaluation.mask, evaluation)
 
 def clean_solar_radiation(df):
     """Clean solar radiation components."""
-    df_clean = df.copy()
-    # Replace negative GHI with 0 (nighttime)
-    df_clean.loc[df_clean['GHI'] < 0, 'GHI'] = 0
-    # Valid range checks
-    mask = (
-        (df_clean['GHI'].between(0, 1500)) &
-        (df_clean['DNI'].between(0, 1500)) &
-        (df_clean['DHI'].between(0, 1500))
-    )
-    return df_clean[mask]
+    # Range checks, then negative GHI is replaced with 0 (nighttime)
+    return _apply_rules(df, ['GHI', 'DNI', 'DHI'])
 
 def clean_weather_data(df):
     """Clean weather-related measurements."""
-    mask = (
-        (df['Tamb'].between(-20, 60)) &  # Temperature range
-        (df['RH'].between(0, 100)) &     # Relative humidity range
-        (df['WS'].between(0, 50)) &      # Wind speed range
-        (df['WD'].between(0, 360))       # Wind direction range
-    )
-    return df[mask]
+    return _apply_rules(df, ['Tamb', 'RH', 'WS', 'WD'])
 
 def clean_module_data(df):
     """Clean module temperature and performance data."""
-    if 'ModA' in df.columns and 'ModB' in df.columns:
-        mask = (
-            (df['ModA'].between(-20, 90)) &  # Module temperature range
-            (df['ModB'].between(-20, 90))    # Module temperature range
-        )
-        return df[mask]
-    return df
-
-def remove_statistical_outliers(df, columns, n_std=3):
+    return _apply_rules(df, ['ModA', 'ModB'])
+
+def remove_statistical_outliers(df, columns, n_std=3, mode='sequential'):
     """Remove statistical outliers using standard deviation method."""
+    if mode == 'joint':
+        bounds = outlier_bounds(fit_outlier_moments(lambda: [df], columns, n_std, mode), n_std)
+        return df[within_bounds(df, bounds)]
     df_clean = df.copy()
     for col in columns:
         mean = df_clean[col].mean()
@@ -46,26 +44,226 @@ def remove_statistical_outliers(df, columns, n_std=3):
         ]
     return df_clean
 
-def clean_data(df):
-    """Main cleaning function applying all cleaning steps."""
-    # Drop rows with missing values in critical columns
-    critical_columns = ['GHI', 'DNI', 'DHI', 'Tamb', 'WS', 'WD', 'RH']
-    df_cleaned = df.dropna(subset=critical_columns)
+def iqr_bounds(chunks, columns, threshold=3, error=DEFAULT_ERROR):
+    """Compute per-column Q1 - t*IQR / Q3 + t*IQR bounds in one streaming pass.
+
+    Quartiles come from mergeable KLL sketches, so ``chunks`` may be any
+    iterable of frames; ``error`` is the normalized rank error of the
+    quartile estimates.
+    """
+    bounds = {}
+    for col, sketch in column_sketches(chunks, columns, error).items():
+        q1, q3 = sketch.quantile([0.25, 0.75])
+        iqr = q3 - q1
+        bounds[col] = (q1 - threshold * iqr, q3 + threshold * iqr)
+    return bounds
+
+def remove_iqr_outliers(df, columns=None, threshold=3, error=DEFAULT_ERROR):
+    """Drop rows outside the IQR bounds of any numeric column.
+
+    Pass ``error=None`` to use exact pandas quartiles instead of sketches.
+    """
+    if columns is None:
+        columns = df.select_dtypes(include=[np.number]).columns
+    if error is None:
+        Q1 = df[columns].quantile(0.25)
+        Q3 = df[columns].quantile(0.75)
+        IQR = Q3 - Q1
+        bounds = {col: (Q1[col] - threshold * IQR[col], Q3[col] + threshold * IQR[col])
+                  for col in columns}
+    else:
+        bounds = iqr_bounds([df], columns, threshold, error)
+    # Missing values never fall outside a bound, as with the pandas filter
+    mask = np.ones(len(df), dtype=bool)
+    for col, (low, high) in bounds.items():
+        values = column_values(df, col)
+        mask &= ~((values < low) | (values > high))
+    return df[mask]
+
+CRITICAL_COLUMNS = ['GHI', 'DNI', 'DHI', 'Tamb', 'WS', 'WD', 'RH']
+KEY_COLUMNS = ['GHI', 'DNI', 'DHI', 'WS', 'Tamb']
+
+def outlier_bounds(moments, n_std=3):
+    """Turn per-column moments into (low, high) mean +/- n_std * std bounds."""
+    bounds = {}
+    for col, acc in moments.items():
+        mean = acc.mean if acc.count else np.nan
+        std = acc.std()
+        bounds[col] = (mean - n_std * std, mean + n_std * std)
+    return bounds
+
+def within_bounds(df, bounds, overrides=None):
+    """Return the mask of rows whose values lie inside every bound."""
+    overrides = overrides or {}
+    mask = np.ones(len(df), dtype=bool)
+    for col, (low, high) in bounds.items():
+        values = overrides[col] if col in overrides else column_values(df, col)
+        mask &= (values >= low) & (values <= high)
+    return mask
+
+def fit_outlier_moments(make_chunks, columns, n_std=3, mode='sequential'):
+    """Accumulate outlier statistics over chunks with mergeable moments.
+
+    ``make_chunks`` is a callable returning a fresh iterator of chunks.
+    In 'joint' mode all columns are accumulated in one pass. In
+    'sequential' mode column k is accumulated in its own pass over the
+    rows inside the bounds of columns 0..k-1, reproducing
+    remove_statistical_outliers exactly. Returns a dict of
+    MomentAccumulator per column.
+    """
+    if mode not in OUTLIER_MODES:
+        raise ValueError(f"Unknown outlier mode: {mode}")
+    if mode == 'joint':
+        moments = {col: MomentAccumulator() for col in columns}
+        for chunk in make_chunks():
+            for col in columns:
+                moments[col].update(column_values(chunk, col))
+        return moments
     
-    # Apply specific cleaning steps
-    df_cleaned = clean_solar_radiation(df_cleaned)
-    df_cleaned = clean_weather_data(df_cleaned)
-    df_cleaned = clean_module_data(df_cleaned)
+    moments = {}
+    for col in columns:
+        bounds = outlier_bounds(moments, n_std)
+        acc = MomentAccumulator()
+        for chunk in make_chunks():
+            acc.update(column_values(chunk, col)[within_bounds(chunk, bounds)])
+        moments[col] = acc
+    return moments
+
+def outlier_mask(df, columns, mask, n_std=3, overrides=None, mode='sequential'):
+    """Narrow ``mask`` by mean +/- n_std * std filtering.
+
+    In 'sequential' mode each column's statistics are computed on the
+    rows that survived the previous columns, matching
+    remove_statistical_outliers; 'joint' mode uses the rows of ``mask``
+    for every column.
+    """
+    mask = mask.copy()
+    overrides = overrides or {}
+    if mode == 'joint':
+        moments = {}
+        for col in columns:
+            values = overrides[col] if col in overrides else column_values(df, col)
+            moments[col] = MomentAccumulator().update(values[mask])
+        return mask & within_bounds(df, outlier_bounds(moments, n_std), overrides)
+    for col in columns:
+        if not mask.any():
+            break
+        values = overrides[col] if col in overrides else column_values(df, col)
+        kept = values[mask]
+        kept = kept[~np.isnan(kept)]
+        if len(kept) < 2:
+            # pandas yields a NaN std here, which rejects every row
+            mask[:] = False
+            break
+        mean = kept.mean()
+        std = kept.std(ddof=1)
+        mask &= (values >= mean - n_std * std) & (values <= mean + n_std * std)
+    return mask
+
+def _take(df, mask, evaluation):
+    """Select the masked rows once and apply rule clamps to them."""
+    rows = np.flatnonzero(mask)
+    df_cleaned = df.take(rows)
+    for rule in applicable_rules(df.columns):
+        if rule.clamp_min is not None and rule.column in evaluation.values:
+            df_cleaned[rule.column] = evaluation.values[rule.column][rows]
+    return df_cleaned
+
+def apply_range_rules(df, evaluation=None):
+    """Drop incomplete rows and apply the per-row range cleaning steps."""
+    if evaluation is None:
+        evaluation = evaluate_rules(df)
+    return _take(df, evaluation.mask, evaluation)
+
+def basic_cleaning(df):
+    """Fallback cleaning: clamp negative GHI and drop missing radiation."""
+    df_cleaned = df.copy()
+    df_cleaned.loc[df_cleaned['GHI'] < 0, 'GHI'] = 0
+    return df_cleaned.dropna(subset=['GHI', 'DNI', 'DHI'])
+
+@instrumented()
+def clean_data(df, evaluation=None, outlier_mode='sequential'):
+    """Main cleaning function applying all cleaning steps.
+
+    All rules are fused into a single boolean mask over the column arrays
+    and the surviving rows are taken once, instead of materializing a new
+    frame per step. Pass the ``evaluation`` already computed for the
+    validation report to skip re-evaluating the rule table.
+    """
+    if evaluation is None:
+        evaluation = evaluate_rules(df)
     
     # Remove statistical outliers for key measurements
-    key_columns = ['GHI', 'DNI', 'DHI', 'WS', 'Tamb']
-    df_cleaned = remove_statistical_outliers(df_cleaned, key_columns)
+    mask = outlier_mask(df, KEY_COLUMNS, evaluation.mask, overrides=evaluation.values,
+                        mode=outlier_mode)
     
     # If cleaning removed all data, return original with basic cleaning
+    if not mask.any():
+        print("Warning: Strict cleaning removed all data. Applying basic cleaning only.")
+        return basic_cleaning(df)
+    
+    return _take(df, mask, evaluation)
+
+def fit_outlier_bounds(df, evaluation=None, outlier_mode='sequential', n_std=3):
+    """Return the outlier bounds clean_data applies to ``df``.
+
+    The bounds can be stored and reused by clean_with_bounds to clean rows
+    appended later without refitting over the full history.
+    """
+    if evaluation is None:
+        evaluation = evaluate_rules(df)
+    range_cleaned = apply_range_rules(df, evaluation)
+    moments = fit_outlier_moments(lambda: [range_cleaned], KEY_COLUMNS, n_std, outlier_mode)
+    return outlier_bounds(moments, n_std)
+
+@instrumented()
+def clean_with_bounds(df, bounds, evaluation=None):
+    """Clean ``df`` with the range rules and previously fitted outlier bounds."""
+    if evaluation is None:
+        evaluation = evaluate_rules(df)
+    mask = evaluation.mask & within_bounds(df, bounds, evaluation.values)
+    return _take(df, mask, evaluation)
+
+@instrumented()
+def clean_chunks(make_chunks, on_chunk=None, outlier_mode='sequential', n_std=3, on_bounds=None):
+    """Clean a chunked station file without materializing the raw data.
+
+    ``make_chunks`` is a callable returning a fresh iterator of raw chunks.
+    The first pass runs the range rules per chunk and keeps only the key
+    columns of the surviving rows, from which the outlier statistics are
+    fitted (in 'sequential' mode one sweep per key column, in memory); a
+    second pass keeps the rows inside the bounds. The file is thus read
+    twice, and besides the key columns only the cleaned rows are held in
+    memory.
+    ``on_chunk(chunk, evaluation)`` is called once per raw chunk during
+    the first pass, e.g. to build the validation report alongside, and
+    ``on_bounds(bounds)`` once the outlier bounds are fitted.
+    """
+    passes = []
+    
+    def range_cleaned():
+        first_pass = not passes
+        passes.append(True)
+        for chunk in make_chunks():
+            evaluation = evaluate_rules(chunk)
+            if first_pass and on_chunk is not None:
+                on_chunk(chunk, evaluation)
+            yield apply_range_rules(chunk, evaluation)
+    
+    key_chunks = [pd.DataFrame({col: column_values(chunk, col) for col in KEY_COLUMNS}, copy=False)
+                  for chunk in range_cleaned()]
+    moments = fit_outlier_moments(lambda: key_chunks, KEY_COLUMNS, n_std, outlier_mode)
+    del key_chunks
+    bounds = outlier_bounds(moments, n_std)
+    if on_bounds is not None:
+        on_bounds(bounds)
+    parts = [chunk[within_bounds(chunk, bounds)] for chunk in range_cleaned()]
+    df_cleaned = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    del parts
+    
     if len(df_cleaned) == 0:
         print("Warning: Strict cleaning removed all data. Applying basic cleaning only.")
-        df_cleaned = df.copy()
-        df_cleaned.loc[df_cleaned['GHI'] < 0, 'GHI'] = 0
-        df_cleaned = df_cleaned.dropna(subset=['GHI', 'DNI', 'DHI'])
+        parts = [basic_cleaning(chunk) for chunk in make_chunks()]
+        df_cleaned = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
     
-    return df_cleaned
\ No newline at end of file
+    return df_cleaned.reset_index(drop=True)
@@ -1,12 +1,198 @@
+import io
+import os
+
 import numpy as np
 import pandas as pd
 
-def load_data(file_path):
-    """Load and parse CSV data with timestamp conversion."""
-    return pd.read_csv(file_path, parse_dates=['Timestamp'])
+import columnar_cache
+import station_store
+from instrumentation import instrumented
+
+# Explicit dtypes for the station sensor columns so chunks come back typed
+# consistently instead of being re-inferred on every read.
+SENSOR_DTYPES = {
+    'GHI': 'float64',
+    'DNI': 'float64',
+    'DHI': 'float64',
+    'ModA': 'float64',
+    'ModB': 'float64',
+    'Tamb': 'float64',
+    'RH': 'float64',
+    'WS': 'float64',
+    'WD': 'float64',
+}
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+DEFAULT_CHUNKSIZE = 100_000
+
+# Columns holding on/off flags, stored as categoricals in the compact layout
+FLAG_COLUMNS = ['Cleaning']
+# Readings have 0.1-unit precision, well within float32's ~7 digits
+COMPACT_FLOAT = 'float32'
+# Signed, so appended rows or arithmetic (differences, x - 1) cannot wrap below zero
+INTEGER_TYPES = ['int8', 'int16', 'int32']
+
+def parse_timestamps(values):
+    """Parse timestamp strings using the stations' fixed format."""
+    try:
+        return pd.to_datetime(values, format=TIMESTAMP_FORMAT)
+    except (ValueError, TypeError):
+        # Fall back to inference for files that deviate from the format
+        return pd.to_datetime(values)
+
+def _read_csv_args(usecols=None):
+    """Build the shared read_csv arguments for typed station reads."""
+    dtype = SENSOR_DTYPES
+    if usecols is not None:
+        dtype = {col: dt for col, dt in SENSOR_DTYPES.items() if col in usecols}
+    return {'dtype': dtype, 'usecols': usecols}
+
+def _finish_chunk(df):
+    """Convert the timestamp column of a freshly parsed chunk."""
+    if 'Timestamp' in df.columns:
+        df['Timestamp'] = parse_timestamps(df['Timestamp'])
+    return df
+
+class _PrefixReader(io.RawIOBase):
+    """Raw binary reader over the first ``end`` bytes of a file."""
+
+    def __init__(self, file_path, end):
+        self._file = open(file_path, 'rb')
+        self._left = end
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._file.read(min(len(buffer), self._left))
+        buffer[:len(data)] = data
+        self._left -= len(data)
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+def open_prefix(file_path, end):
+    """Open the first ``end`` bytes of ``file_path`` as a binary file."""
+    return io.BufferedReader(_PrefixReader(file_path, end))
+
+def _bounded(file_path, end):
+    """``end`` if it cuts ``file_path`` short, None if the whole file is wanted."""
+    return end if end is not None and end < os.path.getsize(file_path) else None
+
+def read_csv_typed(file_path, usecols=None, end=None):
+    """Parse a station CSV with the typed schema, bypassing any cache.
+
+    With ``end`` only the first ``end`` bytes are parsed.
+    """
+    if _bounded(file_path, end) is None:
+        return _finish_chunk(pd.read_csv(file_path, **_read_csv_args(usecols)))
+    with open_prefix(file_path, end) as f:
+        return _finish_chunk(pd.read_csv(f, **_read_csv_args(usecols)))
+
+def _smallest_integer(values):
+    """Smallest signed integer dtype holding whole ``values``, else None."""
+    if len(values) == 0 or np.isnan(values).any():
+        return None
+    if not np.array_equal(values, np.round(values)):
+        return None
+    for dtype in INTEGER_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= values.min() and values.max() <= info.max:
+            return dtype
+    return None
+
+def compact_dtypes(df):
+    """Return ``df`` in the compact layout.
+
+    Columns with no values are dropped, flag and text columns become
+    categoricals, whole numbers (e.g. BP, or WD/RH from stations
+    reporting whole units) take the smallest signed integer type that
+    fits, and other numeric columns become float32.
+    """
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if series.isna().all():
+            continue
+        if pd.api.types.is_datetime64_any_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+            columns[col] = series
+        elif col in FLAG_COLUMNS or not pd.api.types.is_numeric_dtype(series):
+            columns[col] = series.astype('category')
+        else:
+            values = series.to_numpy(dtype='float64', na_value=np.nan)
+            dtype = _smallest_integer(values)
+            columns[col] = series.astype(dtype if dtype is not None else COMPACT_FLOAT)
+    return pd.DataFrame(columns, index=df.index)
+
+def memory_report(df, baseline=None):
+    """Per-column dtype and memory in bytes, plus a total row.
+
+    With ``baseline`` (e.g. the frame before compact_dtypes) the report
+    also lists the baseline bytes and the ratio per column; columns only
+    present in the baseline show as dropped.
+    """
+    usage = df.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({'dtype': df.dtypes.astype(str), 'bytes': usage})
+    if baseline is not None:
+        base_usage = baseline.memory_usage(index=False, deep=True)
+        report = report.reindex(base_usage.index.union(report.index, sort=False))
+        report['dtype'] = report['dtype'].fillna('dropped')
+        report['bytes'] = report['bytes'].fillna(0)
+        report['baseline_bytes'] = base_usage.reindex(report.index).fillna(0)
+    byte_columns = [col for col in report.columns if col != 'dtype']
+    total = pd.DataFrame({'dtype': [''], **{col: [report[col].sum()] for col in byte_columns}},
+                         index=['total'])
+    report = pd.concat([report, total])
+    report[byte_columns] = report[byte_columns].astype('int64')
+    if baseline is not None:
+        report['ratio'] = report['bytes'] / report['baseline_bytes'].where(report['baseline_bytes'] > 0)
+    return report
+
+@instrumented()
+def load_data(file_path, usecols=None, use_cache=True, compact=False, end=None, shared=False):
+    """Load and parse CSV data with timestamp conversion.
+
+    By default the parsed frame is kept in a columnar cache next to the
+    CSV, so later loads skip CSV parsing until the source file changes.
+    When a station store is configured (SOLAR_STATION_STORE) and holds an
+    up-to-date copy of the file, the frame is read from it instead; with
+    ``shared=True`` such a frame keeps read-only views of the store's
+    mapped pages rather than a private copy, for callers that never
+    modify it (e.g. the dashboards).
+    ``compact=True`` returns the frame in the compact layout
+    (see compact_dtypes). ``end`` limits parsing to the first ``end``
+    bytes, e.g. an offset measured before reading a file that is still
+    being appended to; a prefix is always parsed from the CSV.
+    """
+    if not use_cache or _bounded(file_path, end) is not None:
+        df = read_csv_typed(file_path, usecols, end)
+    else:
+        store = station_store.default_store()
+        df = store.load_source(file_path, usecols, shared) if store is not None else None
+        if df is None:
+            df = columnar_cache.read_cached(file_path, read_csv_typed, columns=usecols)
+    return compact_dtypes(df) if compact else df
+
+def iter_chunks(file_path, chunksize=DEFAULT_CHUNKSIZE, usecols=None, end=None):
+    """Stream a station CSV (or its first ``end`` bytes) as typed DataFrame chunks."""
+    end = _bounded(file_path, end)
+    if end is None and columnar_cache.pq is not None and columnar_cache.is_fresh(file_path):
+        yield from columnar_cache.iter_cache_batches(file_path, chunksize, columns=usecols)
+        return
+    source = open_prefix(file_path, end) if end is not None else file_path
+    try:
+        reader = pd.read_csv(source, chunksize=chunksize, **_read_csv_args(usecols))
+        with reader:
+            for chunk in reader:
+                yield _finish_chunk(chunk)
+    finally:
+        if end is not None:
+            source.close()
 
 def data_quality_check(df):
     """Check for missing and negative values in the dataset."""
     missing_values = df.isnull().sum()
     negative_values = df.select_dtypes(include=[np.number]).lt(0).sum()
-    return missing_values, negative_values
\ No newline at end of file
+    return missing_values, negative_values
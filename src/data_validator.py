@@ -1,45 +1,76 @@
 import pandas as pd
 import numpy as np
+from rules import evaluate_rules
+from instrumentation import instrumented
 
-def validate_data_ranges(df):
+def validate_data_ranges(df, evaluation=None):
     """Validate data ranges and return validation results."""
-    validations = {
-        'GHI': (-10, 1500),  # Allow slight negative for sensor error
-        'DNI': (0, 1500),
-        'DHI': (0, 1500),
-        'Tamb': (-20, 60),
-        'RH': (0, 100),
-        'WS': (0, 50),
-        'WD': (0, 360)
-    }
+    if evaluation is None:
+        evaluation = evaluate_rules(df)
     
     results = {}
-    for column, (min_val, max_val) in validations.items():
-        if column in df.columns:
-            out_of_range = ~df[column].between(min_val, max_val)
-            results[column] = {
-                'out_of_range_count': out_of_range.sum(),
-                'percentage': (out_of_range.sum() / len(df)) * 100
-            }
+    for column, count in evaluation.violations.items():
+        results[column] = {
+            'out_of_range_count': count,
+            'percentage': (count / evaluation.total_rows) * 100 if evaluation.total_rows else 0.0
+        }
     
     return results
 
-def check_data_consistency(df):
+def check_data_consistency(df, evaluation=None):
     """Check data consistency and relationships."""
-    checks = {
-        'GHI_vs_components': (df['GHI'] >= (df['DNI'] + df['DHI'])).sum(),
-        'temp_vs_humidity': ((df['Tamb'] > 40) & (df['RH'] > 90)).sum(),
-        'wind_direction': (df['WD'] < 0).sum() + (df['WD'] > 360).sum()
-    }
-    return checks
+    if evaluation is None:
+        evaluation = evaluate_rules(df)
+    return dict(evaluation.consistency)
+
+@instrumented()
+def generate_validation_report(df, evaluation=None, profile=None):
+    """Generate a comprehensive validation report.
 
-def generate_validation_report(df):
-    """Generate a comprehensive validation report."""
+    Pass the ``evaluation`` from rules.evaluate_rules to reuse the same
+    rule pass that drives cleaning, and a profiler.DataProfile of ``df``
+    to reuse its missing and complete-row counts.
+    """
+    if evaluation is None:
+        evaluation = evaluate_rules(df)
+    if profile is None:
+        missing = df.isnull()
+        missing_values = {column: int(count) for column, count in missing.sum().items()}
+        valid_rows = int(len(df) - missing.any(axis=1).sum())
+    else:
+        missing_values, valid_rows = dict(profile.missing), profile.complete_rows
     report = {
-        'missing_values': df.isnull().sum().to_dict(),
-        'range_validations': validate_data_ranges(df),
-        'consistency_checks': check_data_consistency(df),
+        'missing_values': missing_values,
+        'range_validations': validate_data_ranges(df, evaluation),
+        'consistency_checks': check_data_consistency(df, evaluation),
         'total_rows': len(df),
-        'valid_rows': len(df.dropna())
+        'valid_rows': valid_rows
     }
-    return report
\ No newline at end of file
+    return report
+
+def merge_validation_reports(reports):
+    """Combine validation reports computed over chunks of one dataset."""
+    merged = {
+        'missing_values': {},
+        'range_validations': {},
+        'consistency_checks': {},
+        'total_rows': 0,
+        'valid_rows': 0
+    }
+    for report in reports:
+        for column, count in report['missing_values'].items():
+            merged['missing_values'][column] = merged['missing_values'].get(column, 0) + count
+        for column, result in report['range_validations'].items():
+            entry = merged['range_validations'].setdefault(column, {'out_of_range_count': 0})
+            entry['out_of_range_count'] += result['out_of_range_count']
+        for check, count in report['consistency_checks'].items():
+            merged['consistency_checks'][check] = merged['consistency_checks'].get(check, 0) + count
+        merged['total_rows'] += report['total_rows']
+        merged['valid_rows'] += report['valid_rows']
+    
+    # Percentages are recomputed from the merged counts
+    for result in merged['range_validations'].values():
+        result['percentage'] = (
+            (result['out_of_range_count'] / merged['total_rows']) * 100 if merged['total_rows'] else 0.0
+        )
+    return merged
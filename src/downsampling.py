@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+# Series longer than the threshold are reduced to about TARGET_POINTS,
+# roughly the horizontal pixel budget of a full-width chart.
+DOWNSAMPLE_THRESHOLD = 5000
+TARGET_POINTS = 2000
+
+def _as_float(values):
+    """Convert datetimes (via their integer epoch, NaT as NaN) or numbers to float64.
+
+    Timezone-aware datetimes use their UTC epoch.
+    """
+    values = pd.Series(values) if not isinstance(values, pd.Series) else values
+    if pd.api.types.is_datetime64_any_dtype(values):
+        epoch = pd.DatetimeIndex(values).asi8.astype('float64')
+        epoch[values.isna().to_numpy()] = np.nan
+        return epoch
+    return values.to_numpy(dtype='float64', na_value=np.nan)
+
+def gap_markers(missing, kept):
+    """One missing row inside each interval between ``kept`` rows that spans a gap.
+
+    ``missing`` flags rows without a value and ``kept`` holds the sorted
+    positions selected by a downsampler. Keeping the first missing row of
+    every such interval makes plots break the line at the gap instead of
+    bridging it with a straight segment.
+    """
+    positions = np.flatnonzero(missing)
+    if len(positions) == 0 or len(kept) < 2:
+        return np.empty(0, dtype='int64')
+    following = np.searchsorted(positions, kept[:-1], side='right')
+    inside = following < len(positions)
+    candidates = positions[np.minimum(following, len(positions) - 1)]
+    return candidates[inside & (candidates < kept[1:])]
+
+def lttb_indices(x, y, n_out):
+    """Select ``n_out`` indices with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the previously
+    selected point and the average of the next bucket, which preserves
+    peaks and the visual shape of the line.
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (n_out - 2)
+    selected = np.empty(n_out, dtype='int64')
+    selected[0] = 0
+    a = 0
+    for i in range(n_out - 2):
+        start = int(np.floor(i * every)) + 1
+        end = int(np.floor((i + 1) * every)) + 1
+        next_end = min(int(np.floor((i + 2) * every)) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                       - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+def minmax_indices(values, n_buckets):
+    """Keep the minimum and maximum of each of ``n_buckets`` equal buckets.
+
+    Every peak and trough survives, so the envelope of the series is
+    exact at bucket resolution. ``values`` may be 1D or 2D (one column per
+    series); for 2D input the indices of all series are combined so they
+    share one x axis.
+    """
+    values = np.asarray(values, dtype='float64')
+    if values.ndim == 1:
+        values = values[:, None]
+    n = len(values)
+    if n_buckets * 2 >= n:
+        return np.arange(n)
+    edges = np.linspace(0, n, n_buckets + 1).astype('int64')
+    keep = [np.array([0, n - 1])]
+    for start, end in zip(edges[:-1], edges[1:]):
+        bucket = values[start:end]
+        if np.isnan(bucket).all():
+            continue
+        filled_low = np.where(np.isnan(bucket), np.inf, bucket)
+        filled_high = np.where(np.isnan(bucket), -np.inf, bucket)
+        keep.append(start + np.argmin(filled_low, axis=0))
+        keep.append(start + np.argmax(filled_high, axis=0))
+    return np.unique(np.concatenate(keep))
+
+def downsample_frame(df, x, columns, target=TARGET_POINTS, threshold=DOWNSAMPLE_THRESHOLD,
+                     method=None):
+    """Reduce ``df`` to about ``target`` rows for plotting ``columns`` over ``x``.
+
+    Frames at or below ``threshold`` rows are returned unchanged. ``method``
+    is 'lttb' or 'minmax'; by default a single column uses LTTB and
+    several columns use the shared min/max envelope. Larger frames are
+    put in ``x`` order first (rows without an ``x`` are dropped), and a
+    row with the missing value is kept wherever a selected segment would
+    span missing values (see gap_markers), so gaps stay visible.
+    """
+    if len(df) <= threshold:
+        return df
+    if method is None:
+        method = 'lttb' if len(columns) == 1 else 'minmax'
+    if method not in ('lttb', 'minmax'):
+        raise ValueError(f"Unknown downsampling method: {method}")
+    if method == 'lttb' and len(columns) != 1:
+        raise ValueError("LTTB downsampling works on a single column")
+    if df[x].hasnans:
+        df = df[df[x].notna()]
+    if not df[x].is_monotonic_increasing:
+        df = df.sort_values(x, kind='stable')
+    values = np.column_stack([_as_float(df[col]) for col in columns])
+    missing = np.isnan(values)
+    if method == 'lttb':
+        valid = np.flatnonzero(~missing[:, 0])
+        rows = valid[lttb_indices(_as_float(df[x])[valid], values[valid, 0], target)]
+    else:
+        n_buckets = max(1, target // (2 * len(columns)))
+        rows = minmax_indices(values, n_buckets)
+    markers = [gap_markers(missing[:, i], rows) for i in range(len(columns))]
+    return df.iloc[np.unique(np.concatenate([rows] + markers))]
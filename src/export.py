@@ -0,0 +1,245 @@
+import functools
+import gzip
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from columnar_cache import pa, pq
+
+if pa is not None:
+    import pyarrow.csv as pacsv
+from data_cache import get_frame
+
+# Format name -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'csv.gz': ('csv.gz', 'application/gzip'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+EXPORT_CHUNKSIZE = 100_000
+EXPORT_DIR = 'exports'
+# Superseded exports are kept this long, as other processes may still be
+# about to open them (see station_store.VERSION_GRACE_SECONDS)
+EXPORT_GRACE_SECONDS = 300
+# About 3x faster than zlib's default level 6 for ~13% larger station files
+GZIP_LEVEL = 3
+
+def available_formats():
+    """Export formats usable in this environment (Parquet needs pyarrow)."""
+    return [fmt for fmt in EXPORT_FORMATS if fmt != 'parquet' or pq is not None]
+
+def select_range(df, start_date=None, end_date=None):
+    """Rows from start_date through end_date (inclusive days; None means open).
+
+    Time-ordered frames are cut with searchsorted as a positional slice;
+    others fall back to a boolean mask.
+    """
+    if start_date is None and end_date is None:
+        return df
+    timestamps = df['Timestamp']
+    start = pd.Timestamp(start_date) if start_date is not None else None
+    end = pd.Timestamp(end_date) + timedelta(days=1) if end_date is not None else None
+    if timestamps.is_monotonic_increasing:
+        values = timestamps.to_numpy()
+        lo = 0 if start is None else values.searchsorted(np.datetime64(start), side='left')
+        hi = len(values) if end is None else values.searchsorted(np.datetime64(end), side='left')
+        return df.iloc[lo:hi]
+    keep = np.ones(len(df), dtype=bool)
+    if start is not None:
+        keep &= (timestamps >= start).to_numpy()
+    if end is not None:
+        keep &= (timestamps < end).to_numpy()
+    return df[keep]
+
+def iter_export_chunks(df, chunksize=EXPORT_CHUNKSIZE):
+    """Yield positional slices of ``df`` (views, not copies).
+
+    An empty frame yields one empty slice, so exports still get a header
+    or schema.
+    """
+    for start in range(0, max(len(df), 1), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+def _csv_table(chunk, schema=None):
+    """Arrow table of a chunk for CSV output, with whole-second timestamps as text."""
+    table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+    for index, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            # Categorical columns (compact layout) are written as their values
+            table = table.set_column(index, field.name, table.column(index).cast(field.type.value_type))
+        elif pa.types.is_timestamp(field.type):
+            try:
+                seconds = table.column(index).cast(pa.timestamp('s'))
+            except pa.ArrowInvalid:
+                continue  # sub-second values are kept in Arrow's default format
+            table = table.set_column(index, field.name, seconds.cast(pa.string()))
+    return table
+
+def _write_arrow(chunks, sink, fmt, schema):
+    """Write chunks to an Arrow sink as Parquet row groups or CSV batches."""
+    writer = None
+    try:
+        for chunk in chunks:
+            if fmt == 'parquet':
+                table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(sink, table.schema)
+            else:
+                table = _csv_table(chunk, schema)
+                if writer is None:
+                    writer = pacsv.CSVWriter(sink, table.schema,
+                                             write_options=pacsv.WriteOptions(quoting_style='needed'))
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+def write_export(chunks, path, fmt='csv', schema=None):
+    """Stream chunks to ``path`` as CSV, gzip-compressed CSV or Parquet.
+
+    Only one chunk is converted at a time, so no full text or Arrow copy
+    of the data is built. With pyarrow, chunks are encoded by Arrow's
+    writers (several times faster than DataFrame.to_csv) against one
+    ``schema`` (default: inferred from the first chunk); without it CSV
+    falls back to pandas. The file is written under a temporary name and
+    moved into place when complete.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {list(EXPORT_FORMATS)}")
+    if fmt == 'parquet' and pq is None:
+        raise ImportError("Parquet export requires pyarrow")
+    tmp_path = f'{path}.tmp-{os.getpid()}-{threading.get_ident()}'
+    # Python's gzip stream also for Arrow output: Arrow's has no level setting
+    opener = functools.partial(gzip.open, compresslevel=GZIP_LEVEL) if fmt == 'csv.gz' else open
+    try:
+        if pa is not None:
+            with opener(tmp_path, 'wb') as sink:
+                _write_arrow(chunks, sink, fmt, schema)
+        else:
+            with opener(tmp_path, 'wt', newline='') as f:
+                for index, chunk in enumerate(chunks):
+                    chunk.to_csv(f, header=index == 0, index=False)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+def export_file_name(country, fmt, start_date=None, end_date=None):
+    """Download file name for an export, e.g. Benin_cleaned_data_2021-08-09_2021-08-16.csv."""
+    extension, _ = EXPORT_FORMATS[fmt]
+    span = ''
+    if start_date is not None or end_date is not None:
+        span = f'_{start_date or "start"}_{end_date or "end"}'
+    return f'{country}_cleaned_data{span}.{extension}'
+
+class ExportCache:
+    """Export files on disk, built once per (source version, range, format).
+
+    Files live in ``root`` (default: an ``exports`` directory next to each
+    source file). A changed source produces a new key; the superseded
+    file for the same range and format is removed by a later build once
+    it has been superseded for EXPORT_GRACE_SECONDS. Builds of one key are
+    serialized, so concurrent requests wait for a single build instead of
+    each writing their own.
+    """
+
+    def __init__(self, root=None, chunksize=EXPORT_CHUNKSIZE):
+        self.root = root
+        self.chunksize = chunksize
+        self._lock = threading.Lock()
+        self._building = {}
+        self.builds = 0
+        self.hits = 0
+
+    @contextmanager
+    def _key_lock(self, key):
+        """Hold the build lock of ``key``; it is dropped once no caller holds or awaits it."""
+        with self._lock:
+            entry = self._building.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._building[key]
+
+    def path(self, source_path, fmt, start_date=None, end_date=None):
+        """Cache file for an export of the current version of ``source_path``."""
+        source_path = os.path.abspath(source_path)
+        stat = os.stat(source_path)
+        root = self.root or os.path.join(os.path.dirname(source_path), EXPORT_DIR)
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        span = hashlib.sha256(f'{source_path}|{start_date}|{end_date}|{fmt}'.encode()).hexdigest()[:16]
+        version = hashlib.sha256(f'{stat.st_size}|{stat.st_mtime_ns}'.encode()).hexdigest()[:16]
+        extension, _ = EXPORT_FORMATS[fmt]
+        return os.path.join(root, f'{stem}-{span}-{version}.{extension}')
+
+    def get(self, source_path, fmt='csv', start_date=None, end_date=None, loader=None):
+        """Return the path of the export, building it if needed.
+
+        ``loader(source_path)`` returns the source frame (default: the
+        shared data cache).
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {fmt!r}; expected one of {list(EXPORT_FORMATS)}")
+        path = self.path(source_path, fmt, start_date, end_date)
+        with self._key_lock(path):
+            if os.path.exists(path):
+                with self._lock:
+                    self.hits += 1
+                return path
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Exports keep the source's full precision and all its columns
+            df = loader(source_path) if loader else get_frame(source_path, compact=False)
+            rows = select_range(df, start_date, end_date)
+            # One schema for all row groups, even if a chunk is all-null in a column
+            schema = pa.Schema.from_pandas(rows, preserve_index=False) if pa is not None else None
+            write_export(iter_export_chunks(rows, self.chunksize), path, fmt, schema)
+            with self._lock:
+                self.builds += 1
+            self._prune(path)
+        return path
+
+    def _prune(self, path):
+        """Delete exports of older source versions superseded more than EXPORT_GRACE_SECONDS ago.
+
+        Each version was superseded when the next newer export of the same
+        range and format was written.
+        """
+        directory, name = os.path.split(path)
+        prefix = name.rsplit('-', 1)[0] + '-'
+        versions = []
+        for entry in os.listdir(directory):
+            if entry.startswith(prefix) and '.tmp-' not in entry:
+                try:
+                    versions.append((os.stat(os.path.join(directory, entry)).st_mtime_ns, entry))
+                except FileNotFoundError:
+                    continue
+        versions.sort()
+        now = time.time_ns()
+        for (_, entry), (superseded_ns, _) in zip(versions, versions[1:]):
+            if entry != name and now - superseded_ns > EXPORT_GRACE_SECONDS * 1e9:
+                try:
+                    os.remove(os.path.join(directory, entry))
+                except FileNotFoundError:
+                    pass
+
+    def stats(self):
+        with self._lock:
+            return {'builds': self.builds, 'hits': self.hits}
+
+shared_exports = ExportCache()
+
+def export_data(source_path, fmt='csv', start_date=None, end_date=None, loader=None):
+    """Path of a (possibly cached) export from the shared export cache."""
+    return shared_exports.get(source_path, fmt, start_date, end_date, loader)
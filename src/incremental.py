@@ -0,0 +1,266 @@
+import hashlib
+import json
+import os
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+import columnar_cache
+import rollups as rollup_store
+from data_loader import load_data, parse_timestamps, _read_csv_args, _finish_chunk
+from data_cleaner import clean_with_bounds
+from data_validator import generate_validation_report, merge_validation_reports
+from rules import evaluate_rules
+
+WATERMARK_VERSION = 1
+# Bytes just before the watermark offset that are hashed to detect rewrites
+SIGNATURE_BYTES = 1 << 16
+
+def watermark_path(output_dir, country):
+    """Path of the per-station watermark file."""
+    return os.path.join(output_dir, f'{country}_watermark.json')
+
+def _read_header(file_path):
+    with open(file_path, 'rb') as f:
+        return f.readline().decode().rstrip('\r\n').split(',')
+
+def tail_signature(file_path, offset):
+    """Hash the header and the bytes just before ``offset``.
+
+    An appended-to file keeps both, while a rewritten or truncated file
+    almost surely changes them, without hashing the whole history.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        digest.update(f.readline())
+        start = max(0, offset - SIGNATURE_BYTES)
+        f.seek(start)
+        digest.update(f.read(offset - start))
+    return digest.hexdigest()
+
+def last_timestamp(file_path, offset):
+    """Timestamp of the last complete row before ``offset``, or None."""
+    header = _read_header(file_path)
+    if 'Timestamp' not in header:
+        return None
+    with open(file_path, 'rb') as f:
+        start = max(0, offset - SIGNATURE_BYTES)
+        f.seek(start)
+        lines = f.read(offset - start).decode(errors='replace').splitlines()
+    for line in reversed(lines[1:] if start > 0 else lines):
+        fields = line.split(',')
+        if len(fields) == len(header) and fields[0] != header[0]:
+            value = parse_timestamps(pd.Series([fields[header.index('Timestamp')]])).iloc[0]
+            return value.isoformat()
+    return None
+
+def complete_size(file_path):
+    """Size of ``file_path`` up to the end of its last complete line."""
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        position = size
+        while position > 0:
+            start = max(0, position - SIGNATURE_BYTES)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b'\n')
+            if newline >= 0:
+                return start + newline + 1
+            position = start
+    return 0
+
+def read_watermark(path):
+    """Load a watermark, or None if missing, unreadable or of another version."""
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get('version') == WATERMARK_VERSION else None
+
+def write_watermark(path, state):
+    """Write a watermark atomically."""
+    _write_json(path, state)
+
+def _write_json(path, state):
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, default=lambda value: value.item())
+    os.replace(tmp_path, path)
+
+def make_watermark(file_path, offset, bounds, validation_report, outlier_mode):
+    """Describe a processed source file up to ``offset`` bytes."""
+    return {
+        'version': WATERMARK_VERSION,
+        'source': os.path.abspath(file_path),
+        'offset': offset,
+        'signature': tail_signature(file_path, offset),
+        'last_timestamp': last_timestamp(file_path, offset),
+        'outlier_mode': outlier_mode,
+        'bounds': {col: [low, high] for col, (low, high) in bounds.items()},
+        'validation_report': validation_report,
+    }
+
+def usable_bounds(bounds):
+    """Check stored outlier bounds can clean appended rows.
+
+    NaN bounds mean strict cleaning kept none of the history, which
+    clean_data then cleaned with basic_cleaning instead. Such bounds would
+    reject every new row, so the station is re-run in full until strict
+    cleaning keeps some rows.
+    """
+    return bool(bounds) and all(np.isfinite(low) and np.isfinite(high)
+                                for low, high in bounds.values())
+
+def is_appended(state, file_path, outlier_mode):
+    """Check the source only grew since ``state`` was recorded."""
+    if state is None or state['source'] != os.path.abspath(file_path):
+        return False
+    if state['outlier_mode'] != outlier_mode:
+        return False
+    offset = state['offset']
+    if os.path.getsize(file_path) < offset:
+        return False
+    with open(file_path, 'rb') as f:
+        f.seek(max(0, offset - 1))
+        # The recorded data must end on a row boundary
+        if offset > 0 and f.read(1) != b'\n':
+            return False
+    return tail_signature(file_path, offset) == state['signature']
+
+def read_tail(file_path, offset, after=None, end=None):
+    """Parse the rows between byte ``offset`` and ``end`` of a station CSV.
+
+    Rows at or before the ``after`` timestamp are dropped, guarding
+    against rows re-written across the boundary.
+    """
+    header = _read_header(file_path)
+    with open(file_path, 'rb') as f:
+        f.seek(offset)
+        data = f.read() if end is None else f.read(end - offset)
+    if not data.strip():
+        return pd.DataFrame(columns=header)
+    tail = pd.read_csv(BytesIO(data), header=None, names=header, **_read_csv_args())
+    tail = _finish_chunk(tail)
+    if after is not None and 'Timestamp' in tail.columns:
+        tail = tail[tail['Timestamp'] > pd.Timestamp(after)]
+    return tail.reset_index(drop=True)
+
+def append_cleaned(cleaned_file_path, df):
+    """Append cleaned rows to the cleaned CSV and refresh its derived files.
+
+    The grown CSV is fingerprinted once; the new rows are added to the
+    columnar cache as a part file and the rollups are merged with rollups
+    of the new rows only. Returns the fingerprint.
+    """
+    columns = _read_header(cleaned_file_path)
+    cache_fresh = columnar_cache.pq is not None and columnar_cache.is_fresh(cleaned_file_path)
+    rollups = rollup_store.load_rollups(cleaned_file_path)
+
+    df = df.reindex(columns=columns)
+    df.to_csv(cleaned_file_path, mode='a', header=False, index=False)
+    fingerprint = columnar_cache.source_fingerprint(cleaned_file_path)
+
+    if cache_fresh:
+        columnar_cache.append_cache(df, cleaned_file_path, fingerprint)
+    if rollups is not None:
+        rollup_store.append_rollups(rollups, df, cleaned_file_path, fingerprint)
+    else:
+        rollup_store.save_rollups(load_data(cleaned_file_path), cleaned_file_path, fingerprint)
+    return fingerprint
+
+def process_increment(country, file_path, output_dir, outlier_mode='sequential'):
+    """Process only the rows appended to ``file_path`` since the last run.
+
+    Returns None when there is no usable watermark (first run, changed
+    cleaning options, the source was rewritten rather than appended, or
+    the history fell back to basic cleaning), in which case the caller
+    does a full run. Otherwise the new rows are validated, cleaned with
+    the stored outlier bounds and appended to the cleaned store. The
+    watermark marks the append as pending until it completes; a run that
+    finds it pending first truncates the cleaned CSV back to its size
+    before that append, so a crashed run is never applied twice. The
+    returned dict describes the appended rows (``appended_cleaned`` holds
+    them), the source offsets before and after, the cleaned CSV's
+    fingerprint (None if nothing was appended) and the cumulative
+    validation report.
+    """
+    path = watermark_path(output_dir, country)
+    cleaned_file_path = os.path.join(output_dir, f'{country}_cleaned_data.csv')
+    state = read_watermark(path)
+    if not os.path.exists(cleaned_file_path) or not is_appended(state, file_path, outlier_mode):
+        return None
+    bounds = {col: tuple(bound) for col, bound in state['bounds'].items()}
+    if not usable_bounds(bounds):
+        return None
+
+    pending = state.get('pending')
+    if pending is not None:
+        # A previous run stopped between appending and moving the watermark
+        os.truncate(cleaned_file_path, pending['cleaned_size'])
+
+    end = complete_size(file_path)
+    tail = read_tail(file_path, state['offset'], after=state['last_timestamp'], end=end)
+    fingerprint = None
+    if len(tail):
+        evaluation = evaluate_rules(tail)
+        tail_report = generate_validation_report(tail, evaluation)
+        tail_cleaned = clean_with_bounds(tail, bounds, evaluation)
+        # Recorded first, so a retry truncates a partial append instead of repeating it
+        write_watermark(path, dict(state, pending={
+            'cleaned_size': os.path.getsize(cleaned_file_path)}))
+        fingerprint = append_cleaned(cleaned_file_path, tail_cleaned)
+        report = merge_validation_reports([state['validation_report'], tail_report])
+    else:
+        tail_cleaned = tail
+        report = state['validation_report']
+    write_watermark(path, make_watermark(file_path, end, bounds, report, outlier_mode))
+
+    return {
+        'validation_report': report,
+        'appended_shape': tail.shape,
+        'appended_cleaned_shape': tail_cleaned.shape,
+        'appended_cleaned': tail_cleaned,
+        'previous_offset': state['offset'],
+        'offset': end,
+        'cleaned_file': cleaned_file_path,
+        'fingerprint': fingerprint,
+    }
+
+def chart_state_path(output_dir, country):
+    """Path of the file recording the source offset each chart was drawn at."""
+    return os.path.join(output_dir, f'{country}_charts.json')
+
+def read_chart_state(path):
+    """Load the chart file name -> source offset map ({} if missing)."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def write_chart_state(path, state):
+    """Write the chart state atomically."""
+    _write_json(path, state)
+
+def stale_charts(specs, output_dir, state, result, correlation_columns):
+    """Chart specs an incremental run must redraw.
+
+    A chart is kept when its file exists, it was drawn at the previous
+    watermark offset and the appended cleaned rows add no values to its
+    columns (``correlation_columns`` for the correlation matrix chart).
+    """
+    appended = result['appended_cleaned']
+    stale = []
+    for spec in specs:
+        filename, columns = spec[0], spec[2]
+        if columns is None:
+            columns = correlation_columns
+        if (not os.path.exists(os.path.join(output_dir, filename))
+                or state.get(filename) != result['previous_offset']):
+            stale.append(spec)
+            continue
+        changed = [column for column in columns if column in appended.columns]
+        if len(appended) and appended[changed].notna().to_numpy().any():
+            stale.append(spec)
+    return stale
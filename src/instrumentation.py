@@ -0,0 +1,210 @@
+import contextvars
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Where records are appended as JSON lines and where cProfile dumps go.
+# Set through configure() or the environment, so worker processes inherit them.
+METRICS_FILE_ENV = 'SOLAR_METRICS_FILE'
+PROFILE_DIR_ENV = 'SOLAR_PROFILE_DIR'
+PROFILE_STAGES_ENV = 'SOLAR_PROFILE_STAGES'
+RECENT_LIMIT = 2000
+
+_station = contextvars.ContextVar('station', default=None)
+_recent = deque(maxlen=RECENT_LIMIT)
+_lock = threading.Lock()
+# Only one cProfile profiler may run at a time in a process
+_profiling = {'active': False}
+_profile_counter = [0]
+
+def configure(metrics_file=None, profile_dir=None, profile_stages=None):
+    """Set the JSON lines sink and optional cProfile output for this process and its workers.
+
+    ``profile_stages`` limits profiling to the named stages (default: all
+    stages once ``profile_dir`` is set).
+    """
+    for env, value in ((METRICS_FILE_ENV, metrics_file), (PROFILE_DIR_ENV, profile_dir)):
+        if value is not None:
+            os.environ[env] = os.path.abspath(value)
+    if profile_dir is not None:
+        os.makedirs(profile_dir, exist_ok=True)
+    if profile_stages is not None:
+        os.environ[PROFILE_STAGES_ENV] = ','.join(profile_stages)
+
+def _rss_mb():
+    """Current resident set size in MB (None where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / 1e6
+
+def max_rss_mb():
+    """Peak resident set size of the process so far in MB (None without ``resource``)."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return usage / 1e6 if sys.platform == 'darwin' else usage / 1e3
+
+def _rows(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    return None
+
+def _should_profile(name):
+    """Claim the process profiler for stage ``name`` if profiling applies."""
+    if not os.environ.get(PROFILE_DIR_ENV):
+        return False
+    selected = os.environ.get(PROFILE_STAGES_ENV)
+    if selected and name not in selected.split(','):
+        return False
+    with _lock:
+        if _profiling['active']:
+            return False
+        _profiling['active'] = True
+        return True
+
+def _emit(record):
+    with _lock:
+        _recent.append(record)
+    path = os.environ.get(METRICS_FILE_ENV)
+    if path:
+        # One write per record in append mode keeps lines from several
+        # worker processes intact
+        with open(path, 'a') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+
+@contextmanager
+def station_context(station):
+    """Attribute the stages run inside this block to ``station``."""
+    token = _station.set(station)
+    try:
+        yield
+    finally:
+        _station.reset(token)
+
+def in_context(func):
+    """Wrap ``func`` to run in a copy of the caller's context.
+
+    Thread pool workers do not inherit context variables, so calls handed
+    to an executor are wrapped to keep their station attribution.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+@contextmanager
+def stage(name, rows_in=None, **fields):
+    """Time a block and emit one record for it.
+
+    The yielded dict can be updated inside the block, e.g. with
+    ``rows_out``. Records carry wall time, process CPU time (every
+    thread of the process, so stages fanning out to thread pools are
+    counted in full, as are stages running alongside), rows in/out,
+    current and peak RSS, the station from station_context and any extra
+    ``fields``. When profiling is configured, the outermost profiled
+    stage is run under cProfile and its dump path recorded.
+    """
+    record = {'stage': name, 'station': _station.get(), 'rows_in': rows_in, 'rows_out': None}
+    record.update(fields)
+    profiler = None
+    if _should_profile(name):
+        profiler = cProfile.Profile()
+        profiler.enable()
+    rss_before = _rss_mb()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    status = 'ok'
+    try:
+        yield record
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        record['wall_s'] = time.perf_counter() - wall_start
+        record['cpu_s'] = time.process_time() - cpu_start
+        if profiler is not None:
+            profiler.disable()
+            with _lock:
+                _profiling['active'] = False
+                _profile_counter[0] += 1
+                count = _profile_counter[0]
+            station = (record['station'] or 'all').replace(os.sep, '_')
+            safe_name = name.replace(os.sep, '_').replace(':', '_')
+            path = os.path.join(os.environ[PROFILE_DIR_ENV],
+                                f'{station}-{safe_name}-{os.getpid()}-{count}.prof')
+            profiler.dump_stats(path)
+            record['profile'] = path
+        rss_after = _rss_mb()
+        record['rss_mb'] = rss_after
+        record['rss_delta_mb'] = (rss_after - rss_before
+                                  if rss_after is not None and rss_before is not None else None)
+        record['max_rss_mb'] = max_rss_mb()
+        record['status'] = status
+        record['pid'] = os.getpid()
+        record['time'] = time.time()
+        _emit(record)
+
+def instrumented(name=None):
+    """Decorator running a function as a stage.
+
+    Rows in and out are taken from the first argument and the return
+    value when they are DataFrames or Series.
+    """
+    def decorate(func):
+        stage_name = name or f'{func.__module__}.{func.__name__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name, rows_in=_rows(args[0]) if args else None) as record:
+                result = func(*args, **kwargs)
+                record['rows_out'] = _rows(result)
+            return result
+        return wrapper
+    return decorate
+
+def recent_records(station=None):
+    """Records emitted by this process (most recent last)."""
+    with _lock:
+        records = list(_recent)
+    if station is not None:
+        records = [record for record in records if record['station'] == station]
+    return records
+
+def clear_records():
+    with _lock:
+        _recent.clear()
+
+def records_frame(records=None):
+    """Records as a DataFrame with the main columns first."""
+    records = recent_records() if records is None else records
+    columns = ['station', 'stage', 'wall_s', 'cpu_s', 'rows_in', 'rows_out', 'rss_mb',
+               'rss_delta_mb', 'max_rss_mb', 'status']
+    df = pd.DataFrame(records)
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+    return df[[col for col in columns if col in df.columns]
+              + [col for col in df.columns if col not in columns]]
+
+def read_metrics(path):
+    """Load a JSON lines metrics file written by this module."""
+    with open(path) as f:
+        return records_frame([json.loads(line) for line in f if line.strip()])
@@ -1,69 +1,461 @@
+import argparse
+import io
 import os
-from data_loader import load_data, data_quality_check
-from data_cleaner import clean_data
-from data_validator import generate_validation_report
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+import pandas as pd
+import columnar_cache
+from data_loader import load_data, iter_chunks, data_quality_check
+from data_cleaner import clean_data, clean_chunks, fit_outlier_bounds, OUTLIER_MODES
+from data_validator import generate_validation_report, merge_validation_reports
+from rules import evaluate_rules
+from rollups import save_rollups
+from incremental import (process_increment, complete_size, make_watermark, write_watermark,
+                         watermark_path, chart_state_path, read_chart_state, write_chart_state,
+                         stale_charts)
 from analysis import summary_statistics, cleaning_impact_analysis, correlation_analysis
-from visualization import (
-    time_series_analysis, create_correlation_heatmap, wind_analysis,
-    temperature_humidity_analysis, create_histograms, bubble_chart
-)
+from correlation_engine import CORRELATION_COLUMNS
+from profiler import DataProfile, profile_frame, profile_path, save_profile
+from instrumentation import configure, station_context
+from station_store import POINTER_FILE, STORE_ENV, StationStore, default_store, store_root
+from stage_cache import ArtifactStore, Pipeline, Stage, SOURCE_PREFIX
 
-def process_dataset(country, file_path, output_dir):
-    """Process a single dataset with validation and cleaning."""
+# Stage artifacts are cached in this directory under each station's output
+STAGE_DIR = '.stages'
+
+DATASETS = {
+    'Benin': './data/benin-malanville.csv',
+    'Sierra Leone': './data/sierraleone-bumbuna.csv',
+    'Togo': './data/togo-dapaong_qc.csv'
+}
+
+# The plotting stack (visualization, matplotlib, seaborn) is imported only
+# by the functions that render, so runs without charts never load it.
+
+def clean_and_validate_chunks(make_chunks, outlier_mode='sequential', on_bounds=None):
+    """Validate, profile and clean a chunked dataset in a single pass over the file.
+
+    Returns the merged validation report, the raw shape, the cleaned frame
+    and the data-quality profile of the raw data.
+    """
+    reports = []
+    shape = [0, 0]
+    profile = DataProfile()
+    
+    def record(chunk, evaluation):
+        chunk_profile = DataProfile().update(chunk)
+        reports.append(generate_validation_report(chunk, evaluation, chunk_profile))
+        profile.merge(chunk_profile)
+        shape[0] += len(chunk)
+        shape[1] = chunk.shape[1]
+    
+    df_cleaned = clean_chunks(make_chunks, on_chunk=record, outlier_mode=outlier_mode,
+                              on_bounds=on_bounds)
+    return merge_validation_reports(reports), tuple(shape), df_cleaned, profile
+
+def render_appended_charts(country, output_dir, result, chart_workers=None):
+    """Redraw the charts of an incremental run whose inputs changed.
+
+    Only the columns of the redrawn charts are loaded. The source offset
+    each chart is current with is recorded afterwards, so charts a failed
+    run did not redraw are redrawn next time.
+    """
+    from visualization import chart_job, render_figures, station_chart_specs
+    state_path = chart_state_path(output_dir, country)
+    specs = station_chart_specs(country)
+    stale = stale_charts(specs, output_dir, read_chart_state(state_path), result,
+                         CORRELATION_COLUMNS)
+    chart_timings = {}
+    if stale:
+        header = list(pd.read_csv(result['cleaned_file'], nrows=0).columns)
+        wanted = set(CORRELATION_COLUMNS if any(spec[2] is None for spec in stale) else [])
+        for spec in stale:
+            wanted.update(spec[2] or [])
+        df_cleaned = load_data(result['cleaned_file'],
+                               usecols=[column for column in header if column in wanted])
+        correlation_matrix = None
+        if any(spec[2] is None for spec in stale):
+            correlation_matrix = correlation_analysis(df_cleaned, CORRELATION_COLUMNS)
+        jobs = [chart_job(spec, df_cleaned, correlation_matrix, output_dir) for spec in stale]
+        chart_timings = render_figures(jobs, workers=chart_workers or 1)
+        print("\nFigure render times (s):")
+        for name, seconds in sorted(chart_timings.items(), key=lambda item: -item[1]):
+            print(f"  {name}: {seconds:.2f}")
+    write_chart_state(state_path, {spec[0]: result['offset'] for spec in specs})
+    return chart_timings
+
+def process_appended(country, file_path, output_dir, outlier_mode='sequential',
+                     chart_workers=None, charts=True):
+    """Incremental run: process only rows appended since the last watermark.
+
+    Returns None when a full run is needed instead.
+    """
+    result = process_increment(country, file_path, output_dir, outlier_mode)
+    if result is None:
+        return None
+    print(f"\nAppended {result['appended_shape'][0]} new rows for {country} "
+          f"({result['appended_cleaned_shape'][0]} after cleaning)")
+    
+    station_store = default_store()
+    if result['appended_cleaned_shape'][0] and station_store is not None:
+        station_store.write_station(country, load_data(result['cleaned_file']),
+                                    source=result['cleaned_file'],
+                                    fingerprint=result['fingerprint'])
+    # Charts show the full history, so those whose columns got new values are redrawn
+    chart_timings = {}
+    if charts:
+        chart_timings = render_appended_charts(country, output_dir, result, chart_workers)
+    del result['appended_cleaned']
+    result.update(mode='incremental', original_shape=result['appended_shape'],
+                  cleaned_shape=result['appended_cleaned_shape'], chart_timings=chart_timings)
+    return result
+
+def clean_stage(file_path, chunksize=None, outlier_mode='sequential', with_bounds=False,
+                end=None):
+    """Load, validate and clean a raw station file.
+
+    Returns the validation report, raw-data profile, raw shape, cleaned
+    frame and (with ``with_bounds``) the fitted outlier bounds for
+    incremental runs. With ``end`` only the first ``end`` bytes of the
+    file are read.
+    """
+    bounds = {}
+    if chunksize:
+        make_chunks = lambda: iter_chunks(file_path, chunksize=chunksize, end=end)
+        validation_report, original_shape, df_cleaned, profile = clean_and_validate_chunks(
+            make_chunks, outlier_mode, on_bounds=bounds.update)
+    else:
+        # Load data
+        df = load_data(file_path, end=end)
+        original_shape = df.shape
+        
+        # One rule pass drives both the validation report and cleaning
+        evaluation = evaluate_rules(df)
+        profile = profile_frame(df)
+        validation_report = generate_validation_report(df, evaluation, profile)
+        df_cleaned = clean_data(df, evaluation, outlier_mode=outlier_mode)
+        if with_bounds:
+            bounds = fit_outlier_bounds(df, evaluation, outlier_mode)
+        del df, evaluation
+    return {
+        'validation_report': validation_report,
+        'profile': profile.result(),
+        'original_shape': original_shape,
+        'cleaned': df_cleaned,
+        'bounds': bounds
+    }
+
+def report_stage(cleaned):
+    """The small part of the clean artifact needed to report on a run."""
+    return {
+        'validation_report': cleaned['validation_report'],
+        'original_shape': cleaned['original_shape'],
+        'cleaned_shape': cleaned['cleaned'].shape,
+        'bounds': cleaned['bounds']
+    }
+
+def profile_stage(cleaned, path):
+    """Write the station's data-quality profile as JSON."""
+    return save_profile(cleaned['profile'], path)
+
+def cleaned_stage(cleaned_file_path):
+    """The cleaned frame, read back through the columnar cache written by save_stage."""
+    return load_data(cleaned_file_path)
+
+def correlation_stage(df_cleaned):
+    """Correlation matrix of the cleaned station data."""
+    return correlation_analysis(df_cleaned, CORRELATION_COLUMNS)
+
+def chart_stage(data, path, builder, columns, extra):
+    """Render one chart from the cleaned data (or the correlation matrix)."""
+    from visualization import render_job
+    if columns is not None:
+        data = data[columns]
+    return render_job((path, builder, (data,) + extra))
+
+def save_stage(cleaned, cleaned_file_path, station=None, store_dir=None):
+    """Write the cleaned CSV with its columnar cache and rollups.
+
+    With ``store_dir`` the cleaned frame is also written to that station
+    store as ``station``.
+    """
+    df_cleaned = cleaned['cleaned']
+    df_cleaned.to_csv(cleaned_file_path, index=False)
+    # Hashed once for the cache, the rollups and the store
+    fingerprint = columnar_cache.source_fingerprint(cleaned_file_path)
+    columnar_cache.write_cache(df_cleaned, cleaned_file_path, fingerprint)
+    save_rollups(df_cleaned, cleaned_file_path, fingerprint)
+    if store_dir is not None:
+        StationStore(store_dir).write_station(station, df_cleaned, source=cleaned_file_path,
+                                              fingerprint=fingerprint)
+    return cleaned_file_path
+
+def station_stages(country, file_path, output_dir, chunksize=None, outlier_mode='sequential',
+                   with_bounds=False, charts=True, end=None):
+    """Declare the stage DAG for one station.
+
+    source -> clean -> report / profile / save -> cleaned -> correlation /
+    one stage per chart. The clean stage is not stored: its cleaned frame
+    is persisted once, as the cleaned CSV and its columnar cache, and
+    later stages read it back from there. Chart stages are left out with
+    ``charts=False``, and ``end`` limits the source to its first ``end`` bytes.
+    """
+    cleaned_file_path = os.path.join(output_dir, f'{country}_cleaned_data.csv')
+    profile_file = profile_path(output_dir, country)
+    # The store directory is a parameter, so configuring one re-runs the save stage
+    store_dir = store_root()
+    save_outputs = (cleaned_file_path,)
+    if store_dir is not None:
+        save_outputs += (os.path.join(store_dir, country, POINTER_FILE),)
+    stages = [
+        Stage('clean', clean_stage, (SOURCE_PREFIX + os.path.abspath(file_path),),
+              {'chunksize': chunksize, 'outlier_mode': outlier_mode, 'with_bounds': with_bounds,
+               'end': end},
+              persist=False),
+        Stage('report', report_stage, ('clean',)),
+        Stage('profile', profile_stage, ('clean',), {'path': profile_file},
+              outputs=(profile_file,)),
+        Stage('save', save_stage, ('clean',),
+              {'cleaned_file_path': cleaned_file_path, 'station': country, 'store_dir': store_dir},
+              outputs=save_outputs),
+        Stage('cleaned', cleaned_stage, ('save',), persist=False),
+        Stage('correlation', correlation_stage, ('cleaned',)),
+    ]
+    if not charts:
+        return stages
+    from visualization import station_chart_specs
+    for spec in station_chart_specs(country):
+        filename, builder, columns, extra = spec
+        path = f'{output_dir}/{filename}'
+        stages.append(Stage(f'chart:{filename}', chart_stage,
+                            ('correlation',) if columns is None else ('cleaned',),
+                            {'path': path, 'builder': builder, 'columns': columns, 'extra': extra},
+                            code=(builder,), outputs=(path,)))
+    return stages
+
+def process_dataset(country, file_path, output_dir, chunksize=None, outlier_mode='sequential',
+                    chart_workers=None, incremental=False, stage_cache=True, charts=True):
+    """Process a single dataset with validation and cleaning.
+
+    With ``chunksize`` set, the raw file is streamed in typed chunks so the
+    full raw frame is never held in memory at once. ``outlier_mode``
+    selects 'sequential' (original) or 'joint' outlier statistics, and
+    ``chart_workers`` sets how many figures render concurrently (default:
+    one at a time, see visualization.render_figures). With
+    ``incremental=True`` only rows appended since the last run are
+    processed when possible, and full runs record a watermark for the next.
+    With ``stage_cache`` each stage's artifact is kept under
+    ``<output_dir>/.stages`` and reused while its inputs and code are
+    unchanged. ``charts=False`` validates, cleans and saves without
+    rendering (or importing) any charts.
+    """
     print(f"\nProcessing data for {country}")
     
-    # Load data
-    df = load_data(file_path)
+    if incremental:
+        result = process_appended(country, file_path, output_dir, outlier_mode, chart_workers,
+                                  charts)
+        if result is not None:
+            return result
+        # Only rows up to this offset are read, so rows appended meanwhile
+        # (and a partial last row) are left for the next run
+        source_offset = complete_size(file_path)
+    else:
+        source_offset = None
     
-    # Validate data
-    validation_report = generate_validation_report(df)
+    store = ArtifactStore(os.path.join(output_dir, STAGE_DIR)) if stage_cache else None
+    pipeline = Pipeline(station_stages(country, file_path, output_dir, chunksize, outlier_mode,
+                                       with_bounds=incremental, charts=charts,
+                                       end=source_offset), store)
+    report = pipeline.get('report')
+    validation_report = report['validation_report']
     print("\nValidation Report:")
     print(validation_report)
     
-    # Clean data
-    df_cleaned = clean_data(df)
+    # Generate analysis and visualizations (only charts whose inputs changed)
+    chart_names = [name for name in pipeline.stages if name.startswith('chart:')]
+    chart_timings = {}
+    if chart_names:
+        print("\nGenerating analysis and visualizations...")
+        rendered = pipeline.run(chart_names, workers=chart_workers or 1)
+        chart_timings = {name[len('chart:'):]: seconds for name, seconds in rendered.items()
+                         if name in pipeline.report['misses']}
+    if chart_timings:
+        print("\nFigure render times (s):")
+        for name, seconds in sorted(chart_timings.items(), key=lambda item: -item[1]):
+            print(f"  {name}: {seconds:.2f}")
     
-    # Generate analysis and visualizations
-    print("\nGenerating analysis and visualizations...")
+    # Save cleaned data and the raw-data profile
+    cleaned_file_path = pipeline.get('save')
+    profile_file = pipeline.get('profile')
+    if incremental:
+        write_watermark(watermark_path(output_dir, country),
+                        make_watermark(file_path, source_offset, report['bounds'],
+                                       validation_report, outlier_mode))
+        # Charts rendered now are current with the watermark
+        state_path = chart_state_path(output_dir, country)
+        if chart_names:
+            write_chart_state(state_path, {name[len('chart:'):]: source_offset
+                                           for name in chart_names})
+        elif os.path.exists(state_path):
+            os.remove(state_path)
     
-    # Create visualizations
-    for column in ['GHI', 'DNI', 'DHI', 'Tamb']:
-        time_series_analysis(df_cleaned, column, f'{column} in {country}', output_dir)
-    
-    correlation_matrix = correlation_analysis(
-        df_cleaned, 
-        ['GHI', 'DNI', 'DHI', 'TModA', 'TModB', 'WS', 'WSgust', 'WD']
-    )
-    create_correlation_heatmap(correlation_matrix, output_dir)
+    print(f"\nStage cache: {len(pipeline.report['hits'])} hits, "
+          f"{len(pipeline.report['misses'])} misses")
+    print(f"\nResults for {country}:")
+    print(f"Original data shape: {report['original_shape']}")
+    print(f"Cleaned data shape: {report['cleaned_shape']}")
+    print(f"Cleaned data saved to: {cleaned_file_path}")
+    print(f"Data profile saved to: {profile_file}")
     
-    wind_analysis(df_cleaned, output_dir)
-    temperature_humidity_analysis(df_cleaned, output_dir)
-    create_histograms(df_cleaned, ['GHI', 'DNI', 'DHI', 'WS', 'Tamb'], output_dir)
-    bubble_chart(df_cleaned, output_dir)
+    return {
+        'mode': 'full',
+        'validation_report': validation_report,
+        'original_shape': report['original_shape'],
+        'cleaned_shape': report['cleaned_shape'],
+        'cleaned_file': cleaned_file_path,
+        'profile_file': profile_file,
+        'chart_timings': chart_timings,
+        'stage_report': pipeline.report
+    }
+
+def process_station(country, file_path, output_dir, options=None, buffer_output=False):
+    """Run process_dataset for one station, capturing any failure.
+
+    Used as the worker entry point so one broken station file does not
+    abort the others. With ``buffer_output`` the station's printed output
+    is returned as ``result['log']`` instead of written to stdout, so
+    parallel stations do not interleave their lines.
+    """
+    start = time.perf_counter()
+    buffer = io.StringIO() if buffer_output else sys.stdout
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        with station_context(country), redirect_stdout(buffer):
+            result = process_dataset(country, file_path, output_dir, **(options or {}))
+        result['status'] = 'ok'
+    except Exception as e:
+        result = {'status': 'failed', 'error': f"{type(e).__name__}: {e}",
+                  'traceback': traceback.format_exc()}
+    result['country'] = country
+    result['seconds'] = time.perf_counter() - start
+    if buffer_output:
+        result['log'] = buffer.getvalue()
+    return result
+
+def print_station_log(country, log):
+    """Print a station's buffered output in one block, each line prefixed by the station."""
+    lines = [f'[{country}] {line}' for line in log.splitlines()]
+    if lines:
+        print('\n'.join(lines), flush=True)
+
+def run_stations(datasets, output_base_dir, workers=None, **options):
+    """Process many stations in parallel and return their results by country.
+
+    Each station runs in its own worker process; ``workers`` defaults to
+    the CPU count (capped at the number of stations) and ``workers=1``
+    runs everything in-process. Output of parallel stations is printed per
+    station as each one finishes. Remaining keyword arguments are passed
+    to process_dataset.
+    """
+    jobs = [(country, file_path, os.path.join(output_base_dir, country))
+            for country, file_path in datasets.items()]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
     
-    # Save cleaned data
-    cleaned_file_path = os.path.join(output_dir, f'{country}_cleaned_data.csv')
-    df_cleaned.to_csv(cleaned_file_path, index=False)
+    results = {}
+    if workers == 1:
+        for country, file_path, output_dir in jobs:
+            results[country] = process_station(country, file_path, output_dir, options)
+        return results
     
-    print(f"\nResults for {country}:")
-    print(f"Original data shape: {df.shape}")
-    print(f"Cleaned data shape: {df_cleaned.shape}")
-    print(f"Cleaned data saved to: {cleaned_file_path}")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_station, country, file_path, output_dir, options,
+                                   buffer_output=True): country
+                   for country, file_path, output_dir in jobs}
+        for future in as_completed(futures):
+            country = futures[future]
+            try:
+                results[country] = future.result()
+                print_station_log(country, results[country].pop('log', ''))
+            except Exception as e:
+                # The worker process itself died (e.g. out of memory)
+                results[country] = {'country': country, 'status': 'failed',
+                                    'error': f"{type(e).__name__}: {e}"}
+    return {country: results[country] for country in datasets if country in results}
 
-def main():
-    datasets = {
-        'Benin': './data/benin-malanville.csv',
-        'Sierra Leone': './data/sierraleone-bumbuna.csv',
-        'Togo': './data/togo-dapaong_qc.csv'
-    }
+def summarize_results(results):
+    """Combine per-station results into one summary table."""
+    rows = []
+    for country, result in results.items():
+        report = result.get('validation_report') or {}
+        rows.append({
+            'country': country,
+            'status': result['status'],
+            'mode': result.get('mode'),
+            'stage_hits': len(result['stage_report']['hits']) if 'stage_report' in result else None,
+            'seconds': result.get('seconds'),
+            'original_rows': (result.get('original_shape') or (None,))[0],
+            'valid_rows': report.get('valid_rows'),
+            'cleaned_rows': (result.get('cleaned_shape') or (None,))[0],
+            'out_of_range': sum(v['out_of_range_count']
+                                for v in report.get('range_validations', {}).values()) if report else None,
+            'error': result.get('error')
+        })
+    return pd.DataFrame(rows)
 
+def parse_args(argv=None):
+    """Parse command line options for the pipeline."""
+    parser = argparse.ArgumentParser(description='Process solar station datasets.')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Stream raw files in chunks of this many rows')
+    parser.add_argument('--outlier-mode', choices=OUTLIER_MODES, default='sequential',
+                        help='Outlier statistics: sequential per column (exact) or joint (one pass)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of stations processed in parallel (default: CPU count)')
+    parser.add_argument('--chart-workers', type=int, default=None,
+                        help='Number of figures rendered concurrently per station '
+                             '(default: 1, serial rendering measured fastest)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Process only rows appended since the last incremental run')
+    parser.add_argument('--no-stage-cache', dest='stage_cache', action='store_false',
+                        help='Recompute every stage instead of reusing cached artifacts')
+    parser.add_argument('--no-charts', dest='charts', action='store_false',
+                        help='Only validate, clean and save (skip analysis charts)')
+    parser.add_argument('--metrics-file', default=None,
+                        help='Append per-stage timing records to this JSON lines file')
+    parser.add_argument('--profile-dir', default=None,
+                        help='Write a cProfile dump per instrumented stage to this directory')
+    parser.add_argument('--profile-stages', nargs='+', default=None,
+                        help='Only profile these stages (e.g. data_cleaner.clean_data)')
+    parser.add_argument('--store', default=None,
+                        help='Also write cleaned stations to this memory-mapped station store')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Set before the worker pool starts so every station process inherits it
+    configure(args.metrics_file, args.profile_dir, args.profile_stages)
+    if args.store:
+        os.environ[STORE_ENV] = os.path.abspath(args.store)
     output_base_dir = './outputs'
     os.makedirs(output_base_dir, exist_ok=True)
 
-    for country, file_path in datasets.items():
-        country_output_dir = os.path.join(output_base_dir, country)
-        os.makedirs(country_output_dir, exist_ok=True)
-        process_dataset(country, file_path, country_output_dir)
+    results = run_stations(DATASETS, output_base_dir, workers=args.workers,
+                           chunksize=args.chunksize, outlier_mode=args.outlier_mode,
+                           chart_workers=args.chart_workers, incremental=args.incremental,
+                           stage_cache=args.stage_cache, charts=args.charts)
+    
+    print("\nStation Summary:")
+    print(summarize_results(results).to_string(index=False))
+    failed = [country for country, result in results.items() if result['status'] != 'ok']
+    for country in failed:
+        print(f"\n{country} failed: {results[country]['error']}")
+    # Non-zero exit status so schedulers and CI notice failed stations
+    return 1 if failed else 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
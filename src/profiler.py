@@ -0,0 +1,211 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DEFAULT_CHUNKSIZE, iter_chunks
+from quantile_sketch import KLLSketch, DEFAULT_ERROR
+from rules import column_values
+from streaming_stats import MomentAccumulator
+
+PROFILE_QUANTILES = (0.25, 0.5, 0.75)
+Z_THRESHOLD = 3
+# Extreme values kept per side and column so |z| counts stay exact
+TAIL_SIZE = 10_000
+
+def _keep_smallest(values, size):
+    if len(values) <= size:
+        return values
+    return np.partition(values, size - 1)[:size]
+
+class ColumnProfile:
+    """Mergeable quality statistics for one numeric column.
+
+    Tracks missing and negative counts, Welford moments and a KLL sketch
+    for quantiles. The ``tail_size`` smallest and largest values are also
+    kept, so the number of values beyond ``z`` standard deviations can be
+    counted exactly once the final mean and std are known, as long as
+    those thresholds fall inside the retained tails; otherwise the count
+    is estimated from the sketch and reported as inexact.
+    """
+
+    def __init__(self, error=DEFAULT_ERROR, tail_size=TAIL_SIZE):
+        self.tail_size = tail_size
+        self.missing = 0
+        self.negative = 0
+        self.moments = MomentAccumulator()
+        self.sketch = KLLSketch(error)
+        self.low = np.empty(0)
+        self.high = np.empty(0)
+
+    def update(self, values):
+        """Fold an array of values (NaN counted as missing) into the profile."""
+        values = np.asarray(values, dtype='float64').ravel()
+        present = values[~np.isnan(values)]
+        self.missing += len(values) - len(present)
+        self.negative += int(np.count_nonzero(present < 0))
+        self.moments.update(present)
+        self.sketch.update(present)
+        self._fold_tails(present, present)
+        return self
+
+    def _fold_tails(self, low, high):
+        # Once a tail is full only values beyond its current bound can enter
+        if len(self.low) == self.tail_size:
+            low = low[low < self.low.max()]
+        if len(self.high) == self.tail_size:
+            high = high[high > self.high.min()]
+        self.low = _keep_smallest(np.concatenate([self.low, low]), self.tail_size)
+        self.high = -_keep_smallest(-np.concatenate([self.high, high]), self.tail_size)
+
+    def merge(self, other):
+        """Merge a profile of the same column built over other rows."""
+        self.missing += other.missing
+        self.negative += other.negative
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        self._fold_tails(other.low, other.high)
+        return self
+
+    def _beyond(self, threshold, upper):
+        """(count, exact) of values above (or below) ``threshold``."""
+        count = self.moments.count
+        tail = self.high if upper else self.low
+        complete = len(tail) == count
+        if upper:
+            beyond = int(np.count_nonzero(tail > threshold))
+            exact = complete or (len(tail) > 0 and threshold >= tail.min())
+            estimate = count * (1 - self.sketch.rank(threshold))
+        else:
+            beyond = int(np.count_nonzero(tail < threshold))
+            exact = complete or (len(tail) > 0 and threshold <= tail.max())
+            # rank counts values <= threshold; the tie at the threshold is negligible
+            estimate = count * self.sketch.rank(threshold)
+        return (beyond, True) if exact else (int(round(estimate)), False)
+
+    def result(self, quantiles=PROFILE_QUANTILES, z_threshold=Z_THRESHOLD):
+        """Statistics as a flat dict (NaN where no values were seen).
+
+        ``std`` is the sample standard deviation (like ``describe``); z
+        scores use the population std, as ``scipy.stats.zscore`` does.
+        """
+        count = self.moments.count
+        stats = {
+            'count': count,
+            'missing': self.missing,
+            'negative': self.negative,
+            'mean': self.moments.mean if count else np.nan,
+            'std': self.moments.std(),
+            'min': self.sketch.min,
+            'max': self.sketch.max,
+        }
+        values = self.sketch.quantile(list(quantiles)) if count else [np.nan] * len(quantiles)
+        for q, value in zip(quantiles, values):
+            stats[f'{q:.0%}'] = float(value)
+        z_std = self.moments.std(ddof=0)
+        if count and z_std > 0:
+            high, high_exact = self._beyond(stats['mean'] + z_threshold * z_std, upper=True)
+            low, low_exact = self._beyond(stats['mean'] - z_threshold * z_std, upper=False)
+            stats['z_outliers'] = high + low
+            stats['z_outliers_exact'] = bool(high_exact and low_exact)
+        else:
+            stats['z_outliers'] = 0
+            stats['z_outliers_exact'] = True
+        return stats
+
+class DataProfile:
+    """Single-pass, mergeable data-quality profile of a station dataset.
+
+    Every column gets a missing count and the dataset a count of complete
+    rows (no missing value in any column); numeric columns get a
+    ColumnProfile. Build it with ``update`` per chunk and combine
+    profiles of different chunks with ``merge``.
+    """
+
+    def __init__(self, error=DEFAULT_ERROR, tail_size=TAIL_SIZE):
+        self.error = error
+        self.tail_size = tail_size
+        self.rows = 0
+        self.complete_rows = 0
+        self.missing = {}
+        self.columns = {}
+
+    def update(self, df):
+        """Fold one frame (or chunk) into the profile."""
+        missing = df.isna()
+        self.rows += len(df)
+        self.complete_rows += int(len(df) - missing.any(axis=1).sum())
+        for column, count in missing.sum().items():
+            self.missing[column] = self.missing.get(column, 0) + int(count)
+        for column in df.select_dtypes(include=[np.number]).columns:
+            if column not in self.columns:
+                self.columns[column] = ColumnProfile(self.error, self.tail_size)
+            self.columns[column].update(column_values(df, column))
+        return self
+
+    def merge(self, other):
+        """Merge a profile built over other rows of the same dataset."""
+        self.rows += other.rows
+        self.complete_rows += other.complete_rows
+        for column, count in other.missing.items():
+            self.missing[column] = self.missing.get(column, 0) + count
+        for column, profile in other.columns.items():
+            if column in self.columns:
+                self.columns[column].merge(profile)
+            else:
+                self.columns[column] = profile
+        return self
+
+    def result(self, quantiles=PROFILE_QUANTILES, z_threshold=Z_THRESHOLD):
+        """The profile as a JSON-serializable dict."""
+        return {
+            'rows': self.rows,
+            'complete_rows': self.complete_rows,
+            'missing': dict(self.missing),
+            'columns': {column: profile.result(quantiles, z_threshold)
+                        for column, profile in self.columns.items()},
+            'z_threshold': z_threshold,
+            'quantile_error': self.error,
+        }
+
+def profile_frame(df, error=DEFAULT_ERROR):
+    """DataProfile of an in-memory frame."""
+    return DataProfile(error).update(df)
+
+def profile_chunks(chunks, error=DEFAULT_ERROR):
+    """DataProfile accumulated over an iterable of chunks."""
+    profile = DataProfile(error)
+    for chunk in chunks:
+        profile.update(chunk)
+    return profile
+
+def profile_file(file_path, chunksize=DEFAULT_CHUNKSIZE, error=DEFAULT_ERROR):
+    """DataProfile of a station CSV, streamed in typed chunks."""
+    return profile_chunks(iter_chunks(file_path, chunksize=chunksize), error)
+
+def profile_table(result):
+    """Per-column statistics of a profile result as a DataFrame (one row per column)."""
+    return pd.DataFrame.from_dict(result['columns'], orient='index')
+
+def profile_path(output_dir, country):
+    return os.path.join(output_dir, f'{country}_profile.json')
+
+def save_profile(result, path):
+    """Write a profile result as JSON (NaN becomes null)."""
+    def clean(value):
+        if isinstance(value, dict):
+            return {key: clean(item) for key, item in value.items()}
+        if isinstance(value, float) and np.isnan(value):
+            return None
+        return value.item() if isinstance(value, np.generic) else value
+
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        json.dump(clean(result), f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+def load_profile(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,128 @@
+import math
+
+import numpy as np
+
+from rules import column_values
+
+DEFAULT_ERROR = 0.005
+_CAPACITY_DECAY = 2 / 3
+
+def k_for_error(error):
+    """Return the KLL ``k`` whose normalized rank error is about ``error``."""
+    # Empirical KLL error curve (as used by Apache DataSketches)
+    return max(8, int(math.ceil((2.296 / error) ** (1 / 0.9723))))
+
+def error_for_k(k):
+    """Return the approximate normalized rank error of a KLL sketch."""
+    return 2.296 / k ** 0.9723
+
+class KLLSketch:
+    """Mergeable KLL quantile sketch over float values.
+
+    Values are held in a stack of compactors; when a level exceeds its
+    capacity it is sorted and every other item (random offset) is promoted
+    to the next level with double weight. Memory stays O(k log(n/k))
+    while rank queries stay within about ``error`` of the exact rank.
+    """
+
+    def __init__(self, error=DEFAULT_ERROR, seed=0):
+        self.k = k_for_error(error)
+        self.error = error_for_k(self.k)
+        self.count = 0
+        self.min = np.nan
+        self.max = np.nan
+        self._levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self._levels) - level - 1
+        return max(2, int(math.ceil(self.k * _CAPACITY_DECAY ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self._levels):
+                self._levels.append(np.empty(0))
+            items = np.sort(items)
+            if len(items) % 2:
+                # Keep one item back so an even number is compacted
+                keep, items = items[-1:], items[:-1]
+            else:
+                keep = items[:0]
+            promoted = items[self._rng.integers(2)::2]
+            self._levels[level] = keep
+            self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            # Adding a level shrinks lower capacities, so rescan from the bottom
+            level = 0
+
+    def update(self, values):
+        """Add an array of values to the sketch, ignoring NaN."""
+        values = np.asarray(values, dtype='float64').ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.count += len(values)
+        self.min = np.nanmin([self.min, values.min()])
+        self.max = np.nanmax([self.max, values.max()])
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Merge another sketch into this one."""
+        if other.count == 0:
+            return self
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self.count += other.count
+        self.min = np.nanmin([self.min, other.min])
+        self.max = np.nanmax([self.max, other.max])
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(lvl), 2 ** h, dtype='int64')
+                                  for h, lvl in enumerate(self._levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """Return the approximate ``q`` quantile (scalar or array of q)."""
+        if self.count == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        items, cumulative = self._weighted_items()
+        q = np.asarray(q, dtype='float64')
+        target = q * cumulative[-1]
+        idx = np.clip(np.searchsorted(cumulative, target, side='left'), 0, len(items) - 1)
+        result = np.where(q <= 0, self.min, np.where(q >= 1, self.max, items[idx]))
+        return result.item() if result.ndim == 0 else result
+
+    def rank(self, value):
+        """Return the approximate fraction of values <= ``value``."""
+        if self.count == 0:
+            return np.nan
+        items, cumulative = self._weighted_items()
+        idx = np.searchsorted(items, value, side='right')
+        below = np.where(idx > 0, cumulative[np.maximum(idx - 1, 0)], 0)
+        result = below / cumulative[-1]
+        return result.item() if np.ndim(result) == 0 else result
+
+    @property
+    def retained(self):
+        """Number of items currently stored."""
+        return sum(len(items) for items in self._levels)
+
+def column_sketches(chunks, columns, error=DEFAULT_ERROR):
+    """Build one KLL sketch per column in a single pass over ``chunks``."""
+    sketches = {col: KLLSketch(error) for col in columns}
+    for chunk in chunks:
+        for col in columns:
+            sketches[col].update(column_values(chunk, col))
+    return sketches
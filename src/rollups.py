@@ -0,0 +1,219 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import columnar_cache
+from rules import column_values
+
+ROLLUP_COLUMNS = ['GHI', 'DNI', 'DHI', 'Tamb', 'RH', 'WS', 'WSgust', 'ModA', 'ModB']
+# Derived series whose statistics answer the country summary: a high-GHI
+# indicator (its mean is the share of readings above 500 W/m2).
+DERIVED_COLUMNS = {
+    'GHI>500': (('GHI',), lambda v: np.where(np.isnan(v['GHI']), np.nan, (v['GHI'] > 500) * 1.0)),
+}
+# Column pairs whose co-moment is kept for the correlation, as '<x>*<y>:comoment'
+CO_MOMENT_PAIRS = [('GHI', 'Tamb')]
+GRAINS = {'hourly': 'h', 'daily': 'D'}
+ADDITIVE_STATS = ['count', 'sum']
+ROLLUP_STATS = ADDITIVE_STATS + ['m2', 'min', 'max', 'comoment']
+
+def _stat_column(column, stat):
+    return f'{column}:{stat}'
+
+def _pair_column(x, y):
+    return _stat_column(f'{x}*{y}', 'comoment')
+
+def _pool(count, sum_x, sum_y, moment, key=None):
+    """Pool per-period second moments with Chan's formula.
+
+    ``moment`` holds each period's sum of squared deviations (or of
+    cross deviations for a pair) around its own means, taken from
+    ``sum_x / count`` and ``sum_y / count``. The pooled moment adds
+    ``n_i * (mean_x_i - mean_x) * (mean_y_i - mean_y)`` for the spread
+    between periods, so no large sums of squares are ever subtracted and
+    precision holds for values with a small spread around a large level
+    (e.g. BP). Periods are pooled per ``key`` (all together when None).
+    """
+    grouped = count.groupby(key, sort=True) if key is not None else None
+    if grouped is None:
+        n = count.sum()
+        mean_x = sum_x.sum() / n if n else np.nan
+        mean_y = sum_y.sum() / n if n else np.nan
+    else:
+        n = grouped.transform('sum')
+        mean_x = sum_x.groupby(key, sort=True).transform('sum') / n
+        mean_y = sum_y.groupby(key, sort=True).transform('sum') / n
+    periods = count.where(count > 0)
+    spread = (count * (sum_x / periods - mean_x) * (sum_y / periods - mean_y)).fillna(0)
+    pooled = moment.fillna(0) + spread
+    return pooled.sum() if key is None else pooled.groupby(key, sort=True).sum()
+
+def build_rollup(df, freq='h', columns=ROLLUP_COLUMNS):
+    """Aggregate ``df`` into mergeable per-period statistics.
+
+    Returns a frame indexed by period start with, for each column,
+    ``<column>:count``, ``:sum``, ``:m2`` (sum of squared deviations from
+    the period mean), ``:min`` and ``:max``, plus ``<x>*<y>:comoment``
+    for the CO_MOMENT_PAIRS.
+    """
+    columns = [col for col in columns if col in df.columns]
+    values = {col: column_values(df, col) for col in columns}
+    for name, (required, derive) in DERIVED_COLUMNS.items():
+        if all(col in values for col in required):
+            values[name] = derive(values)
+    frame = pd.DataFrame(values, index=df.index)
+    key = pd.DatetimeIndex(df['Timestamp']).floor(freq)
+    grouped = frame.groupby(key, sort=True)
+    deviations = frame - grouped.transform('mean')
+    parts = {
+        'count': grouped.count(),
+        'sum': grouped.sum(),
+        'm2': deviations.pow(2).groupby(key, sort=True).sum(),
+        'min': grouped.min(),
+        'max': grouped.max(),
+    }
+    rollup = {_stat_column(col, stat): parts[stat][col] for col in frame.columns for stat in parts}
+    for x, y in CO_MOMENT_PAIRS:
+        if x in frame.columns and y in frame.columns:
+            # Rows missing either value add NaN, which the sum skips
+            rollup[_pair_column(x, y)] = (deviations[x] * deviations[y]).groupby(key, sort=True).sum()
+    rollup = pd.DataFrame(rollup)
+    rollup.index.name = 'period'
+    return rollup
+
+def merge_rollups(*rollups):
+    """Merge rollups of the same grain, combining overlapping periods."""
+    combined = pd.concat(rollups)
+    if not combined.index.has_duplicates:
+        return combined.sort_index()
+    key = combined.index
+    grouped = combined.groupby(level=0, sort=True)
+    merged = {}
+    for name in combined.columns:
+        column, stat = name.rsplit(':', 1)
+        if stat in ADDITIVE_STATS:
+            merged[name] = grouped[name].sum()
+        elif stat == 'min':
+            merged[name] = grouped[name].min()
+        elif stat == 'max':
+            merged[name] = grouped[name].max()
+        elif stat == 'm2':
+            count, total = combined[_stat_column(column, 'count')], combined[_stat_column(column, 'sum')]
+            merged[name] = _pool(count, total, total, combined[name], key)
+        else:
+            x, y = column.split('*')
+            merged[name] = _pool(combined[_stat_column(x, 'count')], combined[_stat_column(x, 'sum')],
+                                 combined[_stat_column(y, 'sum')], combined[name], key)
+    merged = pd.DataFrame(merged)
+    merged.index.name = combined.index.name
+    return merged
+
+def select_range(rollup, start=None, end=None):
+    """Slice a rollup to periods starting in [start, end).
+
+    The index is sorted, so this is a binary search, not a row scan.
+    """
+    index = rollup.index
+    lo = 0 if start is None else index.searchsorted(pd.Timestamp(start), side='left')
+    hi = len(index) if end is None else index.searchsorted(pd.Timestamp(end), side='left')
+    return rollup.iloc[lo:hi]
+
+def _pooled_m2(rollup, col):
+    count, total = rollup[_stat_column(col, 'count')], rollup[_stat_column(col, 'sum')]
+    return _pool(count, total, total, rollup[_stat_column(col, 'm2')])
+
+def combine(rollup, columns=None):
+    """Collapse rollup rows into count/mean/std/min/max per column."""
+    if columns is None:
+        columns = sorted(name.rsplit(':', 1)[0] for name in rollup.columns
+                         if name.endswith(':count'))
+    result = {}
+    for col in columns:
+        count = rollup[_stat_column(col, 'count')].sum()
+        total = rollup[_stat_column(col, 'sum')].sum()
+        mean = total / count if count else np.nan
+        variance = _pooled_m2(rollup, col) / (count - 1) if count > 1 else np.nan
+        result[col] = {
+            'count': int(count),
+            'sum': total,
+            'mean': mean,
+            'std': np.sqrt(variance),
+            'min': rollup[_stat_column(col, 'min')].min(),
+            'max': rollup[_stat_column(col, 'max')].max(),
+        }
+    return result
+
+def correlation(rollup, x='GHI', y='Tamb'):
+    """Pearson correlation of x and y from pooled rollup moments.
+
+    ``(x, y)`` must be one of the CO_MOMENT_PAIRS. Exact when both columns
+    are complete on the same rows, which holds for cleaned station data
+    (both are critical columns).
+    """
+    co_moment = _pool(rollup[_stat_column(x, 'count')], rollup[_stat_column(x, 'sum')],
+                      rollup[_stat_column(y, 'sum')], rollup[_pair_column(x, y)])
+    denominator = np.sqrt(_pooled_m2(rollup, x) * _pooled_m2(rollup, y))
+    return co_moment / denominator if denominator else np.nan
+
+def hourly_profile(hourly_rollup, column='GHI'):
+    """Mean of ``column`` per hour of day from an hourly rollup."""
+    hours = hourly_rollup.index.hour
+    sums = hourly_rollup[_stat_column(column, 'sum')].groupby(hours).sum()
+    counts = hourly_rollup[_stat_column(column, 'count')].groupby(hours).sum()
+    profile = (sums / counts.where(counts > 0)).rename(column)
+    profile.index.name = 'Hour'
+    return profile
+
+def rollup_path(csv_path, grain):
+    """Path of a rollup stored next to the cleaned CSV it summarizes."""
+    return f'{os.path.splitext(csv_path)[0]}_{grain}_rollup.parquet'
+
+def build_rollups(df):
+    """Build the rollup for every grain."""
+    return {grain: build_rollup(df, freq) for grain, freq in GRAINS.items()}
+
+def write_rollups(rollups, csv_path, fingerprint=None):
+    """Store rollups next to ``csv_path``, tagged with its current fingerprint.
+
+    Pass ``fingerprint`` when it is already known to skip hashing the CSV.
+    """
+    if fingerprint is None:
+        fingerprint = columnar_cache.source_fingerprint(csv_path)
+    for grain, rollup in rollups.items():
+        columnar_cache.write_derived(rollup, rollup_path(csv_path, grain), csv_path,
+                                     fingerprint, preserve_index=True)
+    return rollups
+
+def save_rollups(df, csv_path, fingerprint=None):
+    """Build hourly and daily rollups for ``df`` and store them next to ``csv_path``."""
+    return write_rollups(build_rollups(df), csv_path, fingerprint)
+
+def append_rollups(rollups, df, csv_path, fingerprint=None):
+    """Merge the rollups of newly appended rows ``df`` into ``rollups`` and store them.
+
+    Only the new rows are aggregated; a period spanning the old and new
+    rows is combined by merge_rollups.
+    """
+    merged = {grain: merge_rollups(rollups[grain], build_rollup(df, GRAINS[grain]))
+              for grain in GRAINS}
+    return write_rollups(merged, csv_path, fingerprint)
+
+def load_rollups(csv_path):
+    """Load stored rollups for ``csv_path``, or None if missing or stale.
+
+    Rollups stored with other statistics (an older layout) count as stale.
+    """
+    if columnar_cache.pq is None:
+        return None
+    rollups = {}
+    for grain in GRAINS:
+        path = rollup_path(csv_path, grain)
+        meta = columnar_cache.read_cache_metadata(path)
+        if meta is None or not os.path.exists(csv_path) or not columnar_cache.is_fresh(csv_path, meta):
+            return None
+        rollup = columnar_cache.pq.read_table(path).to_pandas()
+        if any(name.rsplit(':', 1)[-1] not in ROLLUP_STATS for name in rollup.columns):
+            return None
+        rollups[grain] = rollup
+    return rollups
@@ -0,0 +1,77 @@
+from collections import namedtuple
+
+import numpy as np
+
+# A range rule: ``column`` must lie within [min_val, max_val]. Rows that
+# pass may still be clamped up to ``clamp_min`` during cleaning (negative
+# night-time GHI). ``requires`` lists columns that must all be present
+# for the rule to apply.
+Rule = namedtuple('Rule', ['column', 'min_val', 'max_val', 'clamp_min', 'requires'],
+                  defaults=(None, ()))
+
+# Single source of truth for the validator and the cleaner.
+RANGE_RULES = [
+    Rule('GHI', -10, 1500, clamp_min=0),  # Allow slight negative for sensor error
+    Rule('DNI', 0, 1500),
+    Rule('DHI', 0, 1500),
+    Rule('Tamb', -20, 60),                # Temperature range
+    Rule('RH', 0, 100),                   # Relative humidity range
+    Rule('WS', 0, 50),                    # Wind speed range
+    Rule('WD', 0, 360),                   # Wind direction range
+    Rule('ModA', -20, 90, requires=('ModA', 'ModB')),  # Module temperature range
+    Rule('ModB', -20, 90, requires=('ModA', 'ModB')),
+]
+
+# Consistency checks count rows matching a condition over column arrays.
+CONSISTENCY_CHECKS = {
+    'GHI_vs_components': (('GHI', 'DNI', 'DHI'), lambda v: v['GHI'] >= v['DNI'] + v['DHI']),
+    'temp_vs_humidity': (('Tamb', 'RH'), lambda v: (v['Tamb'] > 40) & (v['RH'] > 90)),
+    'wind_direction': (('WD',), lambda v: (v['WD'] < 0) | (v['WD'] > 360)),
+}
+
+RuleEvaluation = namedtuple('RuleEvaluation', ['total_rows', 'violations', 'consistency', 'mask', 'values'])
+
+def column_values(df, column):
+    """Return a column as a float64 NumPy array with NaN for missing."""
+    return df[column].to_numpy(dtype='float64', na_value=np.nan)
+
+def applicable_rules(columns, rules=RANGE_RULES):
+    """Return the rules whose columns are present in ``columns``."""
+    columns = set(columns)
+    return [rule for rule in rules
+            if rule.column in columns and all(req in columns for req in rule.requires)]
+
+def evaluate_rules(df, rules=RANGE_RULES, checks=CONSISTENCY_CHECKS):
+    """Evaluate the rule table over ``df`` in one vectorized pass.
+
+    Every column is converted to a NumPy array once and each rule is
+    tested once; the result carries both the per-rule violation counts
+    used by the validation report and the keep-mask used by the cleaner.
+    Missing values count as violations, so the mask also drops rows with
+    NaN in any ruled column. ``values`` holds the column arrays with
+    clamps applied, ready for the cleaner to reuse.
+    """
+    n_rows = len(df)
+    values = {}
+    violations = {}
+    mask = np.ones(n_rows, dtype=bool)
+    for rule in applicable_rules(df.columns, rules):
+        data = column_values(df, rule.column)
+        in_range = (data >= rule.min_val) & (data <= rule.max_val)
+        violations[rule.column] = int(n_rows - np.count_nonzero(in_range))
+        mask &= in_range
+        values[rule.column] = data
+
+    consistency = {}
+    for name, (columns, condition) in checks.items():
+        if all(column in df.columns for column in columns):
+            arrays = {column: values[column] if column in values else column_values(df, column)
+                      for column in columns}
+            consistency[name] = int(np.count_nonzero(condition(arrays)))
+
+    # Clamps only affect the values handed to the cleaner
+    for rule in applicable_rules(df.columns, rules):
+        if rule.clamp_min is not None:
+            values[rule.column] = np.maximum(values[rule.column], rule.clamp_min)
+
+    return RuleEvaluation(n_rows, violations, consistency, mask, values)
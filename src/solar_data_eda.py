@@ -1,21 +1,28 @@
-from scipy.stats import zscore
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 import numpy as np
-
-def load_data(file_path):
-    return pd.read_csv(file_path, parse_dates=['Timestamp'])
-
+from data_loader import load_data
+from data_cleaner import remove_iqr_outliers
+from correlation_engine import correlation_matrix as compute_correlations
+from density import histogram_density
+from visualization import draw_histogram
+from instrumentation import instrumented
+from profiler import profile_frame, profile_table, save_profile, profile_path
+
+@instrumented()
 def summary_statistics(df):
     return df.describe()
 
-def data_quality_check(df):
-    missing_values = df.isnull().sum()
-    negative_values = df.select_dtypes(include=[np.number]).lt(0).sum()
+def data_quality_check(df, profile=None):
+    # Counts come from the single-pass profile (built here if not given)
+    result = (profile or profile_frame(df)).result()
+    missing_values = pd.Series(result['missing'])
+    negative_values = profile_table(result)['negative']
     return missing_values, negative_values
 
+@instrumented()
 def time_series_analysis(df, column, title, output_dir):
     plt.figure(figsize=(15, 5))
     plt.plot(df['Timestamp'], df[column])
@@ -31,8 +38,9 @@ def cleaning_impact_analysis(df):
     cleaning_impact = df.groupby('Cleaning')[['ModA', 'ModB']].mean()
     return cleaning_impact
 
+@instrumented()
 def correlation_analysis(df, columns, output_dir):
-    correlation_matrix = df[columns].corr()
+    correlation_matrix = compute_correlations(df, columns)
     plt.figure(figsize=(12, 10))
     sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm')
     plt.title('Correlation Matrix')
@@ -41,6 +49,7 @@ def correlation_analysis(df, columns, output_dir):
     plt.close()
     return correlation_matrix
 
+@instrumented()
 def wind_analysis(df, output_dir):
     # Create a polar plot for wind analysis
     plt.figure(figsize=(10, 10))
@@ -59,6 +68,7 @@ def wind_analysis(df, output_dir):
     plt.savefig(f'{output_dir}/wind_rose.png')
     plt.close()
 
+@instrumented()
 def temperature_humidity_analysis(df, output_dir):
     plt.figure(figsize=(10, 6))
     sns.scatterplot(x='Tamb', y='RH', data=df, hue='GHI', palette='viridis')
@@ -69,10 +79,11 @@ def temperature_humidity_analysis(df, output_dir):
     plt.savefig(f'{output_dir}/temp_humidity_ghi.png')
     plt.close()
 
+@instrumented()
 def create_histograms(df, columns, output_dir):
     for column in columns:
         plt.figure(figsize=(10, 5))
-        sns.histplot(df[column], kde=True)
+        draw_histogram(plt.gca(), histogram_density(df[column].to_numpy(dtype='float64', na_value=np.nan)))
         plt.title(f'Distribution of {column}')
         plt.xlabel(column)
         plt.ylabel('Frequency')
@@ -80,11 +91,11 @@ def create_histograms(df, columns, output_dir):
         plt.savefig(f'{output_dir}/{column}_histogram.png')
         plt.close()
 
-def z_score_analysis(df, column):
-    z_scores = zscore(df[column])
-    outliers = np.abs(z_scores) > 3
-    return outliers.sum()
+def z_score_analysis(df, column, profile=None):
+    # Values with |z| > 3, counted from the profile without a z-score array
+    return (profile or profile_frame(df[[column]])).result()['columns'][column]['z_outliers']
 
+@instrumented()
 def bubble_chart(df, output_dir):
     plt.figure(figsize=(12, 8))
     scatter = plt.scatter(df['Tamb'], df['GHI'], s=df['RH'], c=df['WS'], cmap='viridis', alpha=0.6)
@@ -96,16 +107,15 @@ def bubble_chart(df, output_dir):
     plt.savefig(f'{output_dir}/bubble_chart.png')
     plt.close()
 
-def clean_data(df):
+@instrumented()
+def clean_data(df, sketch_error=0.005):
     # Remove rows with missing values
     df_cleaned = df.dropna()
     
-    # Remove outliers using IQR method
-    Q1 = df_cleaned.quantile(0.25)
-    Q3 = df_cleaned.quantile(0.75)
-    IQR = Q3 - Q1
+    # Remove outliers using IQR method on the numeric columns; quartiles come
+    # from streaming quantile sketches (sketch_error=None for exact quartiles)
     IQR_THRESHOLD = 3  # Use a higher value to be less strict
-    df_cleaned = df_cleaned[~((df_cleaned < (Q1 - IQR_THRESHOLD * IQR)) | (df_cleaned > (Q3 + IQR_THRESHOLD * IQR))).any(axis=1)]
+    df_cleaned = remove_iqr_outliers(df_cleaned, threshold=IQR_THRESHOLD, error=sketch_error)
     
     return df_cleaned
 
@@ -126,10 +136,13 @@ def main():
         output_dir = os.path.join(output_base_dir, country)
         os.makedirs(output_dir, exist_ok=True)
         
+        # One pass yields the summary, quality counts and z-score outliers
+        profile = profile_frame(df)
         print("Summary Statistics:")
-        print(summary_statistics(df))
+        print(profile_table(profile.result()))
+        save_profile(profile.result(), profile_path(output_dir, country))
         
-        missing_values, negative_values = data_quality_check(df)
+        missing_values, negative_values = data_quality_check(df, profile)
         print("\nMissing Values:")
         print(missing_values)
         print("\nNegative Values:")
@@ -149,7 +162,7 @@ def main():
         
         create_histograms(df, ['GHI', 'DNI', 'DHI', 'WS', 'Tamb'], output_dir)
         for column in ['GHI', 'DNI', 'DHI', 'WS', 'Tamb']:
-            outliers = z_score_analysis(df, column)
+            outliers = z_score_analysis(df, column, profile)
             print(f"\nNumber of outliers in {column}: {outliers}")
         
         bubble_chart(df, output_dir)
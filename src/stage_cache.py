@@ -0,0 +1,294 @@
+import ast
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import pickle
+import re
+import sys
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import columnar_cache
+from instrumentation import in_context
+
+# A pipeline stage. ``func`` is called with the values of the ``inputs``
+# stages (in order) followed by ``params`` as keyword arguments. ``code``
+# lists extra callables whose code is part of the stage version (e.g.
+# a figure builder passed as a parameter); see code_version for what is
+# hashed. ``outputs`` are files the
+# stage writes, which must still exist for a cached result to count.
+# ``persist=False`` stages are recomputed when needed and never stored.
+Stage = namedtuple('Stage', ['name', 'func', 'inputs', 'params', 'code', 'outputs', 'persist', 'version'],
+                   defaults=((), {}, (), (), True, None))
+
+SOURCE_PREFIX = 'source:'
+
+def _module_file(name, directory):
+    """Source file of module ``name`` if it lives in ``directory``, else None."""
+    module = sys.modules.get(name)
+    path = getattr(module, '__file__', None)
+    if path is None:
+        try:
+            spec = importlib.util.find_spec(name)
+        except (ImportError, ValueError):
+            return None
+        path = spec.origin if spec is not None else None
+    if not path or not path.endswith('.py'):
+        return None
+    path = os.path.abspath(path)
+    return path if os.path.dirname(path) == directory else None
+
+_import_memo = {}
+
+def _imports(source):
+    """Map each name imported anywhere in ``source`` to the module names it comes from."""
+    digest = hashlib.sha256(source).hexdigest()
+    if digest not in _import_memo:
+        imports = {}
+        for node in ast.walk(ast.parse(source)):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    imports.setdefault((alias.asname or alias.name).split('.')[0], set()).add(alias.name)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                for alias in node.names:
+                    imports.setdefault(alias.asname or alias.name, set()).add(node.module)
+        _import_memo[digest] = imports
+    return _import_memo[digest]
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _code_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+def _source(obj):
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        return getattr(obj, '__qualname__', repr(obj))
+
+def _constant_repr(value):
+    if isinstance(value, (set, frozenset)):
+        value = sorted(value, key=repr)
+    # Object addresses differ between runs
+    return re.sub(r' at 0x[0-9a-fA-F]+', '', repr(value))
+
+def _dependencies(func, parts, modules):
+    """Collect the code ``func`` relies on into ``parts`` and ``modules``.
+
+    ``parts`` maps each reached function, class or constant of the
+    function's own module to its source (or repr). Names imported from
+    modules in the same directory as that module add those modules, and
+    transitively the project modules they import, to ``modules``.
+    """
+    func = inspect.unwrap(func)
+    if func in parts:
+        return
+    parts[func] = _source(func)
+    if not hasattr(func, '__code__') or not func.__globals__.get('__file__'):
+        return
+    path = func.__globals__['__file__']
+    directory = os.path.dirname(os.path.abspath(path))
+    imports = _imports(_read(path))
+    for name in sorted(_code_names(func.__code__)):
+        for module in sorted(imports.get(name, ())):
+            _add_module(_module_file(module, directory), modules)
+        if name in imports or name not in func.__globals__:
+            continue
+        value = func.__globals__[name]
+        if inspect.isfunction(value) and value.__module__ == func.__module__:
+            _dependencies(value, parts, modules)
+        elif inspect.isclass(value) and value.__module__ == func.__module__:
+            parts.setdefault(value, _source(value))
+        elif not (inspect.ismodule(value) or callable(value)):
+            parts.setdefault((func.__module__, name), _constant_repr(value))
+
+def _add_module(path, modules):
+    if path is None or path in modules:
+        return
+    source = _read(path)
+    modules[path] = source
+    directory = os.path.dirname(path)
+    for names in _imports(source).values():
+        for module in sorted(names):
+            _add_module(_module_file(module, directory), modules)
+
+def code_version(*funcs, version=None):
+    """Hash the code ``funcs`` run plus an optional explicit version tag.
+
+    Besides the source of each function (and of the functions, classes
+    and constants of its own module it uses), the full source of every
+    project module it imports from, directly or through other project
+    modules, is hashed. Project modules are those in the directory of the
+    function's module, so editing a rule table, a helper or a plotting
+    module changes the version of every stage that can reach it.
+    """
+    digest = hashlib.sha256(str(version).encode())
+    parts, modules = {}, {}
+    for func in funcs:
+        _dependencies(func, parts, modules)
+    for text in parts.values():
+        digest.update(text.encode())
+    for path in sorted(modules):
+        digest.update(os.path.basename(path).encode())
+        digest.update(modules[path])
+    return digest.hexdigest()
+
+def _param_repr(value):
+    if callable(value):
+        return f'{getattr(value, "__module__", "")}.{getattr(value, "__qualname__", repr(value))}'
+    return repr(value)
+
+class ArtifactStore:
+    """Pickled stage artifacts addressed by stage name and key.
+
+    Source files are identified by content hash; the hash is remembered
+    per (size, mtime) so unchanged sources are not re-read on every run.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, name, key):
+        safe = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in name)
+        return os.path.join(self.root, f'{safe}-{key[:32]}.pkl')
+
+    def has(self, name, key):
+        return os.path.exists(self._path(name, key))
+
+    def load(self, name, key):
+        with open(self._path(name, key), 'rb') as f:
+            return pickle.load(f)
+
+    def save(self, name, key, value):
+        path = self._path(name, key)
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        # Older artifacts of the same stage are superseded
+        prefix = os.path.basename(path).rsplit('-', 1)[0] + '-'
+        for entry in os.listdir(self.root):
+            if entry.startswith(prefix) and entry.endswith('.pkl') and entry != os.path.basename(path):
+                os.remove(os.path.join(self.root, entry))
+
+    def source_key(self, file_path):
+        """Content hash of a source file, memoized by size and mtime."""
+        memo_path = os.path.join(self.root, 'sources.json')
+        try:
+            with open(memo_path) as f:
+                memo = json.load(f)
+        except (OSError, ValueError):
+            memo = {}
+        path = os.path.abspath(file_path)
+        current = columnar_cache.source_fingerprint(path, with_hash=False)
+        entry = memo.get(path)
+        if entry and entry['size'] == current['size'] and entry['mtime_ns'] == current['mtime_ns']:
+            return entry['sha256']
+        memo[path] = columnar_cache.source_fingerprint(path)
+        tmp_path = f'{memo_path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'w') as f:
+            json.dump(memo, f)
+        os.replace(tmp_path, memo_path)
+        return memo[path]['sha256']
+
+class Pipeline:
+    """Run a DAG of stages, reusing artifacts whose inputs are unchanged.
+
+    A stage's key hashes its name, code version, parameters and the keys
+    of its inputs, so keys are known before anything runs and a change
+    anywhere invalidates exactly the stages downstream of it. Inputs named
+    ``source:<path>`` refer to files, keyed by content. ``report`` lists
+    the persisted stages that were cache hits or misses. With ``store``
+    None every stage is computed and nothing is stored.
+    """
+
+    def __init__(self, stages, store):
+        self.stages = {stage.name: stage for stage in stages}
+        self.store = store
+        self.values = {}
+        self.report = {'hits': [], 'misses': []}
+        self._keys = {}
+
+    def key(self, name):
+        """Content address of a stage (or ``source:`` input)."""
+        if name not in self._keys:
+            if name.startswith(SOURCE_PREFIX):
+                path = name[len(SOURCE_PREFIX):]
+                self._keys[name] = (self.store.source_key(path) if self.store is not None
+                                    else columnar_cache.source_fingerprint(path)['sha256'])
+            else:
+                stage = self.stages[name]
+                digest = hashlib.sha256(name.encode())
+                digest.update(code_version(stage.func, *stage.code, version=stage.version).encode())
+                for param, value in sorted(stage.params.items()):
+                    digest.update(f'{param}={_param_repr(value)}'.encode())
+                for upstream in stage.inputs:
+                    digest.update(self.key(upstream).encode())
+                self._keys[name] = digest.hexdigest()
+        return self._keys[name]
+
+    def is_cached(self, name):
+        stage = self.stages[name]
+        return (stage.persist and self.store is not None and self.store.has(name, self.key(name))
+                and all(os.path.exists(path) for path in stage.outputs))
+
+    def _input_values(self, stage):
+        return [name[len(SOURCE_PREFIX):] if name.startswith(SOURCE_PREFIX) else self.get(name)
+                for name in stage.inputs]
+
+    def _finish(self, name, value):
+        stage = self.stages[name]
+        if stage.persist:
+            if self.store is not None:
+                self.store.save(name, self.key(name), value)
+            self.report['misses'].append(name)
+        self.values[name] = value
+        return value
+
+    def get(self, name):
+        """Value of a stage, loaded from the store or computed."""
+        if name in self.values:
+            return self.values[name]
+        if self.is_cached(name):
+            self.report['hits'].append(name)
+            self.values[name] = self.store.load(name, self.key(name))
+            return self.values[name]
+        stage = self.stages[name]
+        return self._finish(name, stage.func(*self._input_values(stage), **stage.params))
+
+    def run(self, names, workers=1):
+        """Resolve several independent stages, computing misses concurrently.
+
+        Shared inputs are resolved first, then the missing stages run on a
+        thread pool of ``workers``. Returns {name: value}.
+        """
+        missing = []
+        for name in names:
+            if name in self.values or self.is_cached(name):
+                self.get(name)
+            else:
+                missing.append(name)
+        calls = [(name, self._input_values(self.stages[name])) for name in missing]
+
+        def call(item):
+            name, inputs = item
+            stage = self.stages[name]
+            return stage.func(*inputs, **stage.params)
+
+        if workers <= 1 or len(calls) <= 1:
+            results = [call(item) for item in calls]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(in_context(call), calls))
+        for name, value in zip(missing, results):
+            self._finish(name, value)
+        return {name: self.values[name] for name in names}
@@ -0,0 +1,294 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import columnar_cache
+
+# Root directory of the shared store; set it (e.g. with main.py --store) to
+# make load_data read station files from the store.
+STORE_ENV = 'SOLAR_STATION_STORE'
+TIME_COLUMN = 'Timestamp'
+POINTER_FILE = 'current.json'
+STATION_COLUMN = 'Station'
+# Superseded versions are kept this long for readers still holding their metadata
+VERSION_GRACE_SECONDS = 300
+
+def _storable(series):
+    """Whether a column can be kept as a flat NumPy array."""
+    return isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufM'
+
+def _column_file(column):
+    return f'col-{column}.npy'
+
+class StationStore:
+    """Memory-mapped columnar store of station data for many processes.
+
+    Each station is a directory of ``.npy`` files, one per column, with
+    the Timestamp column as the time index shared by the others. Reads map the
+    files with ``np.load(mmap_mode='r')`` and slice them by binary search
+    on the time index, so only the pages of the requested columns and
+    rows are read, and processes reading the same station share those
+    pages through the OS page cache instead of each holding a parsed copy.
+
+    A write goes to a new version directory and is published by replacing
+    the station's pointer file, so readers never see a partial station.
+    A superseded version is deleted only VERSION_GRACE_SECONDS after it
+    was replaced, so readers that fetched its metadata just before can
+    still map it; a read that finds its version gone retries once with
+    the version now published. Frames already mapped from a deleted
+    version stay valid.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self._lock = threading.Lock()
+        self._arrays = {}
+
+    def _station_dir(self, station):
+        return os.path.join(self.root, station)
+
+    def meta(self, station):
+        """Metadata of the current version of ``station`` (None if not stored)."""
+        try:
+            with open(os.path.join(self._station_dir(station), POINTER_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def stations(self):
+        """Names of the stored stations."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(entry for entry in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, entry, POINTER_FILE)))
+
+    def columns(self, station):
+        """Stored value columns of ``station`` (without the time index)."""
+        return [column for column in self._require(station)['columns'] if column != TIME_COLUMN]
+
+    def time_range(self, station):
+        """(first, last) timestamp of ``station``."""
+        meta = self._require(station)
+        return pd.Timestamp(meta['start']), pd.Timestamp(meta['end'])
+
+    def _require(self, station):
+        meta = self.meta(station)
+        if meta is None:
+            raise KeyError(f"Station {station!r} is not in the store at {self.root}")
+        return meta
+
+    def write_station(self, station, df, source=None, fingerprint=None):
+        """Store ``df`` (with a Timestamp column) as ``station``.
+
+        Numeric, boolean and datetime columns are stored; all-null text
+        columns become float NaN columns (as read_csv types them) and other
+        columns are recorded as skipped. With ``source`` (the CSV the frame
+        was read from or written to) the source fingerprint is kept, so
+        load_source can tell whether the store still matches the file.
+        Pass ``fingerprint`` when it is already known to skip hashing the
+        source.
+        """
+        if TIME_COLUMN not in df.columns or not _storable(df[TIME_COLUMN]):
+            raise ValueError(f"Station frame needs a timezone-naive {TIME_COLUMN!r} column")
+        columns, skipped = [], []
+        for column in df.columns:
+            series = df[column]
+            if not _storable(series) and series.isna().all():
+                series = series.astype('float64')
+            if _storable(series):
+                columns.append((column, series.to_numpy()))
+            else:
+                skipped.append(column)
+        timestamps = df[TIME_COLUMN]
+        meta = {
+            'station': station,
+            'rows': len(df),
+            'columns': [column for column, _ in columns],
+            'dtypes': {column: values.dtype.str for column, values in columns},
+            'skipped': skipped,
+            'sorted': bool(timestamps.is_monotonic_increasing and not timestamps.hasnans),
+            'start': str(timestamps.min()) if len(df) else None,
+            'end': str(timestamps.max()) if len(df) else None,
+            'source': os.path.abspath(source) if source is not None else None,
+            'fingerprint': None,
+        }
+        if source is not None:
+            meta['fingerprint'] = fingerprint or columnar_cache.source_fingerprint(source)
+        station_dir = self._station_dir(station)
+        version = f'v{time.time_ns()}-{os.getpid()}-{threading.get_ident()}'
+        version_dir = os.path.join(station_dir, version)
+        os.makedirs(version_dir)
+        for column, values in columns:
+            np.save(os.path.join(version_dir, _column_file(column)), values, allow_pickle=False)
+        meta['version'] = version
+        pointer = os.path.join(station_dir, POINTER_FILE)
+        tmp_path = f'{pointer}.tmp-{version}'
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, pointer)
+        self._prune(station_dir, version)
+        return version_dir
+
+    def _prune(self, station_dir, current):
+        """Delete versions superseded more than VERSION_GRACE_SECONDS ago.
+
+        Version names start with their creation time, so each version was
+        superseded when the next newer one was created. Open maps of a
+        deleted version keep their pages until released.
+        """
+        versions = sorted((int(entry[1:].split('-', 1)[0]), entry)
+                          for entry in os.listdir(station_dir)
+                          if entry.startswith('v') and '.tmp-' not in entry)
+        now = time.time_ns()
+        for (_, entry), (superseded_ns, _) in zip(versions, versions[1:]):
+            if entry != current and now - superseded_ns > VERSION_GRACE_SECONDS * 1e9:
+                shutil.rmtree(os.path.join(station_dir, entry), ignore_errors=True)
+
+    def _array(self, meta, column):
+        """Memory-mapped array of one column of a station version."""
+        key = (meta['station'], meta['version'], column)
+        with self._lock:
+            values = self._arrays.get(key)
+            if values is None:
+                path = os.path.join(self._station_dir(meta['station']), meta['version'],
+                                    _column_file(column))
+                values = np.load(path, mmap_mode='r')
+                # Keep only maps of the current version of each station
+                for stale in [k for k in self._arrays if k[0] == key[0] and k[1] != key[1]]:
+                    del self._arrays[stale]
+                self._arrays[key] = values
+        return values
+
+    def _rows(self, meta, start=None, end=None):
+        """Rows with ``start <= Timestamp < end``: a slice when the index is sorted, else a mask."""
+        if start is None and end is None:
+            return slice(None)
+        index = self._array(meta, TIME_COLUMN)
+        if meta['sorted']:
+            lo = 0 if start is None else index.searchsorted(np.datetime64(pd.Timestamp(start)))
+            hi = len(index) if end is None else index.searchsorted(np.datetime64(pd.Timestamp(end)))
+            return slice(lo, hi)
+        keep = np.ones(len(index), dtype=bool)
+        if start is not None:
+            keep &= index >= np.datetime64(pd.Timestamp(start))
+        if end is not None:
+            keep &= index < np.datetime64(pd.Timestamp(end))
+        return keep
+
+    def read(self, station, columns=None, start=None, end=None, copy=True):
+        """Frame of ``station`` restricted to ``columns`` and ``[start, end)``.
+
+        ``columns`` defaults to every stored column, in source order
+        (Timestamp included). With ``copy=False`` the columns are read-only views of
+        the mapped files (no data is copied into the process).
+        """
+        try:
+            return self._read(self._require(station), columns, start, end, copy)
+        except FileNotFoundError:
+            # The version was deleted after its metadata was read
+            return self._read(self._require(station), columns, start, end, copy)
+
+    def _read(self, meta, columns, start, end, copy):
+        station = meta['station']
+        if columns is None:
+            columns = meta['columns']
+        missing = [column for column in columns if column not in meta['columns']]
+        if missing:
+            raise KeyError(f"Columns {missing} are not stored for station {station!r}")
+        rows = self._rows(meta, start, end)
+        data = {}
+        for column in columns:
+            values = self._array(meta, column)[rows]
+            data[column] = np.array(values) if copy else values.view(np.ndarray)
+        return pd.DataFrame(data, copy=False)
+
+    def query(self, columns, stations=None, start=None, end=None, agg=None, freq=None):
+        """Read ``columns`` of several stations over ``[start, end)``.
+
+        Without ``agg`` the rows of each station are returned in one long
+        frame with Station and Timestamp columns. ``agg`` (any pandas
+        aggregation name, e.g. 'mean' or 'max') reduces each station to
+        one row indexed by station, or with ``freq`` (e.g. 'D') to one row
+        per station and period. Stations lacking a column get NaN for it.
+        """
+        if isinstance(columns, str):
+            columns = [columns]
+        frames = []
+        for station in stations if stations is not None else self.stations():
+            stored = self.columns(station)
+            present = [column for column in columns if column in stored]
+            if agg is None or freq is not None:
+                present = [TIME_COLUMN] + present
+            # Aggregates are computed straight from the mapped pages
+            df = self.read(station, present, start, end, copy=agg is None)
+            if agg is None:
+                df.insert(0, STATION_COLUMN, station)
+            elif freq is None:
+                df = df.agg(agg).to_frame(station).T
+            else:
+                df = df.resample(freq, on=TIME_COLUMN).agg(agg).reset_index()
+                df.insert(0, STATION_COLUMN, station)
+            frames.append(df.reindex(columns=list(df.columns)
+                                     + [column for column in columns if column not in present]))
+        if agg is not None and freq is None:
+            result = pd.concat(frames) if frames else pd.DataFrame(columns=columns)
+            result.index.name = STATION_COLUMN
+            return result[columns]
+        head = [STATION_COLUMN, TIME_COLUMN]
+        if not frames:
+            return pd.DataFrame(columns=head + columns)
+        return pd.concat(frames, ignore_index=True)[head + columns]
+
+    def station_for(self, file_path):
+        """Stored station whose source is ``file_path`` (None if there is none)."""
+        path = os.path.abspath(file_path)
+        for station in self.stations():
+            meta = self.meta(station)
+            if meta is not None and meta.get('source') == path:
+                return station
+        return None
+
+    def load_source(self, file_path, usecols=None, shared=False):
+        """Frame of the station stored from ``file_path``, or None.
+
+        None means the caller should parse the file itself: it is not in
+        the store, it changed since it was stored, or a requested column
+        could not be stored. The frame is a private, writable copy; with
+        ``shared=True`` its columns are read-only views of the mapped
+        files instead, so processes loading the same station share pages.
+        """
+        station = self.station_for(file_path)
+        if station is None:
+            return None
+        meta = self.meta(station)
+        if not meta.get('fingerprint') or not columnar_cache.is_fresh(file_path, meta['fingerprint']):
+            return None
+        if usecols is None and meta['skipped']:
+            return None
+        columns = list(usecols) if usecols is not None else meta['columns']
+        if any(column not in meta['columns'] for column in columns):
+            return None
+        return self.read(station, columns, copy=not shared)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def store_root():
+    """Root of the configured store (SOLAR_STATION_STORE), or None."""
+    return os.environ.get(STORE_ENV) or None
+
+def default_store():
+    """The StationStore at SOLAR_STATION_STORE (one per root and process), or None."""
+    root = store_root()
+    if root is None:
+        return None
+    root = os.path.abspath(root)
+    with _stores_lock:
+        if root not in _stores:
+            _stores[root] = StationStore(root)
+        return _stores[root]
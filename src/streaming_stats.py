@@ -0,0 +1,123 @@
+import numpy as np
+
+class MomentAccumulator:
+    """Running count, mean and sum of squared deviations for one column.
+
+    Batches are folded in with the Welford/Chan update, and two
+    accumulators built over different chunks can be merged, so statistics
+    can be gathered in a single pass over chunked data.
+    """
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def update(self, values):
+        """Fold an array of values into the accumulator, ignoring NaN."""
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        batch_mean = values.mean()
+        batch_m2 = np.square(values - batch_mean).sum()
+        return self.merge(MomentAccumulator(len(values), batch_mean, batch_m2))
+
+    def merge(self, other):
+        """Merge another accumulator into this one."""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        return self
+
+    def variance(self, ddof=1):
+        """Return the variance, or NaN when too few values were seen."""
+        if self.count - ddof <= 0:
+            return np.nan
+        return self.m2 / (self.count - ddof)
+
+    def std(self, ddof=1):
+        """Return the standard deviation (sample by default, like pandas)."""
+        return np.sqrt(self.variance(ddof))
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['count'], state['mean'], state['m2'])
+
+class CovarianceAccumulator:
+    """Running co-moments of a pair of columns for a streaming Pearson r.
+
+    Only rows where both values are present are used, like pandas'
+    pairwise ``corr``. Batches are folded in and accumulators merged with
+    the same Chan update as MomentAccumulator, extended to the cross term.
+    """
+
+    def __init__(self, count=0, mean_x=0.0, mean_y=0.0, m2_x=0.0, m2_y=0.0, c_xy=0.0):
+        self.count = count
+        self.mean_x = mean_x
+        self.mean_y = mean_y
+        self.m2_x = m2_x
+        self.m2_y = m2_y
+        self.c_xy = c_xy
+
+    def update(self, x, y):
+        """Fold paired arrays into the accumulator, skipping rows with NaN."""
+        x = np.asarray(x, dtype='float64')
+        y = np.asarray(y, dtype='float64')
+        keep = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[keep], y[keep]
+        if len(x) == 0:
+            return self
+        mean_x, mean_y = x.mean(), y.mean()
+        dx, dy = x - mean_x, y - mean_y
+        return self.merge(CovarianceAccumulator(len(x), mean_x, mean_y, np.dot(dx, dx),
+                                                np.dot(dy, dy), np.dot(dx, dy)))
+
+    def merge(self, other):
+        """Merge another accumulator into this one."""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.__dict__.update(other.__dict__)
+            return self
+        count = self.count + other.count
+        weight = self.count * other.count / count
+        delta_x = other.mean_x - self.mean_x
+        delta_y = other.mean_y - self.mean_y
+        self.mean_x += delta_x * other.count / count
+        self.mean_y += delta_y * other.count / count
+        self.m2_x += other.m2_x + delta_x * delta_x * weight
+        self.m2_y += other.m2_y + delta_y * delta_y * weight
+        self.c_xy += other.c_xy + delta_x * delta_y * weight
+        self.count = count
+        return self
+
+    def covariance(self, ddof=1):
+        """Return the covariance, or NaN when too few pairs were seen."""
+        if self.count - ddof <= 0:
+            return np.nan
+        return self.c_xy / (self.count - ddof)
+
+    def correlation(self):
+        """Return the Pearson correlation, or NaN if either side is constant."""
+        denominator = np.sqrt(self.m2_x * self.m2_y)
+        if self.count < 2 or denominator == 0:
+            return np.nan
+        return self.c_xy / denominator
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(**state)
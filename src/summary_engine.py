@@ -0,0 +1,169 @@
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from data_loader import iter_chunks, load_data
+from rules import column_values
+from streaming_stats import MomentAccumulator, CovarianceAccumulator
+
+# A declared summary metric. ``stat`` is one of STATS; ``other`` is the
+# second column of a correlation and ``threshold`` the cut-off of a
+# percent_above share.
+Metric = namedtuple('Metric', ['name', 'stat', 'column', 'other', 'threshold'],
+                    defaults=(None, None, None))
+
+STATS = ('rows', 'count', 'mean', 'std', 'min', 'max', 'corr', 'percent_above')
+
+# The country summary reported by Data_summary
+COUNTRY_METRICS = (
+    Metric('avg_ghi', 'mean', 'GHI'),
+    Metric('max_ghi', 'max', 'GHI'),
+    Metric('avg_temp', 'mean', 'Tamb'),
+    Metric('avg_humidity', 'mean', 'RH'),
+    Metric('avg_wind_speed', 'mean', 'WS'),
+    Metric('data_points', 'rows'),
+    Metric('ghi_temp_corr', 'corr', 'GHI', 'Tamb'),
+    Metric('high_ghi_percentage', 'percent_above', 'GHI', threshold=500),
+)
+
+def metric_columns(metrics):
+    """Columns the metrics read, in first-use order."""
+    columns = []
+    for metric in metrics:
+        for col in (metric.column, metric.other):
+            if col is not None and col not in columns:
+                columns.append(col)
+    return columns
+
+class SummaryState:
+    """Mergeable state for a set of declared metrics.
+
+    Each chunk is converted to column arrays once; moments, extrema,
+    co-moments and threshold counts are folded in from those arrays, and
+    states built over different chunks merge exactly.
+    """
+
+    def __init__(self, metrics):
+        for metric in metrics:
+            if metric.stat not in STATS:
+                raise ValueError(f"Unknown summary statistic: {metric.stat}")
+        self.metrics = tuple(metrics)
+        self.rows = 0
+        self.moments = {}
+        self.minimum = {}
+        self.maximum = {}
+        self.pairs = {}
+        self.above = {}
+        for metric in self.metrics:
+            if metric.stat in ('count', 'mean', 'std'):
+                self.moments.setdefault(metric.column, MomentAccumulator())
+            elif metric.stat == 'min':
+                self.minimum.setdefault(metric.column, np.nan)
+            elif metric.stat == 'max':
+                self.maximum.setdefault(metric.column, np.nan)
+            elif metric.stat == 'corr':
+                self.pairs.setdefault((metric.column, metric.other), CovarianceAccumulator())
+            elif metric.stat == 'percent_above':
+                self.above.setdefault((metric.column, metric.threshold), 0)
+
+    def update(self, df):
+        """Fold one frame (or chunk) into the state."""
+        values = {col: column_values(df, col) for col in metric_columns(self.metrics)}
+        self.rows += len(df)
+        for col, acc in self.moments.items():
+            acc.update(values[col])
+        for col in self.minimum:
+            self.minimum[col] = np.fmin(self.minimum[col], np.nanmin(values[col], initial=np.inf))
+        for col in self.maximum:
+            self.maximum[col] = np.fmax(self.maximum[col], np.nanmax(values[col], initial=-np.inf))
+        for (x, y), acc in self.pairs.items():
+            acc.update(values[x], values[y])
+        for (col, threshold) in self.above:
+            self.above[(col, threshold)] += int(np.count_nonzero(values[col] > threshold))
+        return self
+
+    def merge(self, other):
+        """Merge a state built for the same metrics over other rows."""
+        self.rows += other.rows
+        for col, acc in self.moments.items():
+            acc.merge(other.moments[col])
+        for col in self.minimum:
+            self.minimum[col] = np.fmin(self.minimum[col], other.minimum[col])
+        for col in self.maximum:
+            self.maximum[col] = np.fmax(self.maximum[col], other.maximum[col])
+        for key, acc in self.pairs.items():
+            acc.merge(other.pairs[key])
+        for key in self.above:
+            self.above[key] += other.above[key]
+        return self
+
+    def _value(self, metric):
+        if metric.stat == 'rows':
+            return self.rows
+        if metric.stat == 'count':
+            return self.moments[metric.column].count
+        if metric.stat == 'mean':
+            acc = self.moments[metric.column]
+            return acc.mean if acc.count else np.nan
+        if metric.stat == 'std':
+            return self.moments[metric.column].std()
+        if metric.stat == 'min':
+            return self._extremum(self.minimum[metric.column])
+        if metric.stat == 'max':
+            return self._extremum(self.maximum[metric.column])
+        if metric.stat == 'corr':
+            return self.pairs[(metric.column, metric.other)].correlation()
+        # Like (df[col] > threshold).mean(): missing values count as not above
+        above = self.above[(metric.column, metric.threshold)]
+        return above / self.rows * 100 if self.rows else np.nan
+
+    @staticmethod
+    def _extremum(value):
+        return value if np.isfinite(value) else np.nan
+
+    def result(self):
+        """Return {metric name: value} for the declared metrics."""
+        return {metric.name: self._value(metric) for metric in self.metrics}
+
+def summarize(df, metrics=COUNTRY_METRICS):
+    """Compute the declared metrics over ``df`` in one pass over its columns."""
+    return SummaryState(metrics).update(df).result()
+
+def summarize_chunks(chunks, metrics=COUNTRY_METRICS):
+    """Compute the declared metrics over an iterable of chunks."""
+    state = SummaryState(metrics)
+    for chunk in chunks:
+        state.update(chunk)
+    return state.result()
+
+_file_results = {}
+_file_results_lock = threading.Lock()
+
+def summarize_file(file_path, metrics=COUNTRY_METRICS, chunksize=None):
+    """Summarize a station CSV, caching the result per file and metric set.
+
+    Only the columns the metrics need are read. Results are kept in memory
+    keyed by path, size and mtime, so repeat calls for an unchanged file
+    return immediately. With ``chunksize`` the file is streamed.
+    """
+    metrics = tuple(metrics)
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns, metrics)
+    with _file_results_lock:
+        if key in _file_results:
+            return dict(_file_results[key])
+
+    columns = metric_columns(metrics)
+    if chunksize:
+        result = summarize_chunks(iter_chunks(path, chunksize=chunksize, usecols=columns), metrics)
+    else:
+        result = summarize(load_data(path, usecols=columns), metrics)
+    with _file_results_lock:
+        # Drop results for older versions of the same file
+        for stale in [k for k in _file_results if k[0] == path and k[1:3] != key[1:3]]:
+            del _file_results[stale]
+        _file_results[key] = result
+    return dict(result)
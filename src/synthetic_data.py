@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+# Column order of the raw station files
+STATION_COLUMNS = ['Timestamp', 'GHI', 'DNI', 'DHI', 'ModA', 'ModB', 'Tamb', 'RH', 'WS', 'WSgust',
+                   'WSstdev', 'WD', 'WDstdev', 'BP', 'Cleaning', 'Precipitation', 'TModA', 'TModB',
+                   'Comments']
+DEFAULT_START = '2021-08-09'
+DEFAULT_CHUNKSIZE = 500_000
+# Latitude used for the sun path (the stations lie around 9-11 degrees north)
+LATITUDE = 10.0
+
+def solar_elevation(timestamps, latitude=LATITUDE):
+    """Approximate sine of the solar elevation (clipped at 0) for local solar time."""
+    day = timestamps.dayofyear.to_numpy()
+    hour = timestamps.hour.to_numpy() + timestamps.minute.to_numpy() / 60
+    declination = np.deg2rad(23.44) * np.sin(2 * np.pi * (284 + day) / 365)
+    hour_angle = np.deg2rad(15 * (hour - 12))
+    lat = np.deg2rad(latitude)
+    sin_elevation = (np.sin(lat) * np.sin(declination)
+                     + np.cos(lat) * np.cos(declination) * np.cos(hour_angle))
+    return np.clip(sin_elevation, 0, None)
+
+def _cloudiness(rng, n_rows):
+    """Slowly varying cloud attenuation in [0.15, 1].
+
+    A mean-reverting AR(1) process with a time scale of a few hours, run
+    as a linear filter so it stays vectorized.
+    """
+    noise = rng.normal(0, 0.01, n_rows)
+    drift = lfilter([1.0], [1.0, -0.999], noise)
+    return np.clip(0.75 + drift, 0.15, 1.0)
+
+def synthetic_station_frame(n_rows, start=DEFAULT_START, seed=0, nan_rate=0.002, fault_rate=0.005):
+    """Build a raw-like station frame of ``n_rows`` one-minute readings.
+
+    Irradiance follows the sun path with drifting cloud cover (GHI split
+    into beam and diffuse parts), temperature and humidity follow daily
+    cycles, and a ``nan_rate`` share of sensor values is missing. A
+    ``fault_rate`` share of rows carries faults the cleaners must handle:
+    negative GHI, DNI above the sensor range, implausible wind speed and
+    humidity, and isolated spikes.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range(start, periods=n_rows, freq='min')
+    sun = solar_elevation(timestamps)
+    clouds = _cloudiness(rng, n_rows)
+    clear_sky = 1050 * sun ** 1.15
+    ghi = clear_sky * clouds + rng.normal(0, 3, n_rows)
+    beam_share = np.clip((clouds - 0.3) / 0.7, 0, 1)
+    dni = np.clip(900 * sun ** 0.3 * beam_share * (sun > 0.05) + rng.normal(0, 3, n_rows), 0, None)
+    dhi = np.clip(ghi - dni * sun, 0, None)
+
+    hour = timestamps.hour.to_numpy() + timestamps.minute.to_numpy() / 60
+    daily = np.sin((hour - 9) / 24 * 2 * np.pi)
+    day = timestamps.dayofyear.to_numpy()
+    seasonal = 3 * np.cos(2 * np.pi * (day - 80) / 365)
+    tamb = 27 + seasonal + 6 * daily + rng.normal(0, 0.5, n_rows)
+    rh = np.clip(70 - 20 * daily - 10 * (clouds - 0.75) + rng.normal(0, 3, n_rows), 2, 100)
+    ws = np.abs(2 + 1.5 * daily + rng.normal(0, 0.8, n_rows))
+    module = tamb + 0.03 * ghi + rng.normal(0, 0.5, n_rows)
+
+    df = pd.DataFrame({
+        'Timestamp': timestamps,
+        'GHI': np.round(ghi, 1),
+        'DNI': np.round(dni, 1),
+        'DHI': np.round(dhi, 1),
+        'ModA': np.round(module, 1),
+        'ModB': np.round(module - 0.5 + rng.normal(0, 0.3, n_rows), 1),
+        'Tamb': np.round(tamb, 1),
+        'RH': np.round(rh, 1),
+        'WS': np.round(ws, 1),
+        'WSgust': np.round(ws * 1.4 + np.abs(rng.normal(0, 0.3, n_rows)), 1),
+        'WSstdev': np.round(np.abs(rng.normal(0.5, 0.2, n_rows)), 1),
+        'WD': np.round((200 + rng.normal(0, 60, n_rows)) % 360, 1),
+        'WDstdev': np.round(np.abs(rng.normal(8, 3, n_rows)), 1),
+        'BP': np.round(997 + 2 * np.sin(2 * np.pi * hour / 12) + rng.normal(0, 0.5, n_rows)).astype('int64'),
+        'Cleaning': (rng.random(n_rows) < 0.0005).astype('int64'),
+        'Precipitation': np.round(np.where(rng.random(n_rows) < 0.01,
+                                           rng.exponential(0.5, n_rows), 0.0), 1),
+        'TModA': np.round(module + rng.normal(0, 0.3, n_rows), 1),
+        'TModB': np.round(module - 0.5 + rng.normal(0, 0.3, n_rows), 1),
+        'Comments': np.nan,
+    })
+
+    sensors = ['GHI', 'DNI', 'DHI', 'ModA', 'ModB', 'Tamb', 'RH', 'WS', 'WD']
+    for col in sensors:
+        missing = rng.random(n_rows) < nan_rate
+        df.loc[missing, col] = np.nan
+
+    faults = np.flatnonzero(rng.random(n_rows) < fault_rate)
+    kinds = rng.integers(0, 5, len(faults))
+    df.loc[faults[kinds == 0], 'GHI'] = -50.0
+    df.loc[faults[kinds == 1], 'DNI'] = 2500.0
+    df.loc[faults[kinds == 2], 'WS'] = 80.0
+    df.loc[faults[kinds == 3], 'RH'] = 120.0
+    spikes = faults[kinds == 4]
+    df.loc[spikes, 'Tamb'] = df.loc[spikes, 'Tamb'] + 25
+    return df
+
+def iter_station_chunks(n_rows, chunksize=DEFAULT_CHUNKSIZE, start=DEFAULT_START, seed=0, **kwargs):
+    """Yield ``synthetic_station_frame`` chunks covering ``n_rows`` consecutive minutes.
+
+    Each chunk has its own seed derived from ``seed`` and its position, so
+    the output does not depend on holding the whole series in memory.
+    """
+    start = pd.Timestamp(start)
+    for index, offset in enumerate(range(0, n_rows, chunksize)):
+        size = min(chunksize, n_rows - offset)
+        yield synthetic_station_frame(size, start + pd.Timedelta(minutes=offset),
+                                      seed=(seed, index), **kwargs)
+
+def write_station_csv(path, n_rows, chunksize=DEFAULT_CHUNKSIZE, start=DEFAULT_START, seed=0,
+                      **kwargs):
+    """Stream a synthetic station file of ``n_rows`` rows to ``path``."""
+    for index, chunk in enumerate(iter_station_chunks(n_rows, chunksize, start, seed, **kwargs)):
+        chunk.to_csv(path, mode='w' if index == 0 else 'a', header=index == 0, index=False)
+    return path
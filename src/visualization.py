@@ -1,71 +1,228 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import numpy as np
+import matplotlib as mpl
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from binning import frame_binned_mean_2d, wind_rose_bins, speed_class_labels
+from density import histogram_density
+from downsampling import downsample_frame
+from instrumentation import in_context, stage
+
+# Above this many rows the scatter-style charts switch to binned rendering
+BINNED_THRESHOLD = 20_000
+
+# seaborn (which pulls in scipy.stats) is imported inside the few builders
+# that need it, so loading this module stays cheap.
+
+# Figures are built with the object-oriented API on their own Agg canvas,
+# never through the global pyplot state, so several can render at once.
+
+def new_figure(figsize, **subplot_kw):
+    """Create a standalone Agg-backed figure with a single axes."""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111, **subplot_kw)
+    return fig, ax
+
+def use_binned(df, binned):
+    """Resolve the binned-rendering switch (None means decide by size)."""
+    return len(df) > BINNED_THRESHOLD if binned is None else binned
+
+def draw_binned_mean(fig, ax, df, x, y, value, label, bins=80):
+    """Draw a 2D grid coloured by the mean of ``value`` per cell."""
+    counts, means, x_edges, y_edges = frame_binned_mean_2d(df, x, y, value, bins)
+    mesh = ax.pcolormesh(x_edges, y_edges, means.T, cmap='viridis', shading='flat')
+    fig.colorbar(mesh, ax=ax, label=label)
+    return mesh
+
+def draw_wind_rose(ax, rose):
+    """Draw stacked polar bars of wind frequency (%) per speed class."""
+    frequency = rose['counts'] / max(rose['total'], 1) * 100
+    bottom = np.zeros(len(rose['theta']))
+    # Evenly spaced viridis colours, as sns.color_palette('viridis', n) picks them
+    colors = mpl.colormaps['viridis'](np.linspace(0, 1, frequency.shape[1] + 2)[1:-1])
+    for i, label in enumerate(speed_class_labels(rose['speed_bins'])):
+        ax.bar(rose['theta'], frequency[:, i], width=rose['width'], bottom=bottom,
+               color=colors[i], edgecolor='white', linewidth=0.5, label=label)
+        bottom += frequency[:, i]
+    ax.set_theta_zero_location('N')
+    ax.set_theta_direction(-1)
+    ax.legend(loc='upper left', bbox_to_anchor=(1.05, 1.0), title='Wind speed')
+
+def draw_histogram(ax, hist, color='C0'):
+    """Draw histogram bars with their KDE curve, styled like ``sns.histplot(kde=True)``."""
+    edges = hist['edges']
+    widths = np.diff(edges)
+    bars = ax.bar(edges[:-1], hist['counts'], widths, align='edge', color='none',
+                  facecolor=mpl.colors.to_rgba(color, 0.5),
+                  edgecolor=mpl.rcParams['patch.edgecolor'])
+    if hist['curve'] is not None:
+        line, = ax.plot(hist['support'], hist['curve'], color=color)
+        line.sticky_edges.y[:] = (0, np.inf)
+    # seaborn scales the bar outline with the drawn bin width
+    ax.autoscale_view()
+    bin_points = 72 / ax.figure.dpi * abs(ax.transData.transform((edges[0] + widths.min(), 0))[0]
+                                          - ax.transData.transform((edges[0], 0))[0])
+    linewidth = min(0.1 * bin_points, mpl.rcParams['patch.linewidth'])
+    for bar in bars:
+        bar.set_linewidth(linewidth)
+    return bars
+
+def time_series_figure(df, column, title):
+    """Build the time series figure for a column."""
+    fig, ax = new_figure((15, 5))
+    # Long series are reduced to the pixel budget (LTTB keeps the peaks)
+    df = downsample_frame(df, 'Timestamp', [column])
+    ax.plot(df['Timestamp'], df[column])
+    ax.set_title(f'{title} Over Time')
+    ax.set_xlabel('Timestamp')
+    ax.set_ylabel(column)
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+    return fig
+
+def correlation_heatmap_figure(correlation_matrix):
+    """Build the correlation heatmap figure."""
+    import seaborn as sns
+    fig, ax = new_figure((12, 10))
+    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', ax=ax)
+    ax.set_title('Correlation Matrix')
+    fig.tight_layout()
+    return fig
+
+def wind_rose_figure(df, binned=None):
+    """Build the wind rose figure."""
+    fig, ax = new_figure((10, 10), projection='polar')
+    if use_binned(df, binned):
+        draw_wind_rose(ax, wind_rose_bins(df['WD'], df['WS']))
+    else:
+        wind_direction_rad = df['WD'] * np.pi / 180
+        ax.scatter(wind_direction_rad, df['WS'], alpha=0.5)
+    ax.set_title('Wind Rose - Speed and Direction')
+    fig.tight_layout()
+    return fig
+
+def temperature_humidity_figure(df, binned=None):
+    """Build the temperature vs humidity scatter figure."""
+    fig, ax = new_figure((10, 6))
+    if use_binned(df, binned):
+        draw_binned_mean(fig, ax, df, 'Tamb', 'RH', 'GHI', 'Mean GHI (W/m²)')
+    else:
+        import seaborn as sns
+        sns.scatterplot(x='Tamb', y='RH', data=df, hue='GHI', palette='viridis', ax=ax)
+    ax.set_title('Temperature vs Relative Humidity (color: GHI)')
+    ax.set_xlabel('Ambient Temperature (°C)')
+    ax.set_ylabel('Relative Humidity (%)')
+    fig.tight_layout()
+    return fig
+
+def histogram_figure(df, column):
+    """Build the histogram figure for a column."""
+    fig, ax = new_figure((10, 5))
+    # Bars and KDE curve share one binning pass over the column
+    draw_histogram(ax, histogram_density(df[column].to_numpy(dtype='float64', na_value=np.nan)))
+    ax.set_title(f'Distribution of {column}')
+    ax.set_xlabel(column)
+    ax.set_ylabel('Frequency')
+    fig.tight_layout()
+    return fig
+
+def bubble_chart_figure(df, binned=None):
+    """Build the bubble chart figure for multiple variables."""
+    fig, ax = new_figure((12, 8))
+    if use_binned(df, binned):
+        draw_binned_mean(fig, ax, df, 'Tamb', 'GHI', 'WS', 'Mean Wind Speed (m/s)')
+    else:
+        scatter = ax.scatter(df['Tamb'], df['GHI'], s=df['RH'], c=df['WS'],
+                             cmap='viridis', alpha=0.6)
+        fig.colorbar(scatter, ax=ax, label='Wind Speed (m/s)')
+    ax.set_title('GHI vs Temperature vs Humidity vs Wind Speed')
+    ax.set_xlabel('Ambient Temperature (°C)')
+    ax.set_ylabel('Global Horizontal Irradiance (W/m²)')
+    fig.tight_layout()
+    return fig
+
+def save_figure(fig, path):
+    """Render a figure to a PNG file."""
+    fig.savefig(path)
 
 def time_series_analysis(df, column, title, output_dir):
     """Create time series plot for specified column."""
-    plt.figure(figsize=(15, 5))
-    plt.plot(df['Timestamp'], df[column])
-    plt.title(f'{title} Over Time')
-    plt.xlabel('Timestamp')
-    plt.ylabel(column)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/{column}_time_series.png')
-    plt.close()
+    save_figure(time_series_figure(df, column, title), f'{output_dir}/{column}_time_series.png')
 
 def create_correlation_heatmap(correlation_matrix, output_dir):
     """Create and save correlation heatmap."""
-    plt.figure(figsize=(12, 10))
-    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm')
-    plt.title('Correlation Matrix')
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/correlation_matrix.png')
-    plt.close()
-
-def wind_analysis(df, output_dir):
+    save_figure(correlation_heatmap_figure(correlation_matrix), f'{output_dir}/correlation_matrix.png')
+
+def wind_analysis(df, output_dir, binned=None):
     """Create wind rose plot."""
-    plt.figure(figsize=(10, 10))
-    ax = plt.subplot(111, projection='polar')
-    wind_direction_rad = df['WD'] * np.pi / 180
-    ax.scatter(wind_direction_rad, df['WS'], alpha=0.5)
-    plt.title('Wind Rose - Speed and Direction')
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/wind_rose.png')
-    plt.close()
-
-def temperature_humidity_analysis(df, output_dir):
+    save_figure(wind_rose_figure(df, binned), f'{output_dir}/wind_rose.png')
+
+def temperature_humidity_analysis(df, output_dir, binned=None):
     """Create temperature vs humidity scatter plot."""
-    plt.figure(figsize=(10, 6))
-    sns.scatterplot(x='Tamb', y='RH', data=df, hue='GHI', palette='viridis')
-    plt.title('Temperature vs Relative Humidity (color: GHI)')
-    plt.xlabel('Ambient Temperature (°C)')
-    plt.ylabel('Relative Humidity (%)')
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/temp_humidity_ghi.png')
-    plt.close()
+    save_figure(temperature_humidity_figure(df, binned), f'{output_dir}/temp_humidity_ghi.png')
 
 def create_histograms(df, columns, output_dir):
     """Create histograms for specified columns."""
     for column in columns:
-        plt.figure(figsize=(10, 5))
-        sns.histplot(df[column], kde=True)
-        plt.title(f'Distribution of {column}')
-        plt.xlabel(column)
-        plt.ylabel('Frequency')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/{column}_histogram.png')
-        plt.close()
-
-def bubble_chart(df, output_dir):
+        save_figure(histogram_figure(df, column), f'{output_dir}/{column}_histogram.png')
+
+def bubble_chart(df, output_dir, binned=None):
     """Create bubble chart for multiple variables."""
-    plt.figure(figsize=(12, 8))
-    scatter = plt.scatter(df['Tamb'], df['GHI'], s=df['RH'], c=df['WS'], 
-                         cmap='viridis', alpha=0.6)
-    plt.colorbar(scatter, label='Wind Speed (m/s)')
-    plt.title('GHI vs Temperature vs Humidity vs Wind Speed')
-    plt.xlabel('Ambient Temperature (°C)')
-    plt.ylabel('Global Horizontal Irradiance (W/m²)')
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/bubble_chart.png')
-    plt.close()
\ No newline at end of file
+    save_figure(bubble_chart_figure(df, binned), f'{output_dir}/bubble_chart.png')
+
+def station_chart_specs(country):
+    """List the (file name, figure builder, data columns, extra args) of a station's charts.
+
+    A ``columns`` of None means the builder takes the correlation matrix
+    instead of station data.
+    """
+    specs = []
+    for column in ['GHI', 'DNI', 'DHI', 'Tamb']:
+        specs.append((f'{column}_time_series.png', time_series_figure, ['Timestamp', column],
+                      (column, f'{column} in {country}')))
+    specs.append(('correlation_matrix.png', correlation_heatmap_figure, None, ()))
+    specs.append(('wind_rose.png', wind_rose_figure, ['WD', 'WS'], ()))
+    specs.append(('temp_humidity_ghi.png', temperature_humidity_figure, ['Tamb', 'RH', 'GHI'], ()))
+    for column in ['GHI', 'DNI', 'DHI', 'WS', 'Tamb']:
+        specs.append((f'{column}_histogram.png', histogram_figure, [column], (column,)))
+    specs.append(('bubble_chart.png', bubble_chart_figure, ['Tamb', 'GHI', 'RH', 'WS'], ()))
+    return specs
+
+def chart_job(spec, df, correlation_matrix, output_dir):
+    """Turn a chart spec into a (output path, figure builder, args) job."""
+    filename, builder, columns, extra = spec
+    data = correlation_matrix if columns is None else df[columns]
+    return (f'{output_dir}/{filename}', builder, (data,) + extra)
+
+def station_chart_jobs(df, country, correlation_matrix, output_dir):
+    """List the (output path, figure builder, args) jobs for one station."""
+    return [chart_job(spec, df, correlation_matrix, output_dir)
+            for spec in station_chart_specs(country)]
+
+def render_job(job):
+    """Build and save one figure, returning its render time in seconds."""
+    path, builder, args = job
+    with stage(f'render:{os.path.basename(path)}') as record:
+        save_figure(builder(*args), path)
+    return record['wall_s']
+
+def render_figures(jobs, workers=1, use_processes=False):
+    """Render figure jobs and report per-figure timings.
+
+    Figures render one after another by default: Agg drawing holds the
+    GIL for most of a figure, and a thread pool showed no measurable
+    speedup (compare the render stages of scripts/benchmark_pipeline.py). ``workers > 1``
+    renders on that many threads, or with ``use_processes=True`` on worker
+    processes, which sidestep the GIL at the cost of pickling each job's
+    data. Returns a dict of output file name -> seconds.
+    """
+    if workers <= 1:
+        timings = [render_job(job) for job in jobs]
+    else:
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor_class(max_workers=workers) as executor:
+            call = render_job if use_processes else in_context(render_job)
+            timings = list(executor.map(call, jobs))
+    return {os.path.basename(path): seconds for (path, _, _), seconds in zip(jobs, timings)}
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+
+def make_station_frame(n_rows=5000, seed=0):
+    """Build a small raw-like station frame with NaNs and out-of-range rows."""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range('2021-08-09', periods=n_rows, freq='min')
+    hour = timestamps.hour.to_numpy() + timestamps.minute.to_numpy() / 60
+    sun = np.clip(np.sin((hour - 6) / 12 * np.pi), 0, None)
+    df = pd.DataFrame({
+        'Timestamp': timestamps,
+        'GHI': np.round(900 * sun + rng.normal(0, 5, n_rows), 1),
+        'DNI': np.round(np.clip(600 * sun + rng.normal(0, 5, n_rows), 0, None), 1),
+        'DHI': np.round(np.clip(250 * sun + rng.normal(0, 5, n_rows), 0, None), 1),
+        'ModA': np.round(25 + 30 * sun + rng.normal(0, 1, n_rows), 1),
+        'ModB': np.round(25 + 28 * sun + rng.normal(0, 1, n_rows), 1),
+        'Tamb': np.round(24 + 8 * sun + rng.normal(0, 1, n_rows), 1),
+        'RH': np.round(np.clip(80 - 30 * sun + rng.normal(0, 5, n_rows), 0, 100), 1),
+        'WS': np.round(np.abs(rng.normal(2, 1, n_rows)), 1),
+        'WSgust': np.round(np.abs(rng.normal(3, 1, n_rows)), 1),
+        'WSstdev': np.round(np.abs(rng.normal(0.5, 0.2, n_rows)), 1),
+        'WD': np.round(rng.uniform(0, 360, n_rows), 1),
+        'WDstdev': np.round(np.abs(rng.normal(8, 3, n_rows)), 1),
+        'BP': rng.integers(990, 1000, n_rows),
+        'Cleaning': (rng.random(n_rows) < 0.01).astype(int),
+        'Precipitation': np.round(np.abs(rng.normal(0, 0.1, n_rows)), 1),
+        'TModA': np.round(25 + 30 * sun + rng.normal(0, 1, n_rows), 1),
+        'TModB': np.round(25 + 28 * sun + rng.normal(0, 1, n_rows), 1),
+        'Comments': np.nan,
+    })
+    # Sprinkle in sensor faults the cleaners are expected to handle
+    faults = rng.choice(n_rows, size=n_rows // 50, replace=False)
+    df.loc[faults[0::5], 'GHI'] = -50.0
+    df.loc[faults[1::5], 'DNI'] = 2500.0
+    df.loc[faults[2::5], 'Tamb'] = np.nan
+    df.loc[faults[3::5], 'WS'] = 80.0
+    df.loc[faults[4::5], 'RH'] = 120.0
+    return df
+
+
+@pytest.fixture
+def station_frame():
+    return make_station_frame()
+
+
+@pytest.fixture
+def station_csv(tmp_path, station_frame):
+    path = tmp_path / 'station.csv'
+    station_frame.to_csv(path, index=False)
+    return str(path)
@@ -0,0 +1,42 @@
+import numpy as np
+
+from binning import binned_mean_2d, wind_rose_bins, speed_class_labels, WIND_SPEED_BINS
+from visualization import wind_rose_figure, bubble_chart_figure, temperature_humidity_figure
+
+
+def test_binned_mean_matches_per_cell_mean():
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(0, 10, 5000), rng.uniform(0, 10, 5000)
+    values = x + y
+    counts, means, x_edges, y_edges = binned_mean_2d(x, y, values, bins=5)
+    assert counts.sum() == 5000
+    in_cell = (x >= x_edges[1]) & (x < x_edges[2]) & (y >= y_edges[3]) & (y < y_edges[4])
+    assert np.isclose(means[1, 3], values[in_cell].mean())
+
+
+def test_binned_mean_skips_nan_and_empty_cells():
+    counts, means, _, _ = binned_mean_2d([0.0, 1.0, np.nan], [0.0, 1.0, 0.5], [1.0, 3.0, 7.0], bins=2)
+    assert counts.sum() == 2
+    assert np.isnan(means[0, 1]) and np.isnan(means[1, 0])
+
+
+def test_wind_rose_sectors_centred_on_north():
+    direction = np.array([355.0, 5.0, 90.0, 180.0, 270.0])
+    speed = np.array([0.5, 1.5, 2.5, 10.0, 3.5])
+    rose = wind_rose_bins(direction, speed, sectors=4)
+    assert rose['counts'].shape == (4, len(WIND_SPEED_BINS) - 1)
+    assert rose['counts'].sum() == 5
+    assert rose['counts'][0].sum() == 2          # 355° and 5° both fall in the north sector
+    assert rose['counts'][2, -1] == 1           # 10 m/s lands in the open-ended class
+    assert np.allclose(rose['theta'], np.deg2rad([0, 90, 180, 270]))
+
+
+def test_speed_class_labels():
+    assert speed_class_labels([0, 1, np.inf]) == ['0-1 m/s', '>1 m/s']
+
+
+def test_binned_figures_render(station_frame):
+    for builder in (wind_rose_figure, bubble_chart_figure, temperature_humidity_figure):
+        fig = builder(station_frame, binned=True)
+        fig.canvas.draw()
+        assert fig.axes
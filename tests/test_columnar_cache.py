@@ -0,0 +1,68 @@
+import os
+
+import pandas as pd
+
+import columnar_cache
+from data_loader import load_data, read_csv_typed, iter_chunks
+
+
+def test_cache_written_next_to_csv(station_csv):
+    df = load_data(station_csv)
+    path = columnar_cache.cache_path(station_csv)
+    assert os.path.exists(path)
+    meta = columnar_cache.read_cache_metadata(path)
+    assert meta['size'] == os.path.getsize(station_csv)
+    assert meta['sha256'] == columnar_cache.file_hash(station_csv)
+    pd.testing.assert_frame_equal(df, read_csv_typed(station_csv))
+
+
+def test_cached_load_matches_csv_and_projects(station_csv):
+    load_data(station_csv)
+    cached = load_data(station_csv)
+    pd.testing.assert_frame_equal(cached, read_csv_typed(station_csv))
+    projected = load_data(station_csv, usecols=['GHI', 'Tamb'])
+    assert list(projected.columns) == ['GHI', 'Tamb']
+
+
+def test_cache_invalidated_when_source_changes(station_csv, station_frame):
+    load_data(station_csv)
+    station_frame.iloc[:10].to_csv(station_csv, index=False)
+    assert not columnar_cache.is_fresh(station_csv)
+    assert len(load_data(station_csv)) == 10
+    assert columnar_cache.is_fresh(station_csv)
+
+
+def test_touched_but_unchanged_source_stays_cached(station_csv):
+    load_data(station_csv)
+    stat = os.stat(station_csv)
+    os.utime(station_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert columnar_cache.is_fresh(station_csv)
+    load_data(station_csv)
+    meta = columnar_cache.read_cache_metadata(columnar_cache.cache_path(station_csv))
+    assert meta['mtime_ns'] == stat.st_mtime_ns + 10**9
+
+
+def test_iter_chunks_reads_fresh_cache(station_csv):
+    full = load_data(station_csv)
+    chunks = list(iter_chunks(station_csv, chunksize=1000))
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), full)
+
+
+def test_appended_rows_go_to_part_files(station_csv, station_frame, monkeypatch):
+    station_frame.iloc[:1000].to_csv(station_csv, index=False)
+    load_data(station_csv)
+    for start in range(1000, 4000, 1000):
+        station_frame.iloc[start:start + 1000].to_csv(station_csv, mode='a', header=False, index=False)
+        columnar_cache.append_cache(read_csv_typed(station_csv).iloc[start:], station_csv)
+    assert len(columnar_cache.part_paths(station_csv)) == 3
+    assert columnar_cache.is_fresh(station_csv)
+    pd.testing.assert_frame_equal(columnar_cache.read_cache(station_csv), read_csv_typed(station_csv))
+    chunks = list(iter_chunks(station_csv, chunksize=1000))
+    assert sum(len(chunk) for chunk in chunks) == 4000
+
+    # Past the limit the parts are compacted into the cache file
+    monkeypatch.setattr(columnar_cache, 'MAX_CACHE_PARTS', 3)
+    station_frame.iloc[4000:].to_csv(station_csv, mode='a', header=False, index=False)
+    columnar_cache.append_cache(read_csv_typed(station_csv).iloc[4000:], station_csv)
+    assert columnar_cache.part_paths(station_csv) == []
+    pd.testing.assert_frame_equal(load_data(station_csv), read_csv_typed(station_csv))
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import correlation_engine
+from correlation_engine import (CORRELATION_COLUMNS, CorrelationAccumulator, chunk_correlations,
+                                correlation_matrix, file_correlations)
+
+
+def test_matches_pandas_with_missing_values(station_frame):
+    # The raw frame has NaN and fault values, so pairs use different rows
+    expected = station_frame[CORRELATION_COLUMNS].corr()
+    pd.testing.assert_frame_equal(correlation_matrix(station_frame, CORRELATION_COLUMNS), expected,
+                                  rtol=1e-10, atol=1e-12)
+
+
+def test_chunks_and_merge_match_single_pass(station_frame):
+    chunks = [station_frame.iloc[i:i + 900] for i in range(0, len(station_frame), 900)]
+    expected = station_frame[CORRELATION_COLUMNS].corr()
+    streamed = chunk_correlations(chunks).correlation()
+    pd.testing.assert_frame_equal(streamed, expected, rtol=1e-10, atol=1e-12)
+
+    left = chunk_correlations(chunks[:3])
+    right = chunk_correlations(chunks[3:])
+    pd.testing.assert_frame_equal(left.merge(right).correlation(), expected, rtol=1e-10, atol=1e-12)
+
+
+def test_subsets_come_from_the_same_sums(station_frame):
+    acc = CorrelationAccumulator().update(station_frame)
+    subset = ['WD', 'GHI', 'WS']
+    pd.testing.assert_frame_equal(acc.correlation(subset), station_frame[subset].corr(),
+                                  rtol=1e-10, atol=1e-12)
+
+
+def test_large_offsets_stay_accurate():
+    rng = np.random.default_rng(0)
+    x = 1e6 + rng.normal(size=5000)
+    df = pd.DataFrame({'a': x, 'b': x + rng.normal(scale=0.1, size=5000)})
+    acc = CorrelationAccumulator(['a', 'b'])
+    for start in range(0, 5000, 1000):
+        acc.update(df.iloc[start:start + 1000])
+    assert acc.correlation().loc['a', 'b'] == pytest.approx(df['a'].corr(df['b']), rel=1e-9)
+
+
+def test_constant_column_gives_nan():
+    df = pd.DataFrame({'a': [1.0, 2.0, 3.0], 'b': [5.0, 5.0, 5.0]})
+    corr = correlation_matrix(df, ['a', 'b'])
+    assert np.isnan(corr.loc['a', 'b']) and np.isnan(corr.loc['b', 'b'])
+
+
+def test_file_accumulator_is_cached(station_csv, station_frame, monkeypatch):
+    calls = []
+    iter_chunks = correlation_engine.iter_chunks
+    monkeypatch.setattr(correlation_engine, 'iter_chunks',
+                        lambda *args, **kwargs: calls.append(args) or iter_chunks(*args, **kwargs))
+    acc = file_correlations(station_csv, chunksize=1000)
+    assert file_correlations(station_csv, chunksize=1000) is acc
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(acc.correlation(['GHI', 'DNI']),
+                                  station_frame[['GHI', 'DNI']].corr(), rtol=1e-10, atol=1e-12)
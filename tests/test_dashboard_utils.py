@@ -0,0 +1,40 @@
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dashboard'))
+
+from utils import filter_date_range, calculate_metrics, select_rollup_range
+import rollups
+
+
+def scan_filter(df, start_date, end_date):
+    """The original per-row date comparison used by the dashboard."""
+    mask = (df['Timestamp'].dt.date >= start_date) & (df['Timestamp'].dt.date <= end_date)
+    return df[mask]
+
+
+def test_filter_matches_per_row_scan(station_frame):
+    for start, end in [(date(2021, 8, 9), date(2021, 8, 9)),
+                       (date(2021, 8, 10), date(2021, 8, 11)),
+                       (date(2021, 8, 1), date(2021, 9, 1)),
+                       (date(2022, 1, 1), date(2022, 1, 2))]:
+        pd.testing.assert_frame_equal(filter_date_range(station_frame, start, end),
+                                      scan_filter(station_frame, start, end))
+
+
+def test_filter_accepts_second_resolution_timestamps(station_frame):
+    df = station_frame.assign(Timestamp=station_frame['Timestamp'].astype('datetime64[s]'))
+    result = filter_date_range(df, date(2021, 8, 10), date(2021, 8, 10))
+    assert len(result) == 24 * 60
+    assert result['Timestamp'].dt.date.eq(date(2021, 8, 10)).all()
+
+
+def test_metrics_from_rollup_match_raw(station_frame):
+    df = station_frame.drop(columns=['Comments'])
+    start, end = date(2021, 8, 10), date(2021, 8, 11)
+    daily = select_rollup_range(rollups.build_rollup(df, 'D'), start, end)
+    assert calculate_metrics(None, daily_rollup=daily) == calculate_metrics(
+        filter_date_range(df, start, end))
@@ -0,0 +1,146 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import data_cache
+import pytest
+from data_cache import DataCache, compact_by_default, copy_on_write_active, frame_nbytes
+
+
+def counting_loader(calls):
+    def loader(path):
+        calls.append(path)
+        return pd.read_csv(path)
+    return loader
+
+
+def write_frame(path, n_rows, value=1.0):
+    pd.DataFrame({'GHI': [value] * n_rows}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_hits_share_data_without_copies(tmp_path):
+    path = write_frame(tmp_path / 'a.csv', 100)
+    calls = []
+    cache = DataCache(budget_bytes=1 << 20)
+    loader = counting_loader(calls)
+    first = cache.get(path, loader)
+    second = cache.get(path, loader)
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+    assert np.shares_memory(first['GHI'].to_numpy(), second['GHI'].to_numpy())
+
+    # Caller modifications never reach the cached frame: they copy the
+    # touched column under copy-on-write and are rejected otherwise
+    if copy_on_write_active():
+        second.loc[0, 'GHI'] = -1.0
+    else:
+        with pytest.raises(ValueError):
+            second.loc[0, 'GHI'] = -1.0
+    assert cache.get(path, loader).loc[0, 'GHI'] == 1.0
+
+
+def test_caller_writes_do_not_reach_other_callers(tmp_path):
+    path = write_frame(tmp_path / 'a.csv', 100)
+    cache = DataCache(budget_bytes=1 << 20)
+    first = cache.get(path, pd.read_csv)
+    first['GHI'] = 0.0
+    first['Hour'] = 1
+    second = cache.get(path, pd.read_csv)
+    if copy_on_write_active():
+        second.iloc[:10, 0] = 5.0
+        values = second['GHI']
+        values.iloc[20] = 7.0
+    else:
+        with pytest.raises(ValueError):
+            second.iloc[:10, 0] = 5.0
+    third = cache.get(path, pd.read_csv)
+    assert (third['GHI'] == 1.0).all() and (first['GHI'] == 0.0).all()
+    assert list(third.columns) == ['GHI']
+
+
+@pytest.mark.skipif(data_cache.PANDAS_MAJOR != 2, reason='copy-on-write is only optional on pandas 2')
+def test_importing_leaves_copy_on_write_off():
+    assert pd.get_option('mode.copy_on_write') is False
+
+
+def test_changed_file_is_reloaded(tmp_path):
+    path = write_frame(tmp_path / 'a.csv', 10)
+    calls = []
+    cache = DataCache(budget_bytes=1 << 20)
+    loader = counting_loader(calls)
+    cache.get(path, loader)
+    write_frame(tmp_path / 'a.csv', 20, value=2.0)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    df = cache.get(path, loader)
+    assert len(df) == 20 and len(calls) == 2
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_lru_eviction_under_budget(tmp_path):
+    paths = [write_frame(tmp_path / f'{i}.csv', 1000) for i in range(3)]
+    entry_bytes = frame_nbytes(pd.read_csv(paths[0]))
+    calls = []
+    cache = DataCache(budget_bytes=2 * entry_bytes)
+    loader = counting_loader(calls)
+    cache.get(paths[0], loader)
+    cache.get(paths[1], loader)
+    cache.get(paths[0], loader)   # paths[1] is now least recently used
+    cache.get(paths[2], loader)
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['entries'] == 2
+    assert stats['bytes'] <= stats['budget_bytes']
+    cache.get(paths[0], loader)
+    assert calls.count(os.path.abspath(paths[1])) == 1
+    cache.get(paths[1], loader)
+    assert calls.count(os.path.abspath(paths[1])) == 2
+
+
+def test_oversized_frames_are_not_retained(tmp_path):
+    path = write_frame(tmp_path / 'a.csv', 1000)
+    cache = DataCache(budget_bytes=10)
+    assert len(cache.get(path, pd.read_csv)) == 1000
+    assert cache.stats()['entries'] == 0
+
+
+def test_concurrent_access(tmp_path):
+    paths = [write_frame(tmp_path / f'{i}.csv', 200) for i in range(4)]
+    cache = DataCache(budget_bytes=1 << 20)
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(50):
+                for path in paths:
+                    assert len(cache.get(path, pd.read_csv)) == 200
+        except Exception as exc:  # pragma: no cover - surfaced below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    stats = cache.stats()
+    assert stats['hits'] + stats['misses'] == 4 * 50 * len(paths)
+    assert stats['entries'] == len(paths)
+
+
+def test_compact_entries_are_separate(tmp_path):
+    path = write_frame(tmp_path / 'a.csv', 100)
+    cache = DataCache(budget_bytes=1 << 20)
+    full = cache.get(path, pd.read_csv)
+    compact = cache.get(path, pd.read_csv, compact=True)
+    assert full['GHI'].dtype == 'float64'
+    assert compact['GHI'].dtype == 'int8'
+    assert cache.stats()['entries'] == 2
+
+
+def test_compact_layout_is_the_default(monkeypatch):
+    monkeypatch.delenv('SOLAR_COMPACT_DTYPES', raising=False)
+    assert compact_by_default()
+    monkeypatch.setenv('SOLAR_COMPACT_DTYPES', '0')
+    assert not compact_by_default()
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from tests.conftest import make_station_frame
+from data_cleaner import (
+    clean_data, clean_solar_radiation, clean_weather_data, clean_module_data,
+    remove_statistical_outliers, CRITICAL_COLUMNS, KEY_COLUMNS
+)
+
+# Rows kept by clean_data from make_station_frame() (5000 rows, seed 0)
+KEPT_ROWS = 4834
+
+
+def stepwise_clean(df):
+    """Reference implementation chaining the individual cleaning steps."""
+    df_cleaned = df.dropna(subset=CRITICAL_COLUMNS)
+    df_cleaned = clean_solar_radiation(df_cleaned)
+    df_cleaned = clean_weather_data(df_cleaned)
+    df_cleaned = clean_module_data(df_cleaned)
+    return remove_statistical_outliers(df_cleaned, KEY_COLUMNS)
+
+
+def literal_clean(df):
+    """Independent reference with the thresholds written out (not the rule table)."""
+    df_cleaned = df.dropna(subset=['GHI', 'DNI', 'DHI', 'Tamb', 'WS', 'WD', 'RH'])
+    # GHI down to -10 is sensor error at night: kept, then clamped to 0
+    df_cleaned = df_cleaned[
+        df_cleaned['GHI'].between(-10, 1500) & df_cleaned['DNI'].between(0, 1500)
+        & df_cleaned['DHI'].between(0, 1500) & df_cleaned['Tamb'].between(-20, 60)
+        & df_cleaned['RH'].between(0, 100) & df_cleaned['WS'].between(0, 50)
+        & df_cleaned['WD'].between(0, 360)
+    ]
+    if 'ModA' in df.columns and 'ModB' in df.columns:
+        df_cleaned = df_cleaned[df_cleaned['ModA'].between(-20, 90)
+                                & df_cleaned['ModB'].between(-20, 90)]
+    df_cleaned = df_cleaned.copy()
+    df_cleaned.loc[df_cleaned['GHI'] < 0, 'GHI'] = 0
+    for col in ['GHI', 'DNI', 'DHI', 'WS', 'Tamb']:
+        mean, std = df_cleaned[col].mean(), df_cleaned[col].std()
+        df_cleaned = df_cleaned[df_cleaned[col].between(mean - 3 * std, mean + 3 * std)]
+    return df_cleaned
+
+
+def test_fused_cleaning_keeps_same_rows(station_frame):
+    cleaned = clean_data(station_frame)
+    pd.testing.assert_frame_equal(cleaned, stepwise_clean(station_frame))
+    pd.testing.assert_frame_equal(cleaned, literal_clean(station_frame))
+    # Pinned for the fixed seed, so a wrong rule table cannot pass unnoticed
+    assert len(cleaned) == KEPT_ROWS
+
+
+def test_fused_cleaning_across_seeds():
+    for seed in range(5):
+        df = make_station_frame(3000, seed=seed)
+        pd.testing.assert_frame_equal(clean_data(df), literal_clean(df))
+
+
+def test_negative_ghi_clamped(station_frame):
+    cleaned = clean_data(station_frame)
+    assert (cleaned['GHI'] >= 0).all()
+    clamped = station_frame['GHI'].lt(0) & station_frame.index.isin(cleaned.index)
+    assert clamped.any()
+    assert (cleaned.loc[clamped[clamped].index, 'GHI'] == 0).all()
+
+
+def test_without_module_columns(station_frame):
+    df = station_frame.drop(columns=['ModA', 'ModB'])
+    pd.testing.assert_frame_equal(clean_data(df), stepwise_clean(df))
+    pd.testing.assert_frame_equal(clean_data(df), literal_clean(df))
+
+
+def test_falls_back_to_basic_cleaning(station_frame):
+    df = station_frame.copy()
+    df['RH'] = 150.0
+    cleaned = clean_data(df)
+    assert len(cleaned) == len(df.dropna(subset=['GHI', 'DNI', 'DHI']))
+    assert (cleaned['GHI'] >= 0).all()
+    assert not np.isnan(cleaned['GHI']).any()
@@ -0,0 +1,90 @@
+import pandas as pd
+import pytest
+
+from data_cleaner import clean_data, clean_chunks
+from data_loader import (load_data, iter_chunks, compact_dtypes, memory_report, read_csv_typed,
+                         SENSOR_DTYPES)
+from data_validator import generate_validation_report, merge_validation_reports
+
+
+def test_iter_chunks_matches_full_load(station_csv):
+    full = load_data(station_csv)
+    chunks = list(iter_chunks(station_csv, chunksize=700))
+    assert len(chunks) == 8
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), full)
+
+
+def test_chunks_are_typed(station_csv):
+    chunk = next(iter_chunks(station_csv, chunksize=100))
+    assert pd.api.types.is_datetime64_any_dtype(chunk['Timestamp'])
+    for column, dtype in SENSOR_DTYPES.items():
+        assert chunk[column].dtype == dtype
+
+
+def test_chunked_validation_matches_full(station_csv):
+    full = generate_validation_report(load_data(station_csv))
+    merged = merge_validation_reports(
+        generate_validation_report(chunk) for chunk in iter_chunks(station_csv, chunksize=999)
+    )
+    assert merged['total_rows'] == full['total_rows']
+    assert merged['valid_rows'] == full['valid_rows']
+    assert merged['missing_values'] == full['missing_values']
+    assert merged['consistency_checks'] == full['consistency_checks']
+    for column, result in full['range_validations'].items():
+        assert merged['range_validations'][column]['out_of_range_count'] == result['out_of_range_count']
+        assert abs(merged['range_validations'][column]['percentage'] - result['percentage']) < 1e-9
+
+
+def test_chunked_cleaning_matches_full(station_csv):
+    full = clean_data(load_data(station_csv)).reset_index(drop=True)
+    chunked = clean_chunks(lambda: iter_chunks(station_csv, chunksize=999))
+    pd.testing.assert_frame_equal(chunked, full)
+
+
+def test_compact_layout(station_frame):
+    compact = compact_dtypes(station_frame)
+    assert 'Comments' not in compact.columns
+    assert compact['GHI'].dtype == 'float32'
+    assert compact['BP'].dtype == 'int16'
+    assert isinstance(compact['Cleaning'].dtype, pd.CategoricalDtype)
+    assert compact['Timestamp'].equals(station_frame['Timestamp'])
+    # Whole-unit wind direction fits int16; differences stay signed
+    whole = compact_dtypes(station_frame.assign(WD=station_frame['WD'].round()))
+    assert whole['WD'].dtype == 'int16'
+    assert (whole['WD'].diff().dropna() < 0).any()
+    assert (compact['BP'] - 1000).min() < 0
+    report = memory_report(compact, station_frame)
+    assert report.loc['Comments', 'dtype'] == 'dropped'
+    assert report.loc['total', 'bytes'] == compact.memory_usage(index=False, deep=True).sum()
+    assert report.loc['total', 'ratio'] < 0.6
+
+
+def country_summary(df):
+    """The country metrics Data_summary reports for a station frame."""
+    return {
+        'avg_ghi': df['GHI'].mean(),
+        'max_ghi': df['GHI'].max(),
+        'avg_temp': df['Tamb'].mean(),
+        'avg_humidity': df['RH'].mean(),
+        'avg_wind_speed': df['WS'].mean(),
+        'data_points': len(df),
+        'ghi_temp_corr': df['GHI'].corr(df['Tamb']),
+        'high_ghi_percentage': (df['GHI'] > 500).mean() * 100,
+    }
+
+
+def test_compact_summary_within_tolerance(station_frame):
+    cleaned = clean_data(station_frame.drop(columns=['Comments']))
+    full = country_summary(cleaned)
+    compact = country_summary(compact_dtypes(cleaned))
+    for key, value in full.items():
+        assert compact[key] == pytest.approx(value, rel=1e-5, abs=1e-4), key
+
+
+def test_reads_stop_at_end_offset(station_csv):
+    with open(station_csv, 'rb') as f:
+        end = sum(len(f.readline()) for _ in range(1001))  # header + 1000 rows
+    expected = read_csv_typed(station_csv).iloc[:1000]
+    pd.testing.assert_frame_equal(load_data(station_csv, end=end), expected)
+    chunks = list(iter_chunks(station_csv, chunksize=300, end=end))
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
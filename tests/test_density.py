@@ -0,0 +1,45 @@
+import numpy as np
+from scipy.stats import gaussian_kde
+
+from density import histogram_density, scott_bandwidth
+from visualization import histogram_figure
+from tests.conftest import make_station_frame
+
+
+def test_bars_match_numpy_histogram():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([np.zeros(2000), rng.gamma(2.0, 50.0, 8000)])
+    hist = histogram_density(values)
+    counts, edges = np.histogram(values, bins='auto')
+    assert np.array_equal(hist['edges'], edges)
+    assert np.array_equal(hist['counts'], counts)
+    assert hist['total'] == len(values)
+
+
+def test_curve_matches_direct_kde_scaled_to_counts():
+    rng = np.random.default_rng(1)
+    # A point mass at zero next to a skewed body, like night-time irradiance
+    values = np.round(np.concatenate([np.zeros(3000), rng.gamma(2.0, 150.0, 7000)]), 1)
+    hist = histogram_density(values)
+    bar_width = hist['edges'][1] - hist['edges'][0]
+    expected = gaussian_kde(values)(hist['support']) * len(values) * bar_width
+    assert np.isclose(hist['bandwidth'], scott_bandwidth(values))
+    assert np.abs(hist['curve'] - expected).max() < 0.01 * expected.max()
+    assert hist['support'][0] == values.min() and hist['support'][-1] == values.max()
+
+
+def test_nan_dropped_and_constant_column_has_no_curve():
+    hist = histogram_density([1.0, np.nan, 2.0, 3.0, np.inf])
+    assert hist['total'] == 3 and hist['counts'].sum() == 3
+    constant = histogram_density(np.full(100, 5.0))
+    assert constant['curve'] is None and constant['counts'].sum() == 100
+
+
+def test_histogram_figure_draws_bars_and_curve():
+    df = make_station_frame(3000)
+    fig = histogram_figure(df, 'GHI')
+    ax = fig.axes[0]
+    hist = histogram_density(df['GHI'].to_numpy())
+    assert len(ax.patches) == len(hist['counts'])
+    assert np.allclose([patch.get_height() for patch in ax.patches], hist['counts'])
+    assert len(ax.lines) == 1
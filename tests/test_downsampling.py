@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from downsampling import gap_markers, lttb_indices, minmax_indices, downsample_frame
+
+
+def noisy_series(n=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n, dtype='float64')
+    y = np.sin(x / 500) + rng.normal(0, 0.05, n)
+    y[1234] = 10.0   # isolated peak that must survive
+    return x, y
+
+
+def test_lttb_keeps_endpoints_and_peak():
+    x, y = noisy_series()
+    idx = lttb_indices(x, y, 500)
+    assert len(idx) == 500
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert np.all(np.diff(idx) > 0)
+    assert 1234 in idx
+
+
+def test_lttb_short_series_unchanged():
+    assert np.array_equal(lttb_indices([0, 1, 2], [1, 2, 3], 10), [0, 1, 2])
+
+
+def test_minmax_preserves_envelope():
+    x, y = noisy_series()
+    idx = minmax_indices(y, 100)
+    assert len(idx) <= 202
+    assert y[idx].max() == y.max() and y[idx].min() == y.min()
+
+
+def test_minmax_shares_indices_across_columns():
+    _, a = noisy_series(seed=1)
+    _, b = noisy_series(seed=2)
+    b[777] = -20.0
+    idx = minmax_indices(np.column_stack([a, b]), 50)
+    assert 1234 in idx and 777 in idx
+
+
+def test_downsample_frame_threshold_and_methods():
+    _, y = noisy_series()
+    df = pd.DataFrame({'Timestamp': pd.date_range('2022-01-01', periods=len(y), freq='min'),
+                       'GHI': y, 'DNI': y * 0.5, 'DHI': y * 0.2})
+    assert len(downsample_frame(df.iloc[:1000], 'Timestamp', ['GHI'])) == 1000
+    single = downsample_frame(df, 'Timestamp', ['GHI'], target=800)
+    assert len(single) == 800 and single['GHI'].max() == 10.0
+    multi = downsample_frame(df, 'Timestamp', ['GHI', 'DNI', 'DHI'], target=600)
+    assert len(multi) <= 600
+    assert multi['Timestamp'].is_monotonic_increasing
+
+
+def station_series(n=20_000, tz=None):
+    _, y = noisy_series(n)
+    return pd.DataFrame({'Timestamp': pd.date_range('2022-01-01', periods=n, freq='min', tz=tz),
+                         'GHI': y, 'DNI': y * 0.5})
+
+
+def test_unsorted_and_tz_aware_x_are_ordered_first():
+    df = station_series(tz='Africa/Lagos')
+    shuffled = df.sample(frac=1, random_state=0)
+    for method in ('lttb', 'minmax'):
+        columns = ['GHI'] if method == 'lttb' else ['GHI', 'DNI']
+        reduced = downsample_frame(shuffled, 'Timestamp', columns, target=600, method=method)
+        assert reduced['Timestamp'].is_monotonic_increasing
+        assert reduced['GHI'].max() == 10.0
+        expected = downsample_frame(df, 'Timestamp', columns, target=600, method=method)
+        assert list(reduced.index) == list(expected.index)
+
+
+def test_gaps_keep_a_missing_row_between_buckets():
+    df = station_series()
+    df.loc[5000:5999, 'GHI'] = np.nan
+    for method in ('lttb', 'minmax'):
+        reduced = downsample_frame(df, 'Timestamp', ['GHI'], target=500, method=method)
+        inside = reduced[(reduced.index >= 5000) & (reduced.index < 6000)]
+        assert len(inside) == 1 and inside['GHI'].isna().all()
+        # The line resumes on both sides of the gap
+        assert reduced.loc[reduced.index < 5000, 'GHI'].notna().all()
+        assert reduced.loc[reduced.index >= 6000, 'GHI'].notna().all()
+
+
+def test_gap_markers_only_where_selection_spans_missing_rows():
+    missing = np.zeros(20, dtype=bool)
+    missing[[3, 4, 12]] = True
+    assert list(gap_markers(missing, np.array([0, 2, 8, 15, 19]))) == [3, 12]
+    assert list(gap_markers(missing, np.array([0, 3, 19]))) == [4]
+    assert len(gap_markers(np.zeros(5, dtype=bool), np.array([0, 4]))) == 0
@@ -0,0 +1,116 @@
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from data_loader import compact_dtypes, load_data
+from export import (EXPORT_GRACE_SECONDS, ExportCache, export_file_name, iter_export_chunks,
+                    select_range, write_export)
+from tests.conftest import make_station_frame
+
+
+@pytest.fixture
+def cleaned_csv(tmp_path):
+    path = tmp_path / 'Alpha_cleaned_data.csv'
+    make_station_frame(3000).to_csv(path, index=False)
+    return str(path)
+
+
+def counting_loader(calls):
+    def loader(path):
+        calls.append(path)
+        return load_data(path, use_cache=False)
+    return loader
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'csv.gz', 'parquet'])
+def test_export_round_trips_the_source(tmp_path, cleaned_csv, fmt):
+    cache = ExportCache(root=str(tmp_path / 'exports'), chunksize=700)
+    path = cache.get(cleaned_csv, fmt)
+    expected = load_data(cleaned_csv, use_cache=False)
+    if fmt == 'parquet':
+        exported = pd.read_parquet(path)
+    else:
+        exported = pd.read_csv(path, parse_dates=['Timestamp'])
+    pd.testing.assert_frame_equal(exported, expected, check_dtype=False)
+
+
+def test_csv_export_keeps_source_timestamp_format(tmp_path, cleaned_csv):
+    path = ExportCache(root=str(tmp_path)).get(cleaned_csv, 'csv')
+    with open(path) as f:
+        f.readline()
+        assert f.readline().startswith('"2021-08-09 00:00:00",')
+
+
+def test_date_range_is_inclusive_of_end_day(cleaned_csv):
+    df = load_data(cleaned_csv, use_cache=False)
+    rows = select_range(df, '2021-08-10', '2021-08-10')
+    assert len(rows) == 24 * 60
+    assert rows['Timestamp'].dt.date.nunique() == 1
+    shuffled = df.sample(frac=1, random_state=0)
+    assert len(select_range(shuffled, '2021-08-10', '2021-08-10')) == 24 * 60
+    assert len(select_range(df, start_date='2021-08-11')) == len(df) - 2 * 24 * 60
+
+
+def test_exports_are_cached_per_range_and_format(tmp_path, cleaned_csv):
+    calls = []
+    cache = ExportCache(root=str(tmp_path / 'exports'))
+    loader = counting_loader(calls)
+    first = cache.get(cleaned_csv, 'csv', '2021-08-09', '2021-08-09', loader=loader)
+    assert cache.get(cleaned_csv, 'csv', '2021-08-09', '2021-08-09', loader=loader) == first
+    other = cache.get(cleaned_csv, 'parquet', '2021-08-09', '2021-08-09', loader=loader)
+    assert other != first
+    assert len(calls) == 2
+    assert cache.stats() == {'builds': 2, 'hits': 1}
+
+
+def test_concurrent_requests_build_once(tmp_path, cleaned_csv):
+    calls = []
+    cache = ExportCache(root=str(tmp_path / 'exports'))
+    loader = counting_loader(calls)
+    paths = []
+    threads = [threading.Thread(target=lambda: paths.append(cache.get(cleaned_csv, 'csv.gz',
+                                                                      loader=loader)))
+               for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and len(set(paths)) == 1
+
+
+def test_changed_source_supersedes_old_export(tmp_path, cleaned_csv):
+    root = tmp_path / 'exports'
+    cache = ExportCache(root=str(root))
+    old = cache.get(cleaned_csv, 'csv')
+    make_station_frame(100, seed=9).to_csv(cleaned_csv, index=False)
+    os.utime(cleaned_csv, ns=(0, os.stat(old).st_mtime_ns + 10**9))
+    new = cache.get(cleaned_csv, 'csv')
+    assert new != old and len(pd.read_csv(new)) == 100
+    # Other processes may still open the old export during the grace period
+    assert sorted(os.listdir(root)) == sorted(os.path.basename(p) for p in (old, new))
+    assert cache.stats() == {'builds': 2, 'hits': 0} and cache._building == {}
+
+    # Once it has been superseded for longer, the next build removes it
+    superseded_ns = os.stat(new).st_mtime_ns - (EXPORT_GRACE_SECONDS + 1) * 10**9
+    os.utime(old, ns=(superseded_ns, superseded_ns - 10**9))
+    os.utime(new, ns=(superseded_ns, superseded_ns))
+    make_station_frame(50, seed=10).to_csv(cleaned_csv, index=False)
+    latest = cache.get(cleaned_csv, 'csv')
+    assert sorted(os.listdir(root)) == sorted(os.path.basename(p) for p in (new, latest))
+
+
+def test_empty_range_and_compact_frames(tmp_path, cleaned_csv):
+    df = compact_dtypes(load_data(cleaned_csv, use_cache=False))
+    empty = write_export(iter_export_chunks(select_range(df, '2030-01-01', '2030-01-02')),
+                         str(tmp_path / 'empty.csv'))
+    assert list(pd.read_csv(empty).columns) == list(df.columns)
+    path = write_export(iter_export_chunks(df, 1000), str(tmp_path / 'compact.csv'))
+    assert pd.read_csv(path)['Cleaning'].sum() == df['Cleaning'].astype(int).sum()
+
+
+def test_export_file_name():
+    assert export_file_name('Benin', 'csv.gz') == 'Benin_cleaned_data.csv.gz'
+    assert (export_file_name('Benin', 'parquet', '2021-08-09', '2021-08-16')
+            == 'Benin_cleaned_data_2021-08-09_2021-08-16.parquet')
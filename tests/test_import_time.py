@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# Modules that must not load until a stage draws a chart or runs statistics
+PLOTTING_STACK = ['matplotlib', 'seaborn', 'scipy']
+
+
+def loaded_modules(module, cwd):
+    """Names in sys.modules after importing ``module`` in a fresh interpreter."""
+    code = f'import sys, {module}; print("\\n".join(sys.modules))'
+    result = subprocess.run([sys.executable, '-c', code], cwd=cwd, capture_output=True,
+                            text=True, check=True)
+    return set(result.stdout.split())
+
+
+def test_cli_import_skips_plotting_stack():
+    modules = loaded_modules('main', os.path.join(ROOT_DIR, 'src'))
+    assert 'main' in modules
+    assert [name for name in PLOTTING_STACK if name in modules] == []
+
+
+def test_summary_script_is_import_safe():
+    # Importing must not read station files or print results
+    result = subprocess.run([sys.executable, '-c', 'import Data_summary'],
+                            cwd=os.path.join(ROOT_DIR, 'src'), capture_output=True, text=True,
+                            check=True)
+    assert result.stdout == ''
+
+
+def test_app_import_skips_pyplot_and_seaborn():
+    pytest.importorskip('streamlit')
+    modules = loaded_modules('main', os.path.join(ROOT_DIR, 'app'))
+    assert 'streamlit' in modules
+    assert [name for name in ['matplotlib.pyplot', 'seaborn', 'scipy'] if name in modules] == []
@@ -0,0 +1,178 @@
+import os
+
+import pandas as pd
+import pytest
+
+import columnar_cache
+import incremental
+import main
+import rollups
+from data_cleaner import clean_data, clean_with_bounds, fit_outlier_bounds
+from data_loader import load_data
+from incremental import append_cleaned, complete_size, read_tail, read_watermark, watermark_path
+from main import process_dataset
+from tests.conftest import make_station_frame
+
+
+@pytest.fixture
+def raw(tmp_path):
+    return make_station_frame(3000, seed=4).drop(columns=['Comments'])
+
+
+def write_rows(path, df, append=False):
+    df.to_csv(path, mode='a' if append else 'w', header=not append, index=False)
+
+
+def test_fit_outlier_bounds_reproduces_clean_data(raw):
+    bounds = fit_outlier_bounds(raw)
+    pd.testing.assert_frame_equal(clean_with_bounds(raw, bounds), clean_data(raw))
+
+
+def test_read_tail_parses_appended_rows(tmp_path, raw):
+    path = str(tmp_path / 'station.csv')
+    write_rows(path, raw.iloc[:1000])
+    offset = complete_size(path)
+    write_rows(path, raw.iloc[1000:1500], append=True)
+    tail = read_tail(path, offset)
+    pd.testing.assert_frame_equal(tail, load_data(path, use_cache=False).iloc[1000:].reset_index(drop=True))
+    # Rows already covered by the watermark timestamp are skipped
+    after = raw['Timestamp'].iloc[1099].isoformat()
+    assert len(read_tail(path, offset, after=after)) == 400
+
+
+def test_incremental_run_appends_only_new_rows(tmp_path, raw):
+    source = str(tmp_path / 'station.csv')
+    output_dir = str(tmp_path / 'out')
+    write_rows(source, raw.iloc[:2000])
+    os.makedirs(output_dir)
+
+    first = process_dataset('Alpha', source, output_dir, incremental=True, chart_workers=1)
+    assert first['mode'] == 'full'
+    state = read_watermark(watermark_path(output_dir, 'Alpha'))
+    assert state['offset'] == os.path.getsize(source)
+
+    write_rows(source, raw.iloc[2000:], append=True)
+    second = process_dataset('Alpha', source, output_dir, incremental=True, chart_workers=1)
+    assert second['mode'] == 'incremental'
+    assert second['original_shape'][0] == 1000
+    assert second['validation_report']['total_rows'] == 3000
+
+    # History is untouched and new rows are cleaned with the stored bounds
+    bounds = fit_outlier_bounds(raw.iloc[:2000])
+    expected = pd.concat([clean_data(raw.iloc[:2000]),
+                          clean_with_bounds(raw.iloc[2000:].reset_index(drop=True), bounds)],
+                         ignore_index=True)
+    cleaned = load_data(second['cleaned_file'], use_cache=False)
+    pd.testing.assert_frame_equal(cleaned, expected, check_dtype=False)
+
+    # Derived files follow the appended CSV
+    if columnar_cache.pq is not None:
+        assert columnar_cache.is_fresh(second['cleaned_file'])
+        pd.testing.assert_frame_equal(load_data(second['cleaned_file']), cleaned, check_dtype=False)
+        stored = rollups.load_rollups(second['cleaned_file'])
+        pd.testing.assert_frame_equal(stored['daily'], rollups.build_rollup(cleaned, 'D'),
+                                      check_freq=False)
+
+    # Nothing new: no rows appended
+    third = process_dataset('Alpha', source, output_dir, incremental=True, chart_workers=1)
+    assert third['mode'] == 'incremental' and third['original_shape'][0] == 0
+
+
+def test_rewritten_source_triggers_full_run(tmp_path, raw):
+    source = str(tmp_path / 'station.csv')
+    output_dir = str(tmp_path / 'out')
+    os.makedirs(output_dir)
+    write_rows(source, raw.iloc[:2000])
+    process_dataset('Alpha', source, output_dir, incremental=True, chart_workers=1)
+    write_rows(source, raw.iloc[500:2500])
+    result = process_dataset('Alpha', source, output_dir, incremental=True, chart_workers=1)
+    assert result['mode'] == 'full'
+    assert result['original_shape'][0] == 2000
+
+
+def test_incremental_run_redraws_only_stale_charts(tmp_path, raw):
+    source = str(tmp_path / 'station.csv')
+    output_dir = str(tmp_path / 'out')
+    os.makedirs(output_dir)
+    write_rows(source, raw.iloc[:2000])
+    process_dataset('Alpha', source, output_dir, incremental=True, chart_workers=1)
+
+    write_rows(source, raw.iloc[2000:], append=True)
+    appended = process_dataset('Alpha', source, output_dir, incremental=True, chart_workers=1)
+    assert 'GHI_time_series.png' in appended['chart_timings']
+    assert 'appended_cleaned' not in appended
+
+    os.remove(os.path.join(output_dir, 'wind_rose.png'))
+    unchanged = process_dataset('Alpha', source, output_dir, incremental=True, chart_workers=1)
+    assert list(unchanged['chart_timings']) == ['wind_rose.png']
+    assert os.path.exists(os.path.join(output_dir, 'wind_rose.png'))
+
+
+def test_basic_cleaning_fallback_forces_full_runs(tmp_path, raw):
+    # No row passes the RH rule, so clean_data falls back to basic_cleaning
+    raw = raw.assign(RH=150.0)
+    source = str(tmp_path / 'station.csv')
+    output_dir = str(tmp_path / 'out')
+    os.makedirs(output_dir)
+    write_rows(source, raw.iloc[:2000])
+    process_dataset('Alpha', source, output_dir, incremental=True, charts=False)
+
+    write_rows(source, raw.iloc[2000:], append=True)
+    result = process_dataset('Alpha', source, output_dir, incremental=True, charts=False)
+    assert result['mode'] == 'full'
+    cleaned = load_data(result['cleaned_file'], use_cache=False)
+    pd.testing.assert_frame_equal(cleaned, clean_data(raw).reset_index(drop=True),
+                                  check_dtype=False)
+
+
+def test_rows_appended_during_a_full_run_are_left_for_the_next(tmp_path, raw, monkeypatch):
+    source = str(tmp_path / 'station.csv')
+    output_dir = str(tmp_path / 'out')
+    os.makedirs(output_dir)
+    write_rows(source, raw.iloc[:2000])
+
+    def offset_then_append(path):
+        offset = complete_size(path)
+        write_rows(source, raw.iloc[2000:2100], append=True)
+        return offset
+
+    monkeypatch.setattr(main, 'complete_size', offset_then_append)
+    first = process_dataset('Alpha', source, output_dir, incremental=True, charts=False)
+    assert first['validation_report']['total_rows'] == 2000
+    monkeypatch.undo()
+
+    # The last row is still being written
+    write_rows(source, raw.iloc[2100:2200], append=True)
+    os.truncate(source, os.path.getsize(source) - 1)
+    second = process_dataset('Alpha', source, output_dir, incremental=True, charts=False)
+    assert second['mode'] == 'incremental'
+    assert second['validation_report']['total_rows'] == 2199
+    cleaned = load_data(second['cleaned_file'], use_cache=False)
+    assert not cleaned['Timestamp'].duplicated().any()
+
+
+def test_interrupted_append_is_not_applied_twice(tmp_path, raw, monkeypatch):
+    source = str(tmp_path / 'station.csv')
+    output_dir = str(tmp_path / 'out')
+    os.makedirs(output_dir)
+    write_rows(source, raw.iloc[:2000])
+    process_dataset('Alpha', source, output_dir, incremental=True, charts=False)
+    write_rows(source, raw.iloc[2000:], append=True)
+
+    def append_then_crash(*args):
+        append_cleaned(*args)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(incremental, 'append_cleaned', append_then_crash)
+    with pytest.raises(KeyboardInterrupt):
+        process_dataset('Alpha', source, output_dir, incremental=True, charts=False)
+    monkeypatch.undo()
+
+    result = process_dataset('Alpha', source, output_dir, incremental=True, charts=False)
+    assert result['mode'] == 'incremental'
+    bounds = fit_outlier_bounds(raw.iloc[:2000])
+    expected = pd.concat([clean_data(raw.iloc[:2000]),
+                          clean_with_bounds(raw.iloc[2000:].reset_index(drop=True), bounds)],
+                         ignore_index=True)
+    pd.testing.assert_frame_equal(load_data(result['cleaned_file']), expected, check_dtype=False)
+    assert read_watermark(watermark_path(output_dir, 'Alpha')).get('pending') is None
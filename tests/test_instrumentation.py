@@ -0,0 +1,115 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+import instrumentation
+from instrumentation import (configure, in_context, instrumented, read_metrics, recent_records,
+                             records_frame, stage, station_context)
+from data_cleaner import clean_data
+from tests.conftest import make_station_frame
+
+
+@pytest.fixture(autouse=True)
+def isolated_records(monkeypatch):
+    # setenv records the original state, so values configure() writes to
+    # os.environ are undone after each test even when the variable was unset
+    for env in (instrumentation.METRICS_FILE_ENV, instrumentation.PROFILE_DIR_ENV,
+                instrumentation.PROFILE_STAGES_ENV):
+        monkeypatch.setenv(env, '')
+        monkeypatch.delenv(env)
+    instrumentation.clear_records()
+    yield
+    instrumentation.clear_records()
+
+
+def test_stage_records_timing_and_memory():
+    with stage('work', rows_in=10, label='x') as record:
+        record['rows_out'] = 7
+        sum(range(100_000))
+    (emitted,) = recent_records()
+    assert emitted['stage'] == 'work' and emitted['label'] == 'x'
+    assert emitted['rows_in'] == 10 and emitted['rows_out'] == 7
+    assert emitted['wall_s'] > 0 and emitted['cpu_s'] >= 0
+    assert emitted['max_rss_mb'] > 0
+    assert emitted['status'] == 'ok' and emitted['pid'] == os.getpid()
+
+
+def test_max_rss_is_none_without_resource(monkeypatch):
+    monkeypatch.setattr(instrumentation, 'resource', None)
+    with stage('work'):
+        pass
+    (emitted,) = recent_records()
+    assert emitted['max_rss_mb'] is None and emitted['status'] == 'ok'
+
+
+def test_cpu_time_includes_pool_threads():
+    def spin():
+        deadline = time.thread_time() + 0.2
+        while time.thread_time() < deadline:
+            pass
+    with stage('fan_out'):
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(lambda _: spin(), range(2)))
+    (emitted,) = recent_records()
+    assert emitted['cpu_s'] >= 0.35
+
+
+def test_failed_stage_is_recorded_and_reraised():
+    with pytest.raises(ValueError):
+        with stage('broken'):
+            raise ValueError('boom')
+    assert recent_records()[-1]['status'] == 'error'
+
+
+def test_decorator_counts_rows_of_cleaned_frame():
+    df = make_station_frame(2000)
+    cleaned = clean_data(df)
+    record = [r for r in recent_records() if r['stage'] == 'data_cleaner.clean_data'][-1]
+    assert record['rows_in'] == len(df)
+    assert record['rows_out'] == len(cleaned)
+
+
+def test_station_context_follows_thread_pool_calls():
+    @instrumented('job')
+    def job(df):
+        return df
+
+    with station_context('Benin'):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(in_context(job), [pd.DataFrame({'a': [1]})] * 3))
+    assert [r['station'] for r in recent_records()] == ['Benin'] * 3
+    assert recent_records('Togo') == []
+
+
+def test_records_are_appended_as_json_lines(tmp_path):
+    path = tmp_path / 'metrics.jsonl'
+    configure(metrics_file=str(path))
+    with station_context('Togo'):
+        with stage('first'):
+            pass
+        with stage('second'):
+            pass
+    metrics = read_metrics(path)
+    assert list(metrics['stage']) == ['first', 'second']
+    assert list(metrics['station']) == ['Togo', 'Togo']
+    assert list(metrics.columns[:4]) == ['station', 'stage', 'wall_s', 'cpu_s']
+
+
+def test_selected_stage_is_profiled(tmp_path):
+    configure(profile_dir=str(tmp_path / 'profiles'), profile_stages=['outer'])
+    with stage('outer'):
+        with stage('inner'):
+            sum(range(1000))
+    with stage('other'):
+        pass
+    records = {r['stage']: r for r in recent_records()}
+    assert 'profile' not in records['inner'] and 'profile' not in records['other']
+    assert os.path.exists(records['outer']['profile'])
+    assert os.listdir(tmp_path / 'profiles') == [os.path.basename(records['outer']['profile'])]
+
+
+def test_records_frame_is_empty_without_records():
+    frame = records_frame([])
+    assert frame.empty and 'wall_s' in frame.columns
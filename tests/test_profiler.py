@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from data_validator import generate_validation_report
+from profiler import (ColumnProfile, DataProfile, load_profile, profile_chunks, profile_frame,
+                      profile_table, save_profile)
+from tests.conftest import make_station_frame
+
+
+def z_outliers(values):
+    values = values[~np.isnan(values)]
+    return int((np.abs(values - values.mean()) > 3 * values.std()).sum())
+
+
+def test_profile_matches_pandas_scans():
+    df = make_station_frame(4000)
+    result = profile_frame(df).result()
+    table = profile_table(result)
+    numeric = df.select_dtypes(include=[np.number])
+    described = numeric.describe()
+    assert result['rows'] == len(df)
+    assert result['complete_rows'] == len(df.dropna())
+    assert result['missing'] == df.isnull().sum().to_dict()
+    assert table['negative'].to_dict() == numeric.lt(0).sum().to_dict()
+    for column in ['GHI', 'Tamb', 'WS']:
+        assert table.loc[column, 'count'] == described.loc['count', column]
+        assert np.isclose(table.loc[column, 'mean'], described.loc['mean', column])
+        assert np.isclose(table.loc[column, 'std'], described.loc['std', column])
+        assert table.loc[column, 'min'] == described.loc['min', column]
+        assert table.loc[column, 'max'] == described.loc['max', column]
+        assert table.loc[column, 'z_outliers'] == z_outliers(df[column].to_numpy('float64'))
+        assert table.loc[column, 'z_outliers_exact']
+
+
+def test_quantiles_within_sketch_error():
+    values = np.random.default_rng(0).normal(size=50_000)
+    stats = ColumnProfile(error=0.01).update(values).result()
+    for q in (0.25, 0.5, 0.75):
+        rank = (values <= stats[f'{q:.0%}']).mean()
+        assert abs(rank - q) < 0.02
+
+
+def test_chunked_profiles_merge_to_whole():
+    df = make_station_frame(6000, seed=3)
+    whole = profile_frame(df).result()
+    merged = DataProfile()
+    for start in range(0, len(df), 1000):
+        merged.merge(profile_frame(df.iloc[start:start + 1000]))
+    streamed = profile_chunks(df.iloc[start:start + 1500] for start in range(0, len(df), 1500))
+    for result in (merged.result(), streamed.result()):
+        assert result['missing'] == whole['missing']
+        assert result['complete_rows'] == whole['complete_rows']
+        for column in ['GHI', 'RH', 'WD']:
+            ours, reference = result['columns'][column], whole['columns'][column]
+            assert ours['count'] == reference['count']
+            assert ours['z_outliers'] == reference['z_outliers']
+            assert np.isclose(ours['std'], reference['std'])
+
+
+def test_small_tails_fall_back_to_sketch_estimate():
+    rng = np.random.default_rng(1)
+    values = np.concatenate([rng.normal(size=20_000), rng.normal(0, 20, 500)])
+    exact = ColumnProfile().update(values).result()
+    approximate = ColumnProfile(tail_size=10).update(values).result()
+    assert exact['z_outliers_exact'] and exact['z_outliers'] == z_outliers(values)
+    assert not approximate['z_outliers_exact']
+    assert abs(approximate['z_outliers'] - exact['z_outliers']) < 0.02 * len(values)
+
+
+def test_validation_report_reuses_profile_counts():
+    df = make_station_frame(3000)
+    assert (generate_validation_report(df, profile=profile_frame(df))
+            == generate_validation_report(df))
+
+
+def test_profile_round_trips_through_json(tmp_path):
+    df = pd.DataFrame({'GHI': [np.nan, np.nan], 'Tamb': [1.0, 2.0]})
+    path = save_profile(profile_frame(df).result(), str(tmp_path / 'profile.json'))
+    loaded = load_profile(path)
+    assert loaded['columns']['GHI']['mean'] is None
+    assert loaded['columns']['Tamb']['count'] == 2
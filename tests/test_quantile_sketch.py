@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_cleaner import iqr_bounds, remove_iqr_outliers
+from data_loader import load_data
+from quantile_sketch import KLLSketch, column_sketches
+
+OUTPUTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'outputs')
+COUNTRIES = ['Benin', 'Sierra Leone', 'Togo']
+COLUMNS = ['GHI', 'DNI', 'DHI', 'ModA', 'ModB', 'Tamb', 'RH', 'WS', 'WD']
+
+
+def country_frame(country):
+    path = os.path.join(OUTPUTS_DIR, country, f'{country}_cleaned_data.csv')
+    if not os.path.exists(path):
+        pytest.skip(f'no cleaned data for {country}')
+    return load_data(path, use_cache=False)
+
+
+def rank_interval(values, estimate):
+    """Return the [lower, upper] exact rank fraction covered by ``estimate``."""
+    ordered = np.sort(values[~np.isnan(values)])
+    low = np.searchsorted(ordered, estimate, side='left') / len(ordered)
+    high = np.searchsorted(ordered, estimate, side='right') / len(ordered)
+    return low, high
+
+
+def test_sketch_quantiles_within_error_bound():
+    values = np.random.default_rng(3).lognormal(3, 1, 200_000)
+    sketch = KLLSketch(error=0.01)
+    for part in np.array_split(values, 9):
+        sketch.update(part)
+    for q in (0.05, 0.25, 0.5, 0.75, 0.95):
+        low, high = rank_interval(values, sketch.quantile(q))
+        assert low - sketch.error <= q <= high + sketch.error
+    assert sketch.retained < len(values) // 50
+
+
+def test_merged_sketches_cover_both_inputs():
+    rng = np.random.default_rng(4)
+    left, right = rng.normal(0, 1, 50_000), rng.normal(10, 1, 50_000)
+    merged = KLLSketch(error=0.01).update(left).merge(KLLSketch(error=0.01, seed=1).update(right))
+    assert merged.count == 100_000
+    assert merged.min == min(left.min(), right.min())
+    low, high = rank_interval(np.concatenate([left, right]), merged.quantile(0.5))
+    assert low - merged.error <= 0.5 <= high + merged.error
+
+
+@pytest.mark.parametrize('country', COUNTRIES)
+def test_quartiles_match_pandas_on_country_data(country):
+    df = country_frame(country)
+    error = 0.005
+    chunks = (df.iloc[i:i + 5000] for i in range(0, len(df), 5000))
+    sketches = column_sketches(chunks, COLUMNS, error)
+    for col in COLUMNS:
+        values = df[col].to_numpy()
+        for q in (0.25, 0.75):
+            estimate = sketches[col].quantile(q)
+            low, high = rank_interval(values, estimate)
+            assert low - sketches[col].error <= q <= high + sketches[col].error, (col, q)
+            # Estimates stay within the value range spanned by the rank error
+            exact_low, exact_high = np.quantile(values, [q - 2 * error, q + 2 * error])
+            assert exact_low <= estimate <= exact_high
+
+
+@pytest.mark.parametrize('country', COUNTRIES)
+def test_iqr_filter_close_to_exact(country):
+    df = country_frame(country)
+    exact = remove_iqr_outliers(df, COLUMNS, error=None)
+    approx = remove_iqr_outliers(df, COLUMNS, error=0.005)
+    assert abs(len(exact) - len(approx)) <= 0.01 * len(df)
+
+
+def test_exact_mode_matches_pandas_filter(station_frame):
+    df = station_frame.drop(columns=['Comments']).dropna()
+    assert len(df)
+    numeric = df.select_dtypes(include=[np.number])
+    Q1, Q3 = numeric.quantile(0.25), numeric.quantile(0.75)
+    IQR = Q3 - Q1
+    expected = df[~((numeric < (Q1 - 3 * IQR)) | (numeric > (Q3 + 3 * IQR))).any(axis=1)]
+    pd.testing.assert_frame_equal(remove_iqr_outliers(df, error=None), expected)
+
+
+def test_iqr_bounds_single_pass_over_chunks(station_frame):
+    chunks = iter([station_frame.iloc[:2500], station_frame.iloc[2500:]])
+    bounds = iqr_bounds(chunks, ['GHI', 'Tamb'])
+    assert set(bounds) == {'GHI', 'Tamb'}
+    assert all(low < high for low, high in bounds.values())
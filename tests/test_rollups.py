@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import columnar_cache
+import rollups
+from data_cleaner import clean_data
+
+
+@pytest.fixture
+def cleaned_frame(station_frame):
+    return clean_data(station_frame.drop(columns=['Comments']))
+
+
+def test_combine_matches_pandas(cleaned_frame):
+    stats = rollups.combine(rollups.build_rollup(cleaned_frame, 'h'), ['GHI', 'Tamb', 'RH'])
+    for col in ['GHI', 'Tamb', 'RH']:
+        series = cleaned_frame[col]
+        assert stats[col]['count'] == series.count()
+        assert stats[col]['mean'] == pytest.approx(series.mean())
+        assert stats[col]['std'] == pytest.approx(series.std(), rel=1e-9)
+        assert stats[col]['min'] == series.min()
+        assert stats[col]['max'] == series.max()
+
+
+def test_merge_rollups_matches_single_build(cleaned_frame):
+    # Split inside an hour so the merge has to combine a shared period
+    head, tail = cleaned_frame.iloc[:1234], cleaned_frame.iloc[1234:]
+    merged = rollups.merge_rollups(rollups.build_rollup(head, 'h'), rollups.build_rollup(tail, 'h'))
+    expected = rollups.build_rollup(cleaned_frame, 'h')
+    pd.testing.assert_frame_equal(merged, expected, check_names=False, check_freq=False)
+
+
+def test_moments_keep_precision_for_small_spread_on_large_level():
+    # BP-like readings: a large level with a tiny spread, over months of minute data
+    n = 200_000
+    rng = np.random.default_rng(0)
+    timestamps = pd.date_range('2021-01-01', periods=n, freq='min')
+    df = pd.DataFrame({'Timestamp': timestamps, 'GHI': 1e6 + rng.normal(0, 0.01, n),
+                       'Tamb': 1e6 + rng.normal(0, 0.01, n)})
+    df['Tamb'] += 0.5 * (df['GHI'] - 1e6)
+    half = n // 2 + 17
+    daily = rollups.merge_rollups(rollups.build_rollup(df.iloc[:half], 'D'),
+                                  rollups.build_rollup(df.iloc[half:], 'D'))
+    stats = rollups.combine(daily, ['GHI'])
+    assert stats['GHI']['std'] == pytest.approx(df['GHI'].std(), rel=1e-6)
+    assert rollups.correlation(daily, 'GHI', 'Tamb') == pytest.approx(
+        df['GHI'].corr(df['Tamb']), rel=1e-6)
+
+
+def test_correlation_and_high_ghi_share(cleaned_frame):
+    daily = rollups.build_rollup(cleaned_frame, 'D')
+    assert rollups.correlation(daily, 'GHI', 'Tamb') == pytest.approx(
+        cleaned_frame['GHI'].corr(cleaned_frame['Tamb']))
+    share = rollups.combine(daily, ['GHI>500'])['GHI>500']['mean']
+    assert share == pytest.approx((cleaned_frame['GHI'] > 500).mean())
+
+
+def test_hourly_profile_matches_groupby(cleaned_frame):
+    profile = rollups.hourly_profile(rollups.build_rollup(cleaned_frame, 'h'), 'GHI')
+    expected = cleaned_frame.groupby(cleaned_frame['Timestamp'].dt.hour)['GHI'].mean()
+    np.testing.assert_allclose(profile.to_numpy(), expected.to_numpy())
+    assert list(profile.index) == list(expected.index)
+
+
+def test_select_range_is_half_open(cleaned_frame):
+    daily = rollups.build_rollup(cleaned_frame, 'D')
+    selected = rollups.select_range(daily, '2021-08-10', '2021-08-11')
+    assert list(selected.index) == [pd.Timestamp('2021-08-10')]
+
+
+@pytest.mark.skipif(columnar_cache.pq is None, reason="pyarrow not installed")
+def test_saved_rollups_follow_source_freshness(tmp_path, cleaned_frame):
+    csv_path = str(tmp_path / 'cleaned.csv')
+    cleaned_frame.to_csv(csv_path, index=False)
+    built = rollups.save_rollups(cleaned_frame, csv_path)
+    loaded = rollups.load_rollups(csv_path)
+    for grain in rollups.GRAINS:
+        pd.testing.assert_frame_equal(loaded[grain], built[grain], check_freq=False)
+
+    with open(csv_path, 'a') as f:
+        f.write('\n')
+    assert rollups.load_rollups(csv_path) is None
+
+
+@pytest.mark.skipif(columnar_cache.pq is None, reason="pyarrow not installed")
+def test_missing_rollup_file_is_stale(tmp_path, cleaned_frame):
+    csv_path = str(tmp_path / 'cleaned.csv')
+    cleaned_frame.to_csv(csv_path, index=False)
+    rollups.save_rollups(cleaned_frame, csv_path)
+    os.remove(rollups.rollup_path(csv_path, 'hourly'))
+    assert rollups.load_rollups(csv_path) is None
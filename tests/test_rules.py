@@ -0,0 +1,46 @@
+import numpy as np
+
+from data_cleaner import clean_data
+from data_validator import generate_validation_report
+from rules import RANGE_RULES, evaluate_rules
+
+
+def test_violation_counts_match_pandas(station_frame):
+    evaluation = evaluate_rules(station_frame)
+    for rule in RANGE_RULES:
+        expected = (~station_frame[rule.column].between(rule.min_val, rule.max_val)).sum()
+        assert evaluation.violations[rule.column] == expected
+
+
+def test_consistency_checks_match_pandas(station_frame):
+    df = station_frame
+    consistency = evaluate_rules(df).consistency
+    assert consistency['GHI_vs_components'] == (df['GHI'] >= df['DNI'] + df['DHI']).sum()
+    assert consistency['temp_vs_humidity'] == ((df['Tamb'] > 40) & (df['RH'] > 90)).sum()
+    assert consistency['wind_direction'] == (df['WD'] < 0).sum() + (df['WD'] > 360).sum()
+
+
+def test_mask_keeps_only_rows_without_violations(station_frame):
+    evaluation = evaluate_rules(station_frame)
+    kept = station_frame[evaluation.mask]
+    for rule in RANGE_RULES:
+        assert kept[rule.column].between(rule.min_val, rule.max_val).all()
+    # Every reported violation is a row the cleaner drops
+    assert (~evaluation.mask).sum() >= max(evaluation.violations.values())
+
+
+def test_report_and_cleaning_agree_on_ghi(station_frame):
+    df = station_frame.copy()
+    df.loc[df.index[:3], 'GHI'] = -5.0    # slight sensor offset: kept, clamped
+    df.loc[df.index[3:6], 'GHI'] = -50.0  # fault: reported and dropped
+    report = generate_validation_report(df)
+    cleaned = clean_data(df)
+    assert report['range_validations']['GHI']['out_of_range_count'] == (df['GHI'] < -10).sum()
+    assert not cleaned.index.isin(df.index[3:6]).any()
+    assert (cleaned['GHI'] >= 0).all()
+
+
+def test_module_rules_require_both_columns(station_frame):
+    evaluation = evaluate_rules(station_frame.drop(columns=['ModB']))
+    assert 'ModA' not in evaluation.violations
+    assert np.array_equal(evaluation.values['GHI'] >= 0, ~np.isnan(evaluation.values['GHI']))
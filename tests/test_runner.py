@@ -0,0 +1,60 @@
+import os
+
+from tests.conftest import make_station_frame
+import main
+from main import run_stations, summarize_results
+
+
+def write_station(tmp_path, name, n_rows, seed):
+    path = tmp_path / f'{name}.csv'
+    make_station_frame(n_rows, seed=seed).to_csv(path, index=False)
+    return str(path)
+
+
+def test_parallel_run_isolates_failures(tmp_path):
+    datasets = {
+        'Alpha': write_station(tmp_path, 'alpha', 1500, 1),
+        'Broken': str(tmp_path / 'missing.csv'),
+        'Gamma': write_station(tmp_path, 'gamma', 1200, 2),
+    }
+    results = run_stations(datasets, str(tmp_path / 'outputs'), workers=2)
+    assert list(results) == ['Alpha', 'Broken', 'Gamma']
+    assert results['Broken']['status'] == 'failed'
+    assert 'FileNotFoundError' in results['Broken']['error']
+    for country, n_rows in (('Alpha', 1500), ('Gamma', 1200)):
+        assert results[country]['status'] == 'ok'
+        assert results[country]['original_shape'][0] == n_rows
+        assert os.path.exists(results[country]['cleaned_file'])
+
+    summary = summarize_results(results)
+    assert list(summary['country']) == ['Alpha', 'Broken', 'Gamma']
+    assert list(summary['status']) == ['ok', 'failed', 'ok']
+
+
+def test_single_worker_runs_in_process(tmp_path):
+    datasets = {'Alpha': write_station(tmp_path, 'alpha', 800, 3)}
+    results = run_stations(datasets, str(tmp_path / 'outputs'), workers=1, outlier_mode='joint')
+    assert results['Alpha']['status'] == 'ok'
+    assert results['Alpha']['cleaned_shape'][0] <= 800
+
+
+def test_parallel_output_is_printed_per_station(tmp_path, capsys):
+    datasets = {
+        'Alpha': write_station(tmp_path, 'alpha', 600, 4),
+        'Gamma': write_station(tmp_path, 'gamma', 600, 5),
+    }
+    run_stations(datasets, str(tmp_path / 'outputs'), workers=2, charts=False)
+    lines = [line for line in capsys.readouterr().out.splitlines() if line]
+    assert lines and all(line.startswith(('[Alpha] ', '[Gamma] ')) for line in lines)
+    # Each station's output is one contiguous block
+    owners = [line.split(']')[0] for line in lines]
+    assert sum(a != b for a, b in zip(owners, owners[1:])) == 1
+
+
+def test_cli_exit_status_reports_failed_stations(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, 'DATASETS', {'Alpha': write_station(tmp_path, 'alpha', 600, 6)})
+    assert main.main(['--workers', '1', '--no-charts']) == 0
+    monkeypatch.setattr(main, 'DATASETS', {'Alpha': write_station(tmp_path, 'alpha', 600, 6),
+                                           'Broken': str(tmp_path / 'missing.csv')})
+    assert main.main(['--workers', '1', '--no-charts']) == 1
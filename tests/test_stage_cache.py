@@ -0,0 +1,141 @@
+import os
+import sys
+
+from main import process_dataset
+from stage_cache import ArtifactStore, Pipeline, Stage, SOURCE_PREFIX
+from tests.conftest import make_station_frame
+
+
+def read_rows(path):
+    with open(path) as f:
+        return f.read().splitlines()
+
+
+def count_rows(rows):
+    return len(rows)
+
+
+def double(n):
+    return 2 * n
+
+
+def toy_stages(source, version=None):
+    return [
+        Stage('rows', read_rows, (SOURCE_PREFIX + source,)),
+        Stage('count', count_rows, ('rows',)),
+        Stage('double', double, ('count',), version=version),
+    ]
+
+
+def test_reruns_hit_and_changes_invalidate_downstream(tmp_path):
+    source = tmp_path / 'source.txt'
+    source.write_text('a\nb\n')
+    store = ArtifactStore(str(tmp_path / 'store'))
+
+    first = Pipeline(toy_stages(str(source)), store)
+    assert first.get('double') == 4
+    assert first.report == {'hits': [], 'misses': ['rows', 'count', 'double']}
+
+    # Unchanged inputs: the target is served without touching upstream stages
+    second = Pipeline(toy_stages(str(source)), store)
+    assert second.get('double') == 4
+    assert second.report == {'hits': ['double'], 'misses': []}
+
+    # A new code version only reruns that stage
+    third = Pipeline(toy_stages(str(source), version=2), store)
+    assert third.get('double') == 4
+    assert third.report == {'hits': ['count'], 'misses': ['double']}
+
+    # Changed content reruns everything downstream of the source
+    source.write_text('a\nb\nc\n')
+    fourth = Pipeline(toy_stages(str(source), version=2), store)
+    assert fourth.get('double') == 6
+    assert fourth.report['misses'] == ['rows', 'count', 'double']
+
+
+def test_edited_dependency_invalidates_stage(tmp_path, monkeypatch):
+    package = tmp_path / 'toy'
+    package.mkdir()
+    (package / 'toy_limits.py').write_text('LIMIT = 1\n')
+    (package / 'toy_helpers.py').write_text('from toy_limits import LIMIT\n\n'
+                                            'def clip(n):\n    return min(n, LIMIT)\n')
+    (package / 'toy_stage.py').write_text('from toy_helpers import clip\n\n'
+                                          'def clipped(n):\n    return clip(n)\n')
+    monkeypatch.syspath_prepend(str(package))
+    import toy_stage
+    monkeypatch.delitem(sys.modules, 'toy_stage')
+    monkeypatch.delitem(sys.modules, 'toy_helpers')
+    monkeypatch.delitem(sys.modules, 'toy_limits')
+
+    source = tmp_path / 'source.txt'
+    source.write_text('a\nb\n')
+    store = ArtifactStore(str(tmp_path / 'store'))
+
+    def stages():
+        return toy_stages(str(source)) + [Stage('clipped', toy_stage.clipped, ('count',))]
+
+    Pipeline(stages(), store).get('clipped')
+    assert Pipeline(stages(), store).is_cached('clipped')
+
+    # A module reached only through another module's import still counts
+    (package / 'toy_limits.py').write_text('LIMIT = 10\n')
+    pipeline = Pipeline(stages(), store)
+    assert not pipeline.is_cached('clipped')
+    pipeline.get('clipped')
+    assert pipeline.report == {'hits': ['count'], 'misses': ['clipped']}
+
+
+def test_missing_outputs_force_a_rerun(tmp_path):
+    output = tmp_path / 'out.txt'
+
+    def write(path):
+        with open(path, 'w') as f:
+            f.write('x')
+        return path
+
+    stages = [Stage('write', write, (), {'path': str(output)}, outputs=(str(output),))]
+    store = ArtifactStore(str(tmp_path / 'store'))
+    Pipeline(stages, store).get('write')
+    assert Pipeline(stages, store).is_cached('write')
+    os.remove(output)
+    pipeline = Pipeline(stages, store)
+    pipeline.get('write')
+    assert pipeline.report['misses'] == ['write'] and output.exists()
+
+
+def test_station_rerun_skips_unchanged_stages(tmp_path):
+    source = tmp_path / 'station.csv'
+    make_station_frame(1500, seed=5).to_csv(source, index=False)
+    output_dir = tmp_path / 'out'
+    output_dir.mkdir()
+
+    first = process_dataset('Alpha', str(source), str(output_dir), chart_workers=2)
+    assert first['stage_report']['hits'] == []
+    assert len(first['chart_timings']) == 13
+
+    second = process_dataset('Alpha', str(source), str(output_dir), chart_workers=2)
+    assert second['stage_report']['misses'] == []
+    assert second['chart_timings'] == {}
+    assert second['cleaned_shape'] == first['cleaned_shape']
+    assert second['validation_report'] == first['validation_report']
+
+    # A deleted chart is the only thing rebuilt
+    os.remove(output_dir / 'wind_rose.png')
+    third = process_dataset('Alpha', str(source), str(output_dir), chart_workers=2)
+    assert third['stage_report']['misses'] == ['chart:wind_rose.png']
+    assert (output_dir / 'wind_rose.png').exists()
+
+
+def test_station_run_without_charts(tmp_path):
+    source = tmp_path / 'station.csv'
+    make_station_frame(1500, seed=6).to_csv(source, index=False)
+    output_dir = tmp_path / 'out'
+    output_dir.mkdir()
+
+    result = process_dataset('Alpha', str(source), str(output_dir), charts=False)
+    assert result['chart_timings'] == {}
+    assert sorted(result['stage_report']['misses']) == ['profile', 'report', 'save']
+    assert os.path.exists(result['cleaned_file'])
+    assert not list(output_dir.glob('*.png'))
+    # The cleaned frame is kept once, as the cleaned CSV and its cache
+    assert not list((output_dir / '.stages').glob('clean-*'))
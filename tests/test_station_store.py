@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import station_store
+from data_loader import load_data, read_csv_typed
+from main import process_dataset
+from station_store import STORE_ENV, StationStore
+from tests.conftest import make_station_frame
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StationStore(str(tmp_path / 'store'))
+
+
+def test_station_round_trips_in_source_order(store, station_csv):
+    df = read_csv_typed(station_csv)
+    store.write_station('Alpha', df, source=station_csv)
+    pd.testing.assert_frame_equal(store.read('Alpha'), df)
+    assert store.stations() == ['Alpha']
+    assert store.columns('Alpha')[:2] == ['GHI', 'DNI']
+    assert store.time_range('Alpha') == (df['Timestamp'].min(), df['Timestamp'].max())
+
+
+def test_range_reads_map_only_requested_columns(store):
+    df = make_station_frame(3000)
+    store.write_station('Alpha', df)
+    rows = store.read('Alpha', ['Timestamp', 'GHI'], '2021-08-10', '2021-08-10 12:00', copy=False)
+    expected = df[(df['Timestamp'] >= '2021-08-10') & (df['Timestamp'] < '2021-08-10 12:00')]
+    assert len(rows) == 12 * 60
+    np.testing.assert_array_equal(rows['GHI'], expected['GHI'])
+    assert not rows['GHI'].to_numpy().flags.writeable
+    assert rows['GHI'].to_numpy().base is not None
+
+
+def test_unsorted_index_filters_by_mask(store):
+    df = make_station_frame(4000).sample(frac=1, random_state=0).reset_index(drop=True)
+    store.write_station('Alpha', df)
+    rows = store.read('Alpha', ['Timestamp'], '2021-08-10', '2021-08-11')
+    assert len(rows) == 24 * 60 and rows['Timestamp'].dt.date.nunique() == 1
+
+
+def test_query_across_stations(store):
+    alpha, beta = make_station_frame(3000, seed=1), make_station_frame(3000, seed=2)
+    store.write_station('Alpha', alpha)
+    store.write_station('Beta', beta.drop(columns=['Tamb']))
+
+    rows = store.query(['GHI', 'Tamb'], start='2021-08-09 06:00', end='2021-08-09 07:00')
+    assert list(rows.columns) == ['Station', 'Timestamp', 'GHI', 'Tamb']
+    assert rows.groupby('Station').size().to_dict() == {'Alpha': 60, 'Beta': 60}
+    assert rows.loc[rows['Station'] == 'Beta', 'Tamb'].isna().all()
+
+    means = store.query(['GHI', 'Tamb'], agg='mean')
+    assert np.isclose(means.loc['Alpha', 'GHI'], alpha['GHI'].mean())
+    assert np.isclose(means.loc['Beta', 'GHI'], beta['GHI'].mean())
+    assert np.isnan(means.loc['Beta', 'Tamb'])
+
+    daily = store.query('GHI', ['Alpha'], agg='max', freq='D')
+    expected = alpha.resample('D', on='Timestamp')['GHI'].max()
+    np.testing.assert_array_equal(daily['GHI'], expected)
+    assert list(daily['Timestamp']) == list(expected.index)
+
+
+def test_rewrite_replaces_version_and_keeps_old_maps_valid(store, monkeypatch):
+    store.write_station('Alpha', make_station_frame(1000, seed=1))
+    old = store.read('Alpha', ['GHI'], copy=False)
+    meta = store.meta('Alpha')
+    store.write_station('Alpha', make_station_frame(500, seed=2))
+    assert len(store.read('Alpha')) == 500
+    # A reader holding the superseded metadata can still map it
+    assert len(store._array(meta, 'GHI')) == 1000
+
+    monkeypatch.setattr(station_store, 'VERSION_GRACE_SECONDS', 0)
+    store.write_station('Alpha', make_station_frame(200, seed=3))
+    assert len(os.listdir(os.path.join(store.root, 'Alpha'))) == 2  # pointer + one version
+    assert len(old) == 1000 and not old['GHI'].isna().all()
+    assert len(store.read('Alpha', ['GHI'])) == 200
+
+
+def test_read_retries_when_version_is_deleted(store, monkeypatch):
+    store.write_station('Alpha', make_station_frame(1000, seed=1))
+    stale = store.meta('Alpha')
+    store.write_station('Alpha', make_station_frame(500, seed=2))
+    metas = iter([stale])
+    require = store._require
+    monkeypatch.setattr(store, '_require', lambda station: next(metas, None) or require(station))
+    monkeypatch.setattr(station_store, 'VERSION_GRACE_SECONDS', 0)
+    store._prune(os.path.join(store.root, 'Alpha'), store.meta('Alpha')['version'])
+    assert len(store.read('Alpha', ['GHI'])) == 500
+
+
+def test_load_data_uses_fresh_store(store, station_csv, monkeypatch):
+    df = read_csv_typed(station_csv)
+    store.write_station('Alpha', df, source=station_csv)
+    monkeypatch.setenv(STORE_ENV, store.root)
+    calls = []
+    read = store.read
+    monkeypatch.setattr(StationStore, 'read',
+                        lambda self, *args, **kwargs: calls.append(args) or read(*args, **kwargs))
+    pd.testing.assert_frame_equal(load_data(station_csv), df)
+    projected = load_data(station_csv, usecols=['GHI', 'Tamb'])
+    assert list(projected.columns) == ['GHI', 'Tamb']
+    assert len(calls) == 2
+
+    # Frames are writable by default; shared ones are views of the mapped pages
+    df = load_data(station_csv)
+    df.loc[df['GHI'] < 0, 'GHI'] = 0
+    df.iloc[0, 1] = 5.0
+    assert (store.read('Alpha', ['GHI'])['GHI'] < 0).any()
+    shared = load_data(station_csv, usecols=['GHI'], shared=True)
+    assert not shared['GHI'].to_numpy().flags.writeable
+
+    # A changed source falls back to parsing the file
+    make_station_frame(100, seed=4).to_csv(station_csv, index=False)
+    assert len(load_data(station_csv)) == 100
+    assert len(calls) == 5
+
+
+def test_pipeline_writes_cleaned_station_to_store(tmp_path, monkeypatch):
+    source = tmp_path / 'station.csv'
+    make_station_frame(1500, seed=6).to_csv(source, index=False)
+    output_dir = tmp_path / 'out'
+    output_dir.mkdir()
+    monkeypatch.setenv(STORE_ENV, str(tmp_path / 'store'))
+
+    result = process_dataset('Alpha', str(source), str(output_dir), charts=False)
+    store = StationStore(str(tmp_path / 'store'))
+    assert store.stations() == ['Alpha']
+    assert store.load_source(result['cleaned_file']) is not None
+    pd.testing.assert_frame_equal(store.read('Alpha'), read_csv_typed(result['cleaned_file']),
+                                  check_dtype=False)
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from data_cleaner import clean_chunks, clean_data, remove_statistical_outliers, KEY_COLUMNS
+from data_loader import iter_chunks, load_data
+from streaming_stats import MomentAccumulator
+
+
+def test_moments_match_numpy():
+    rng = np.random.default_rng(1)
+    values = rng.normal(500, 80, 10_001)
+    acc = MomentAccumulator()
+    for part in np.array_split(values, 7):
+        acc.update(part)
+    assert acc.count == len(values)
+    assert np.isclose(acc.mean, values.mean())
+    assert np.isclose(acc.std(), values.std(ddof=1))
+
+
+def test_merged_accumulators_match_single_pass():
+    rng = np.random.default_rng(2)
+    left, right = rng.normal(0, 1, 300), rng.normal(5, 2, 700)
+    merged = MomentAccumulator().update(left).merge(MomentAccumulator().update(right))
+    whole = MomentAccumulator().update(np.concatenate([left, right]))
+    assert merged.count == whole.count
+    assert np.isclose(merged.mean, whole.mean)
+    assert np.isclose(merged.variance(), whole.variance())
+
+
+def test_moments_ignore_nan_and_round_trip():
+    acc = MomentAccumulator().update([1.0, np.nan, 3.0])
+    assert acc.count == 2 and acc.mean == 2.0
+    assert np.isnan(MomentAccumulator().update([4.0]).std())
+    restored = MomentAccumulator.from_dict(acc.to_dict())
+    assert restored.to_dict() == acc.to_dict()
+
+
+def test_streaming_sequential_matches_in_memory(station_csv):
+    full = clean_data(load_data(station_csv)).reset_index(drop=True)
+    reads = []
+
+    def make_chunks():
+        reads.append(True)
+        return iter_chunks(station_csv, chunksize=600)
+    streamed = clean_chunks(make_chunks)
+    pd.testing.assert_frame_equal(streamed, full)
+    # One read for the range rules and statistics, one for the final rows
+    assert len(reads) == 2
+
+
+def test_streaming_joint_matches_in_memory_joint(station_csv):
+    full = clean_data(load_data(station_csv), outlier_mode='joint').reset_index(drop=True)
+    streamed = clean_chunks(lambda: iter_chunks(station_csv, chunksize=600), outlier_mode='joint')
+    pd.testing.assert_frame_equal(streamed, full)
+
+
+def test_joint_mode_uses_unfiltered_statistics(station_frame):
+    df = station_frame.dropna(subset=KEY_COLUMNS)
+    joint = remove_statistical_outliers(df, KEY_COLUMNS, mode='joint')
+    mask = np.ones(len(df), dtype=bool)
+    for col in KEY_COLUMNS:
+        mean, std = df[col].mean(), df[col].std()
+        mask &= df[col].between(mean - 3 * std, mean + 3 * std).to_numpy()
+    pd.testing.assert_frame_equal(joint, df[mask])
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import summary_engine
+from streaming_stats import CovarianceAccumulator
+from summary_engine import Metric, SummaryState, summarize, summarize_chunks, summarize_file
+
+
+def reference_summary(df):
+    """The per-reduction pandas summary Data_summary used to compute."""
+    return {
+        'avg_ghi': df['GHI'].mean(),
+        'max_ghi': df['GHI'].max(),
+        'avg_temp': df['Tamb'].mean(),
+        'avg_humidity': df['RH'].mean(),
+        'avg_wind_speed': df['WS'].mean(),
+        'data_points': len(df),
+        'ghi_temp_corr': df['GHI'].corr(df['Tamb']),
+        'high_ghi_percentage': (df['GHI'] > 500).mean() * 100,
+    }
+
+
+def assert_summary_close(result, expected):
+    assert list(result) == list(expected)
+    for key, value in expected.items():
+        assert result[key] == pytest.approx(value, rel=1e-12), key
+
+
+def test_summary_matches_pandas_reductions(station_frame):
+    # The raw frame has NaN and out-of-range values in the summary columns
+    assert_summary_close(summarize(station_frame), reference_summary(station_frame))
+
+
+def test_chunked_summary_matches_full(station_frame):
+    chunks = [station_frame.iloc[i:i + 700] for i in range(0, len(station_frame), 700)]
+    assert_summary_close(summarize_chunks(chunks), reference_summary(station_frame))
+
+
+def test_states_merge(station_frame):
+    metrics = [Metric('n', 'count', 'RH'), Metric('sd', 'std', 'RH'), Metric('lo', 'min', 'Tamb')]
+    left = SummaryState(metrics).update(station_frame.iloc[:1234])
+    right = SummaryState(metrics).update(station_frame.iloc[1234:])
+    result = left.merge(right).result()
+    assert result['n'] == station_frame['RH'].count()
+    assert result['sd'] == pytest.approx(station_frame['RH'].std())
+    assert result['lo'] == station_frame['Tamb'].min()
+
+
+def test_unknown_statistic_is_rejected():
+    with pytest.raises(ValueError):
+        SummaryState([Metric('x', 'median', 'GHI')])
+
+
+def test_covariance_accumulator_matches_numpy():
+    rng = np.random.default_rng(1)
+    x = rng.normal(size=1000)
+    y = 0.5 * x + rng.normal(size=1000)
+    y[::17] = np.nan
+    acc = CovarianceAccumulator()
+    for start in range(0, 1000, 333):
+        acc.update(x[start:start + 333], y[start:start + 333])
+    keep = ~np.isnan(y)
+    assert acc.count == keep.sum()
+    assert acc.covariance() == pytest.approx(np.cov(x[keep], y[keep])[0, 1])
+    assert acc.correlation() == pytest.approx(np.corrcoef(x[keep], y[keep])[0, 1])
+    restored = CovarianceAccumulator.from_dict(acc.to_dict())
+    assert restored.correlation() == acc.correlation()
+
+
+def test_file_results_are_cached(station_csv, station_frame, monkeypatch):
+    calls = []
+    load_data = summary_engine.load_data
+    monkeypatch.setattr(summary_engine, 'load_data',
+                        lambda *args, **kwargs: calls.append(args) or load_data(*args, **kwargs))
+    first = summarize_file(station_csv)
+    assert summarize_file(station_csv) == first
+    assert len(calls) == 1
+    assert_summary_close(first, reference_summary(station_frame))
+
+    station_frame.iloc[:100].to_csv(station_csv, index=False)
+    assert summarize_file(station_csv)['data_points'] == 100
+    assert len(calls) == 2
+    chunked = summarize_file(station_csv, chunksize=30)
+    assert chunked['data_points'] == 100
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from data_cleaner import clean_data
+from data_loader import load_data
+from rules import evaluate_rules
+from synthetic_data import STATION_COLUMNS, iter_station_chunks, synthetic_station_frame, write_station_csv
+
+
+def test_frame_is_reproducible_and_raw_like():
+    df = synthetic_station_frame(3 * 1440, seed=7)
+    pd.testing.assert_frame_equal(df, synthetic_station_frame(3 * 1440, seed=7))
+    assert list(df.columns) == STATION_COLUMNS
+    assert df['Timestamp'].is_monotonic_increasing
+
+    # Irradiance follows the sun: dark at night, peaking around noon
+    hourly = df.groupby(df['Timestamp'].dt.hour)['GHI'].median()
+    assert hourly.loc[[0, 1, 2, 22, 23]].abs().max() < 10
+    assert hourly.idxmax() in (11, 12, 13)
+
+    # Gaps and faults are present for the validators and cleaners
+    assert df[['GHI', 'Tamb', 'WS']].isna().any().all()
+    violations = evaluate_rules(df).violations
+    assert violations['DNI'] > 0 and violations['WS'] > 0 and violations['RH'] > 0
+
+
+def test_cleaning_keeps_most_rows():
+    df = synthetic_station_frame(5000, seed=1).drop(columns=['Comments'])
+    cleaned = clean_data(df)
+    assert 0.8 * len(df) < len(cleaned) < len(df)
+    assert cleaned['GHI'].min() >= 0 and cleaned['DNI'].max() <= 1500
+
+
+def test_streamed_file_matches_chunks(tmp_path):
+    path = str(tmp_path / 'station.csv')
+    write_station_csv(path, 2500, chunksize=1000, seed=3)
+    expected = pd.concat(iter_station_chunks(2500, chunksize=1000, seed=3), ignore_index=True)
+    loaded = load_data(path, use_cache=False)
+    assert len(loaded) == 2500
+    assert loaded['Timestamp'].diff().dropna().eq(pd.Timedelta(minutes=1)).all()
+    np.testing.assert_allclose(loaded['GHI'], expected['GHI'])
@@ -0,0 +1,30 @@
+import os
+
+import matplotlib.pyplot as plt
+
+from tests.conftest import make_station_frame
+import visualization
+from visualization import render_figures, station_chart_jobs
+
+
+def test_render_figures_writes_every_chart(tmp_path):
+    df = make_station_frame(500)
+    correlation_matrix = df[['GHI', 'DNI', 'DHI', 'WS']].corr()
+    jobs = station_chart_jobs(df, 'Test', correlation_matrix, str(tmp_path))
+    timings = render_figures(jobs, workers=3)
+    assert len(timings) == len(jobs) == 13
+    for name, seconds in timings.items():
+        assert os.path.getsize(tmp_path / name) > 0
+        assert seconds > 0
+    # Nothing was drawn through the global pyplot state
+    assert plt.get_fignums() == []
+
+
+def test_render_figures_is_serial_by_default(tmp_path, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError('no executor expected')
+    monkeypatch.setattr(visualization, 'ThreadPoolExecutor', no_pool)
+    monkeypatch.setattr(visualization, 'ProcessPoolExecutor', no_pool)
+    df = make_station_frame(200)
+    jobs = station_chart_jobs(df, 'Test', df[['GHI', 'DNI']].corr(), str(tmp_path))[:3]
+    assert len(render_figures(jobs)) == 3